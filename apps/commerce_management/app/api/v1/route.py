@@ -1,10 +1,50 @@
-from fastapi import APIRouter
-from app.service.chat.chat import ai_service
+from fastapi import APIRouter, HTTPException
+from app.client.llm.chatgpt import llm_single_flight
+from app.client.llm.scheduler import llm_scheduler
+from app.service.chat.chat import ai_service, intent_batcher
+from app.service.intent.cache import intent_cache
+from app.service.intent.fast_path import intent_fast_path
+from app.service.sheet.broadcast import broadcast_status
+from app.service.telemetry.usage import usage_stats
+from app.service.compose.jobs import compose_jobs
 from app.model.chat.chat_request import ChatRequest
 from app.model.chat.chat_response import ChatResponse
+from app.model.compose.compose_job_response import ComposeJobResponse
 
 api_router = APIRouter()
 
 @api_router.post("/chat", response_model=ChatResponse)
 async def ai_request(req: ChatRequest):
     return await ai_service(req)
+
+
+@api_router.get("/compose/jobs/{job_id}", response_model=ComposeJobResponse)
+async def compose_job_status(job_id: str):
+    job = compose_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="compose job not found")
+    return ComposeJobResponse(
+        job_id=job.job_id,
+        status=job.status,
+        stage=job.stage,
+        total_rows=job.total_rows,
+        written_rows=job.written_rows,
+        worksheet_title=job.worksheet_title,
+        error=job.error,
+        failed_chunks=job.failed_chunks,
+        prefilter=job.prefilter,
+        usage=job.usage,
+    )
+
+
+@api_router.get("/stats/usage")
+async def usage_stats_report():
+    return {
+        "intents": usage_stats.stats(),
+        "intent_fast_path": intent_fast_path.stats(),
+        "intent_cache": intent_cache.stats(),
+        "intent_batcher": intent_batcher.stats(),
+        "llm_single_flight": llm_single_flight.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "broadcast_status": broadcast_status.stats(),
+    }
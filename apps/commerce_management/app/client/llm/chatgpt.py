@@ -1,12 +1,44 @@
+import asyncio
+import hashlib
+import logging
 import os
-from openai import OpenAI
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
 
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+from app.client.llm.scheduler import INTERACTIVE, estimate_call_tokens, llm_scheduler
+from app.service.telemetry.usage import record_llm_call
+
+logger = logging.getLogger(__name__)
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "your-default-api-key")
 MODEL = os.getenv("MODEL", "gpt-4")
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "your-default-api-key"))
-MODEL = os.getenv("MODEL", "gpt-4")
+LLM_TIMEOUT_SEC = float(os.getenv("LLM_TIMEOUT_SEC", "30"))
+LLM_CONNECT_TIMEOUT_SEC = float(os.getenv("LLM_CONNECT_TIMEOUT_SEC", "5"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_KEEPALIVE_EXPIRY_SEC = float(os.getenv("LLM_KEEPALIVE_EXPIRY_SEC", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_SEC = float(os.getenv("LLM_RETRY_BASE_SEC", "0.5"))
+LLM_RETRY_MAX_SEC = float(os.getenv("LLM_RETRY_MAX_SEC", "8"))
+LLM_SINGLE_FLIGHT_ENABLED = os.getenv("LLM_SINGLE_FLIGHT_ENABLED", "1") == "1"
+
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+client = OpenAI(api_key=OPENAI_API_KEY)
 
 def call_llm(system_prompt, message, kwarg1=None) -> str:
         response = client.chat.completions.create(
@@ -18,4 +50,253 @@ def call_llm(system_prompt, message, kwarg1=None) -> str:
             temperature=0,
             response_format={"type": "json_object"},
         )
-        return response.choices[0].message.content or ""
\ No newline at end of file
+        return response.choices[0].message.content or ""
+
+
+_async_client: AsyncOpenAI | None = None
+_async_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _build_async_client() -> AsyncOpenAI:
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY_SEC,
+        ),
+        timeout=httpx.Timeout(LLM_TIMEOUT_SEC, connect=LLM_CONNECT_TIMEOUT_SEC),
+    )
+    # Retries are handled in acall_llm so backoff is jittered and counted in one place.
+    return AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client, max_retries=0)
+
+
+def get_async_client() -> AsyncOpenAI:
+    """
+    Shared AsyncOpenAI client for the running event loop. Pooled connections
+    are bound to the loop that opened them, so a new loop gets a new client.
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        _async_client = _build_async_client()
+        _async_client_loop = loop
+    return _async_client
+
+
+async def aclose_llm_client() -> None:
+    global _async_client, _async_client_loop
+    if _async_client is not None:
+        await _async_client.close()
+    _async_client = None
+    _async_client_loop = None
+
+
+def backoff_delay(attempt: int, base: float = LLM_RETRY_BASE_SEC, cap: float = LLM_RETRY_MAX_SEC) -> float:
+    """
+    Full-jitter exponential backoff for the given 0-based retry attempt.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+@dataclass(frozen=True)
+class LLMResult:
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    ms: float = 0.0
+
+
+SingleFlightKey = tuple[str, str, str]
+
+
+def single_flight_key(system_prompt: str, message: str, model: str = MODEL) -> SingleFlightKey:
+    """
+    (prompt hash, whitespace-folded message, model). Calls run at
+    temperature=0, so requests with equal keys get the same answer.
+    """
+    prompt_hash = hashlib.sha1(system_prompt.encode("utf-8")).hexdigest()
+    return (prompt_hash, " ".join((message or "").split()), model)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one upstream call.
+
+    The first caller for a key starts the call as a task; later callers
+    await the same task through `asyncio.shield`, so a cancelled waiter
+    does not cancel the shared call. The call is only cancelled when every
+    waiter has gone away.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: dict[SingleFlightKey, tuple[asyncio.Task, list[int]]] = {}
+        self._counters = {"calls": 0, "coalesced": 0, "cancelled_waiters": 0, "abandoned": 0}
+
+    async def run(self, key: SingleFlightKey, call: Callable[[], Awaitable[LLMResult]]) -> tuple[LLMResult, bool]:
+        """
+        Returns the call result and whether it came from another caller's call.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._inflight.get(key)
+            if entry is not None and (entry[0].done() or entry[0].get_loop() is not loop):
+                entry = None
+            if entry is None:
+                task = loop.create_task(call())
+                entry = (task, [0])
+                self._inflight[key] = entry
+                task.add_done_callback(lambda done, key=key: self._forget(key, done))
+                self._counters["calls"] += 1
+                coalesced = False
+            else:
+                self._counters["coalesced"] += 1
+                coalesced = True
+            task, waiters = entry
+            waiters[0] += 1
+
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            with self._lock:
+                self._counters["cancelled_waiters"] += 1
+                waiters[0] -= 1
+                abandon = waiters[0] == 0 and not task.done()
+                if abandon:
+                    self._counters["abandoned"] += 1
+            if abandon:
+                task.cancel()
+            raise
+        with self._lock:
+            waiters[0] -= 1
+        return (result, coalesced)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._counters, "inflight": len(self._inflight)}
+
+    def _forget(self, key: SingleFlightKey, task: asyncio.Task) -> None:
+        with self._lock:
+            entry = self._inflight.get(key)
+            if entry is not None and entry[0] is task:
+                del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved when every waiter was cancelled.
+            task.exception()
+
+
+llm_single_flight = SingleFlight()
+
+
+async def acall_llm(
+    system_prompt: str,
+    message: str,
+    timeout: float | None = None,
+    max_retries: int = LLM_MAX_RETRIES,
+    priority: str = INTERACTIVE,
+) -> str:
+    """
+    Async counterpart of `call_llm` on a pooled HTTP client. Timeouts,
+    connection errors, 429 and 5xx responses are retried with jittered
+    backoff; other API errors (e.g. authentication) are raised immediately.
+    Identical concurrent calls share one upstream request (see SingleFlight).
+    Every attempt is admitted by `llm_scheduler` under `priority` and may
+    raise LLMAdmissionError. Token usage is recorded for the current request.
+    """
+    if not LLM_SINGLE_FLIGHT_ENABLED:
+        result, coalesced = await _acall_llm_once(system_prompt, message, timeout, max_retries, priority), False
+    else:
+        result, coalesced = await llm_single_flight.run(
+            single_flight_key(system_prompt, message),
+            lambda: _acall_llm_once(system_prompt, message, timeout, max_retries, priority),
+        )
+    record_llm_call(MODEL, result.prompt_tokens, result.completion_tokens, result.ms, coalesced)
+    return result.content
+
+
+async def _acall_llm_once(
+    system_prompt: str, message: str, timeout: float | None, max_retries: int, priority: str = INTERACTIVE
+) -> LLMResult:
+    estimated = estimate_call_tokens(system_prompt, message)
+    response, started = await _create_with_retries(system_prompt, message, timeout, max_retries, priority, estimated)
+    usage = getattr(response, "usage", None)
+    llm_scheduler.settle(estimated, getattr(usage, "total_tokens", None))
+    return LLMResult(
+        content=response.choices[0].message.content or "",
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+async def astream_llm(
+    system_prompt: str,
+    message: str,
+    timeout: float | None = None,
+    max_retries: int = LLM_MAX_RETRIES,
+    priority: str = INTERACTIVE,
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of `acall_llm` yielding content deltas. Only opening
+    the stream is retried; streams are never coalesced.
+    """
+    estimated = estimate_call_tokens(system_prompt, message)
+    stream, started = await _create_with_retries(
+        system_prompt, message, timeout, max_retries, priority, estimated, stream=True
+    )
+    usage = None
+    try:
+        async for chunk in stream:
+            usage = getattr(chunk, "usage", None) or usage
+            if chunk.choices:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+    finally:
+        llm_scheduler.settle(estimated, getattr(usage, "total_tokens", None))
+        record_llm_call(
+            MODEL,
+            getattr(usage, "prompt_tokens", 0) or 0,
+            getattr(usage, "completion_tokens", 0) or 0,
+            (time.perf_counter() - started) * 1000,
+        )
+
+
+async def _create_with_retries(
+    system_prompt: str,
+    message: str,
+    timeout: float | None,
+    max_retries: int,
+    priority: str,
+    estimated: int,
+    stream: bool = False,
+) -> tuple[Any, float]:
+    """
+    Admit and send one chat completion request, retrying transient errors.
+    Returns the response (or stream) and its perf_counter start time.
+    """
+    extra: dict[str, Any] = {"stream": True, "stream_options": {"include_usage": True}} if stream else {}
+    attempt = 0
+    while True:
+        await llm_scheduler.acquire(priority, estimated)
+        started = time.perf_counter()
+        try:
+            response = await get_async_client().chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": message},
+                ],
+                temperature=0,
+                response_format={"type": "json_object"},
+                timeout=timeout if timeout is not None else LLM_TIMEOUT_SEC,
+                **extra,
+            )
+            return (response, started)
+        except RETRYABLE_ERRORS as exc:
+            if attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning("llm call failed (%s), retry %s in %.2fs", exc.__class__.__name__, attempt + 1, delay)
+            attempt += 1
+            await asyncio.sleep(delay)
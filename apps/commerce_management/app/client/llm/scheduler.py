@@ -0,0 +1,220 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "1") == "1"
+LLM_RATE_RPM = float(os.getenv("LLM_RATE_RPM", "500"))
+LLM_RATE_TPM = float(os.getenv("LLM_RATE_TPM", "150000"))
+# Share of both buckets that bulk calls may not use, kept free for interactive calls.
+LLM_BULK_RESERVE = float(os.getenv("LLM_BULK_RESERVE", "0.2"))
+LLM_INTERACTIVE_QUEUE_LIMIT = int(os.getenv("LLM_INTERACTIVE_QUEUE_LIMIT", "200"))
+LLM_BULK_QUEUE_LIMIT = int(os.getenv("LLM_BULK_QUEUE_LIMIT", "100"))
+# Kakao skill responses must be back within 5 seconds.
+LLM_INTERACTIVE_DEADLINE_SEC = float(os.getenv("LLM_INTERACTIVE_DEADLINE_SEC", "4"))
+LLM_BULK_DEADLINE_SEC = float(os.getenv("LLM_BULK_DEADLINE_SEC", "600"))
+# Completion allowance added to the prompt estimate when admitting a call.
+LLM_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "200"))
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+
+class LLMAdmissionError(Exception):
+    """
+    Raised when a call is rejected because its priority queue is full or it
+    cannot be admitted before its deadline.
+    """
+
+
+def estimate_call_tokens(system_prompt: str, message: str, completion: int = LLM_COMPLETION_TOKENS_ESTIMATE) -> int:
+    # Korean text runs close to one token per character; two chars per token is a safe middle.
+    return (len(system_prompt) + len(message)) // 2 + completion
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = max(1.0, per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float, floor: float = 0.0) -> float:
+        """
+        Seconds until `amount` can be taken while leaving `floor` in the bucket.
+        """
+        self._refill(now)
+        missing = min(amount, self.capacity) + floor - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        # Positive delta charges extra usage; debt is bounded by one bucket.
+        self.tokens = max(-self.capacity, min(self.capacity, self.tokens - delta))
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+@dataclass
+class _Ticket:
+    tokens: int
+    enqueued_at: float
+    deadline: float
+
+
+@dataclass
+class _PriorityClass:
+    name: str
+    queue_limit: int
+    deadline_sec: float
+    reserve: float
+    queue: deque = field(default_factory=deque)
+    counters: dict = field(
+        default_factory=lambda: {
+            "admitted": 0,
+            "rejected_queue_full": 0,
+            "rejected_deadline": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+        }
+    )
+
+
+class LLMScheduler:
+    """
+    Admission control for upstream LLM calls.
+
+    - Token buckets on requests and tokens per minute.
+    - Two priority classes with bounded FIFO queues. Bulk calls are only
+      admitted while no interactive call is waiting and only from the part
+      of each bucket above `bulk_reserve`, so interactive calls never queue
+      behind compose chunks.
+    - A call is rejected up front when its queue is full, and as soon as the
+      buckets show it cannot start before its deadline.
+    """
+
+    def __init__(
+        self,
+        rpm: float = LLM_RATE_RPM,
+        tpm: float = LLM_RATE_TPM,
+        bulk_reserve: float = LLM_BULK_RESERVE,
+        interactive_queue_limit: int = LLM_INTERACTIVE_QUEUE_LIMIT,
+        bulk_queue_limit: int = LLM_BULK_QUEUE_LIMIT,
+        interactive_deadline_sec: float = LLM_INTERACTIVE_DEADLINE_SEC,
+        bulk_deadline_sec: float = LLM_BULK_DEADLINE_SEC,
+        enabled: bool = LLM_SCHEDULER_ENABLED,
+    ) -> None:
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._enabled = enabled
+        self._classes = {
+            INTERACTIVE: _PriorityClass(INTERACTIVE, interactive_queue_limit, interactive_deadline_sec, 0.0),
+            BULK: _PriorityClass(BULK, bulk_queue_limit, bulk_deadline_sec, bulk_reserve),
+        }
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._changed: asyncio.Event | None = None
+
+    async def acquire(self, priority: str, tokens: int, deadline_sec: float | None = None) -> None:
+        if not self._enabled:
+            return
+        cls = self._classes[priority]
+        self._bind_loop()
+        now = time.monotonic()
+        if len(cls.queue) >= cls.queue_limit:
+            self._count(cls, "rejected_queue_full")
+            raise LLMAdmissionError(f"{priority} LLM queue is full")
+
+        ticket = _Ticket(tokens, now, now + (deadline_sec if deadline_sec is not None else cls.deadline_sec))
+        cls.queue.append(ticket)
+        try:
+            while True:
+                now = time.monotonic()
+                wait = self._ready_in(cls, ticket, now)
+                if wait == 0.0:
+                    self._requests.take(1)
+                    self._tokens.take(ticket.tokens)
+                    cls.queue.popleft()
+                    self._admitted(cls, (now - ticket.enqueued_at) * 1000)
+                    return
+                if now + (wait or 0.0) > ticket.deadline:
+                    self._count(cls, "rejected_deadline")
+                    raise LLMAdmissionError(f"{priority} LLM call cannot start before its deadline")
+                await self._wait(wait if wait is not None else ticket.deadline - now)
+        finally:
+            if ticket in cls.queue:
+                cls.queue.remove(ticket)
+            self._notify()
+
+    def settle(self, estimated_tokens: int, actual_tokens: int | None) -> None:
+        """
+        Correct the token bucket once the real usage of an admitted call is known.
+        """
+        if self._enabled and actual_tokens is not None:
+            self._tokens.adjust(actual_tokens - estimated_tokens)
+            self._notify()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            result = {}
+            for name, cls in self._classes.items():
+                counters = dict(cls.counters)
+                admitted = counters["admitted"]
+                counters["wait_ms_avg"] = counters["wait_ms_total"] / admitted if admitted else 0.0
+                counters["queue_depth"] = len(cls.queue)
+                result[name] = counters
+            return result
+
+    def _ready_in(self, cls: _PriorityClass, ticket: _Ticket, now: float) -> float | None:
+        """
+        0 when the ticket can be admitted now, the bucket wait when it is at
+        the head of its queue, None while it waits behind other tickets.
+        """
+        if cls.queue[0] is not ticket:
+            return None
+        if cls.name == BULK and self._classes[INTERACTIVE].queue:
+            return None
+        return max(
+            self._requests.wait_time(1, now, cls.reserve * self._requests.capacity),
+            self._tokens.wait_time(ticket.tokens, now, cls.reserve * self._tokens.capacity),
+        )
+
+    async def _wait(self, timeout: float) -> None:
+        event = self._changed
+        try:
+            await asyncio.wait_for(event.wait(), timeout=max(0.0, timeout))
+        except TimeoutError:
+            pass
+
+    def _notify(self) -> None:
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Tickets from another (closed) loop can never be served.
+            for cls in self._classes.values():
+                cls.queue.clear()
+            self._loop = loop
+            self._changed = asyncio.Event()
+
+    def _admitted(self, cls: _PriorityClass, wait_ms: float) -> None:
+        with self._lock:
+            cls.counters["admitted"] += 1
+            cls.counters["wait_ms_total"] += wait_ms
+            cls.counters["wait_ms_max"] = max(cls.counters["wait_ms_max"], wait_ms)
+
+    def _count(self, cls: _PriorityClass, key: str) -> None:
+        with self._lock:
+            cls.counters[key] += 1
+
+
+llm_scheduler = LLMScheduler()
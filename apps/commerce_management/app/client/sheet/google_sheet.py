@@ -0,0 +1,110 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+
+logger = logging.getLogger(__name__)
+
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+]
+CREDS_PATH = os.getenv("GOOGLE_CREDS_PATH", "creds.json")
+SPREADSHEET_NAME = os.getenv("SPREADSHEET_NAME", "준이샵 라방 시작 24.10/8")
+SPREADSHEET_KEY = os.getenv("SPREADSHEET_KEY", "")
+TOKEN_REFRESH_MARGIN_SEC = int(os.getenv("SHEET_TOKEN_REFRESH_MARGIN_SEC", "300"))
+
+
+class SheetClientPool:
+    """
+    Process-wide holder for the authorized gspread client and spreadsheet handle.
+
+    Credentials are loaded once, the access token is refreshed shortly before it
+    expires, and the spreadsheet is opened by key after the first lookup so that
+    worker threads share one handle instead of re-authorizing per request.
+    """
+
+    def __init__(
+        self,
+        creds_path: str = CREDS_PATH,
+        spreadsheet_name: str = SPREADSHEET_NAME,
+        spreadsheet_key: str = SPREADSHEET_KEY,
+        refresh_margin_sec: int = TOKEN_REFRESH_MARGIN_SEC,
+    ) -> None:
+        self._creds_path = creds_path
+        self._spreadsheet_name = spreadsheet_name
+        self._spreadsheet_key = spreadsheet_key
+        self._refresh_margin = timedelta(seconds=refresh_margin_sec)
+        self._lock = threading.Lock()
+        self._client: gspread.Client | None = None
+        self._spreadsheet: gspread.Spreadsheet | None = None
+        self._counters = {"hits": 0, "misses": 0, "refreshes": 0, "authorizations": 0}
+
+    def get_client(self) -> gspread.Client:
+        with self._lock:
+            return self._ensure_client()
+
+    def get_spreadsheet(self) -> gspread.Spreadsheet:
+        with self._lock:
+            client = self._ensure_client()
+            if self._spreadsheet is not None:
+                self._counters["hits"] += 1
+                return self._spreadsheet
+
+            self._counters["misses"] += 1
+            if self._spreadsheet_key:
+                spreadsheet = client.open_by_key(self._spreadsheet_key)
+            else:
+                spreadsheet = client.open(self._spreadsheet_name)
+                # Later re-opens skip the Drive lookup by name.
+                self._spreadsheet_key = spreadsheet.id
+            self._spreadsheet = spreadsheet
+            return spreadsheet
+
+    def invalidate(self) -> None:
+        """
+        Drop the cached handles, e.g. after an auth error.
+        The next call re-authorizes and re-opens by key.
+        """
+        with self._lock:
+            self._client = None
+            self._spreadsheet = None
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def _ensure_client(self) -> gspread.Client:
+        if self._client is None:
+            creds = ServiceAccountCredentials.from_json_keyfile_name(self._creds_path, SCOPE)
+            self._client = gspread.authorize(creds)
+            self._counters["authorizations"] += 1
+            self._refresh_token(self._client)
+        elif self._token_expiring(self._client):
+            self._refresh_token(self._client)
+        return self._client
+
+    def _token_expiring(self, client: gspread.Client) -> bool:
+        auth: Any = getattr(client.http_client, "auth", None)
+        if auth is None:
+            return False
+        if not getattr(auth, "token", None):
+            return True
+        expiry = getattr(auth, "expiry", None)
+        if expiry is None:
+            return False
+        # google-auth stores expiry as a naive UTC datetime.
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return expiry - now <= self._refresh_margin
+
+    def _refresh_token(self, client: gspread.Client) -> None:
+        client.http_client.login()
+        self._counters["refreshes"] += 1
+        logger.debug("google sheet token refreshed")
+
+
+sheet_pool = SheetClientPool()
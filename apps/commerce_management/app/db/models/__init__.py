@@ -1,6 +1,15 @@
 from .complaint import Complaint
 from .conversation import Conversation
 from .message import Message
+from .sheet_mirror import SheetMirrorState, SheetOrderRow, SheetUserGroup
 from .user import User
 
-__all__ = ["Complaint", "Conversation", "Message", "User"]
+__all__ = [
+    "Complaint",
+    "Conversation",
+    "Message",
+    "SheetMirrorState",
+    "SheetOrderRow",
+    "SheetUserGroup",
+    "User",
+]
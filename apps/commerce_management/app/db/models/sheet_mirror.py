@@ -0,0 +1,55 @@
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+
+
+class SheetMirrorState(Base):
+    __tablename__ = "sheet_mirror_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    spreadsheet_id = Column(String, nullable=False)
+    # gspread worksheet id (or "title:<title>" when unavailable)
+    worksheet_id = Column(String, nullable=False, unique=True)
+    title = Column(String, nullable=False)
+    # Parsed "M/D" title, or the resolved date for the reference tab
+    order_date = Column(Date, nullable=True)
+    # Position in the spreadsheet tab order
+    tab_index = Column(Integer, nullable=False)
+    # True for the "completed" tab used by delivery status lookups
+    is_reference = Column(Boolean, default=False, nullable=False)
+    synced_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class SheetOrderRow(Base):
+    __tablename__ = "sheet_order_rows"
+    __table_args__ = (Index("ix_sheet_order_rows_user_date", "user_key", "order_date"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    worksheet_id = Column(String, nullable=False, index=True)
+    order_date = Column(Date, nullable=True)
+    # 0-based row index inside the worksheet
+    row_index = Column(Integer, nullable=False)
+    # Normalized column B value
+    user_key = Column(String, nullable=False)
+    # Parsed column A value
+    amount = Column(Float, nullable=True)
+    cells = Column(JSONB, nullable=False)
+
+
+class SheetUserGroup(Base):
+    __tablename__ = "sheet_user_groups"
+    __table_args__ = (Index("ix_sheet_user_groups_user_date", "user_key", "order_date"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    worksheet_id = Column(String, nullable=False, index=True)
+    order_date = Column(Date, nullable=True)
+    user_key = Column(String, nullable=False)
+    # Inclusive 0-based row range of the contiguous block
+    start_row = Column(Integer, nullable=False)
+    end_row = Column(Integer, nullable=False)
+    keep = Column(Boolean, default=False, nullable=False)
+    payment_confirmed = Column(Boolean, default=False, nullable=False)
+    # Lower-cased joined cell text per row, used for item matching
+    row_texts = Column(JSONB, nullable=False)
@@ -1,11 +1,18 @@
 
+import asyncio
 from pathlib import Path
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from app.api.v1.route import api_router as MainRouter
+from app.client.llm.chatgpt import aclose_llm_client
+from app.client.sheet.google_sheet import sheet_pool
 from app.db.session import Base, engine
 from app.db import models  # noqa: F401
+from app.service.sheet.broadcast import BROADCAST_MODE_ENABLED, refresh_broadcast_status
+from app.service.sheet.mirror import MIRROR_ENABLED, apply_mirror_changes
+from app.service.sheet.sync import SYNC_ENABLED, TabChange, run_sheet_sync_loop
+from app.service.sheet.worksheet_index import WorksheetIndex
 
 load_dotenv(Path(__file__).resolve().parents[1] / ".env")
 
@@ -16,3 +23,26 @@ app.include_router(router=MainRouter, prefix="/api/v1")
 @app.on_event("startup")
 def create_tables() -> None:
     Base.metadata.create_all(bind=engine)
+
+
+@app.on_event("startup")
+async def start_background_tasks() -> None:
+    app.state.background_tasks = []
+    if SYNC_ENABLED or MIRROR_ENABLED or BROADCAST_MODE_ENABLED:
+        app.state.background_tasks.append(
+            asyncio.create_task(run_sheet_sync_loop(sheet_pool.get_spreadsheet, on_sheet_changes))
+        )
+
+
+def on_sheet_changes(index: WorksheetIndex, changes: list[TabChange]) -> None:
+    if MIRROR_ENABLED:
+        apply_mirror_changes(index, changes)
+    if BROADCAST_MODE_ENABLED:
+        refresh_broadcast_status(index, changes)
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks() -> None:
+    for task in getattr(app.state, "background_tasks", []):
+        task.cancel()
+    await aclose_llm_client()
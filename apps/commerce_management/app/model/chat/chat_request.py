@@ -5,4 +5,5 @@ class ChatRequest(BaseModel):
     session_id: str = Field(..., description="Unique identifier for the chat session")
     user_id:str = Field(..., description="User's id")
     message: str = Field(..., description="User's message to the chatbot")
-    context: Optional[List[str]] = None
\ No newline at end of file
+    context: Optional[List[str]] = None
+    include_usage: bool = Field(False, description="Return token, latency and cache telemetry in usage")
\ No newline at end of file
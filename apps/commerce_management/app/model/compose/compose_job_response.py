@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+
+class ComposeJobResponse(BaseModel):
+    job_id: str = Field(..., description="Background compose job identifier")
+    status: str = Field(..., description="pending | running | done | partial | failed")
+    stage: str = Field(..., description="Current step of the job")
+    total_rows: int = 0
+    written_rows: int = 0
+    worksheet_title: Optional[str] = None
+    error: Optional[str] = None
+    failed_chunks: int = Field(0, description="Transcript chunks whose extraction failed")
+    prefilter: Dict[str, int] = Field(default_factory=dict, description="Lines/tokens removed before extraction")
+    usage: List[str] = Field(default_factory=list, description="LLM tokens, stage timings and cache flags")
@@ -1,35 +1,119 @@
 import asyncio
 import json
+import logging
+import os
 import re
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
 from datetime import date, timedelta
 from typing import Any
 
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 
 from app.model.chat.chat_request import ChatRequest
 from app.model.chat.chat_response import ChatResponse
 from sqlalchemy import select
 
-from app.client.llm.chatgpt import call_llm
+from app.client.llm.chatgpt import acall_llm, astream_llm
+from app.client.llm.scheduler import BULK, LLMAdmissionError
+from app.client.sheet.google_sheet import sheet_pool
+from app.service.compose.chunking import extract_orders_chunked, extract_orders_streaming, person_key
+from app.service.compose.jobs import ComposeJob, compose_jobs
+from app.service.compose.prefilter import COMPOSE_PREFILTER_ENABLED, prefilter_transcript
+from app.service.compose.streaming import OrdersStreamParser
+from app.service.compose.writer import (
+    COMPOSE_STREAM_FLUSH_ROWS,
+    StreamingComposeWriter,
+    build_compose_rows,
+    write_compose_sheet,
+)
+from app.service.intent.batching import INTENT_BATCH_ENABLED, MicroBatcher
+from app.service.intent.cache import INTENT_CACHE_ENABLED, intent_cache, intent_cache_scope
+from app.service.intent.fast_path import intent_fast_path
+from app.service.sheet.broadcast import BROADCAST_MODE_ENABLED, broadcast_status
+from app.service.sheet.mirror import MIRROR_ENABLED, GroupLookup, MirrorView, load_mirror_view
+from app.service.sheet.rows import group_matches_item
+from app.service.sheet.snapshot import snapshot_cache
+from app.service.sheet.user_index import UserGroup
+from app.service.sheet.worksheet_index import WorksheetIndex, worksheet_index_cache
+from app.service.telemetry.usage import record_cache, track_usage, usage_stage, usage_stats
 from app.client.db.psql import session_scope
 from app.db.models.user import User
 
 import app.config.config as configs
 
-SPREADSHEET_NAME = "준이샵 라방 시작 24.10/8"
-COMPLETED_TAB_INDEX = 2  # "3번 탭" (0-based index)
-DATE_TITLE_RE = re.compile(r"^\s*(\d{1,2})\s*/\s*(\d{1,2})\s*$")
+logger = logging.getLogger(__name__)
+
 DATE_TOKEN_RE = re.compile(r"(?P<m>\d{1,2})\s*/\s*(?P<d>\d{1,2})")
 RELATIVE_DAYS_RE = re.compile(r"(?P<n>\d{1,2})\s*일\s*전")
 RANGE_SEP_RE = re.compile(r"(?:~|\\-|부터|에서).*(?:까지)?")
 QUOTED_TEXT_RE = re.compile(r"[\"']([^\"']+)[\"']")
 
+# Short classification calls fail fast; compose calls generate long outputs.
+INTENT_LLM_TIMEOUT_SEC = float(os.getenv("INTENT_LLM_TIMEOUT_SEC", "15"))
+COMPOSE_LLM_TIMEOUT_SEC = float(os.getenv("COMPOSE_LLM_TIMEOUT_SEC", "120"))
+
+INTENT_SYSTEM_PROMPT = (
+    "You are an intent classifier for a live commerce chatbot. "
+    "Choose exactly one intent from: delivery_status, order_status, "
+    "smalltalk, sheet_compose, fallback. "
+    "Return JSON only: {\"intent\":\"<one_of_intents>\"}. "
+    "If ambiguous, use fallback."
+)
+# Intent and order-query fields in one round trip, so order_status skips
+# the separate _parse_order_query_llm call.
+INTENT_QUERY_SYSTEM_PROMPT = (
+    "You are an intent classifier and query parser for a live commerce chatbot. "
+    "Choose exactly one intent from: delivery_status, order_status, "
+    "smalltalk, sheet_compose, fallback. "
+    "For order_status also extract the order lookup fields; otherwise use null. "
+    "Return JSON only with this schema: "
+    "{\"intent\":\"<one_of_intents>\",\"date_from\":\"M/D|null\","
+    "\"date_to\":\"M/D|null\",\"item\":\"string|null\"}. "
+    "Use M/D without year. If the intent is ambiguous, use fallback."
+)
+INTENT_COMBINED_QUERY = os.getenv("INTENT_COMBINED_QUERY", "1") == "1"
+# Same task for several messages at once (INTENT_BATCH_ENABLED).
+INTENT_BATCH_SYSTEM_PROMPT = (
+    "You are an intent classifier and query parser for a live commerce chatbot. "
+    "The user sends JSON {\"messages\":[{\"id\":\"<id>\",\"text\":\"<message>\"}]}. "
+    "For each message choose exactly one intent from: delivery_status, order_status, "
+    "smalltalk, sheet_compose, fallback. "
+    "For order_status also extract the order lookup fields; otherwise use null. "
+    "Return JSON only with this schema: "
+    "{\"results\":{\"<id>\":{\"intent\":\"<one_of_intents>\",\"date_from\":\"M/D|null\","
+    "\"date_to\":\"M/D|null\",\"item\":\"string|null\"}}}. "
+    "Include every id. Use M/D without year. If an intent is ambiguous, use fallback."
+)
+# Cached intents are only reused while the prompt and intent set are unchanged.
+INTENT_CACHE_SCOPE = intent_cache_scope(
+    INTENT_QUERY_SYSTEM_PROMPT if INTENT_COMBINED_QUERY else INTENT_SYSTEM_PROMPT, configs.INTENTS
+)
+
+
 async def ai_service(req: ChatRequest) -> ChatResponse:
-    intent = await _detect_intent_llm(req.message)
-    handler = _get_intent_handler(intent)
-    return await handler(req)
+    with track_usage() as usage:
+        # Filled by the combined intent call with date_from/date_to/item.
+        llm_query: dict[str, Any] = {}
+        fell_through = False
+
+        async def detect(message: str) -> str:
+            nonlocal fell_through
+            fell_through = True
+            return await _detect_intent_cached(message, llm_query)
+
+        with usage_stage("intent"):
+            intent = await intent_fast_path.classify(req.message, detect)
+        record_cache("intent_fast_path", not fell_through)
+
+        if intent == "order_status" and llm_query:
+            response = await order_status_service(req, llm_query=llm_query)
+        else:
+            response = await _get_intent_handler(intent)(req)
+
+    usage_stats.record(intent, usage)
+    if req.include_usage:
+        response.usage = list(response.usage or []) + usage.to_usage()
+    return response
 
 def _ensure_user(user_id: str) -> bool:
     if not user_id:
@@ -48,22 +132,6 @@ def _today_title() -> str:
     return f"{today.month}/{today.day}"
 
 
-def _parse_date_title(title: str) -> date | None:
-    """
-    Parse worksheet titles like "1/22" into a date in the current year.
-    Returns None if the title is not a simple month/day sheet.
-    """
-    m = DATE_TITLE_RE.match(title or "")
-    if not m:
-        return None
-    month = int(m.group(1))
-    day = int(m.group(2))
-    try:
-        return date(date.today().year, month, day)
-    except ValueError:
-        return None
-
-
 def _parse_month_day_token(token: str) -> date | None:
     m = DATE_TOKEN_RE.search(token or "")
     if not m:
@@ -127,170 +195,8 @@ def _extract_item_from_message(message: str) -> str | None:
     return None
 
 
-def _coerce_float(value: Any) -> float | None:
-    if value is None:
-        return None
-    if isinstance(value, (int, float)):
-        return float(value)
-    text = str(value).strip()
-    if not text:
-        return None
-    # Extract the first numeric token and remove commas.
-    match = re.search(r"-?\d[\d,]*(?:\.\d+)?", text)
-    if not match:
-        return None
-    try:
-        return float(match.group(0).replace(",", ""))
-    except ValueError:
-        return None
-
-
-def _normalize_user_key(value: Any) -> str:
-    return str(value or "").strip().lower()
-
-
-def _find_user_group(rows: list[list[Any]], user_id: str) -> tuple[int, int] | None:
-    """
-    Find the last contiguous block (group) of rows where column B matches the user_id.
-    Returns (start_index, end_index) inclusive, or None if not found.
-    """
-    target = _normalize_user_key(user_id)
-    if not target:
-        return None
-
-    matches: list[int] = []
-    for idx, row in enumerate(rows):
-        col_b = row[1] if len(row) > 1 else ""
-        if _normalize_user_key(col_b) == target:
-            matches.append(idx)
-
-    if not matches:
-        return None
-
-    pivot = matches[-1]
-
-    start = pivot
-    while start - 1 >= 0:
-        prev_row = rows[start - 1]
-        prev_b = prev_row[1] if len(prev_row) > 1 else ""
-        if _normalize_user_key(prev_b) != target:
-            break
-        start -= 1
-
-    end = pivot
-    last_index = len(rows) - 1
-    while end + 1 <= last_index:
-        next_row = rows[end + 1]
-        next_b = next_row[1] if len(next_row) > 1 else ""
-        if _normalize_user_key(next_b) != target:
-            break
-        end += 1
-
-    return (start, end)
-
-
-def _group_contains_keep(rows: list[list[Any]], start: int, end: int) -> bool:
-    for idx in range(start, end + 1):
-        row = rows[idx]
-        for cell in row:
-            if "킵" in str(cell):
-                return True
-    return False
-
-
-def _is_payment_confirmed(rows: list[list[Any]], start: int, end: int) -> bool:
-    """
-    Payment is considered confirmed if:
-    - The last row's column A value exists, and
-    - It is strictly greater than the sum of prior column A values in the group.
-    """
-    if start < 0 or end < start or end >= len(rows):
-        return False
-
-    last_row = rows[end]
-    last_amount = _coerce_float(last_row[0] if len(last_row) > 0 else None)
-    if last_amount is None:
-        return False
-
-    grouped_sum = 0.0
-    for idx in range(start, end):
-        row = rows[idx]
-        amount = _coerce_float(row[0] if len(row) > 0 else None)
-        if amount is not None:
-            grouped_sum += amount
-
-    return last_amount > grouped_sum
-
-
-def _select_reference_worksheet(spreadsheet: gspread.Spreadsheet) -> gspread.Worksheet | None:
-    """
-    The business rule says the "3rd tab" represents completed processing.
-    Prefer that tab when it exists; otherwise fall back to the last tab.
-    """
-    worksheets = spreadsheet.worksheets()
-    if not worksheets:
-        return None
-    if len(worksheets) > COMPLETED_TAB_INDEX:
-        return worksheets[COMPLETED_TAB_INDEX]
-    return worksheets[-1]
-
-
-def _resolve_reference_date(
-    spreadsheet: gspread.Spreadsheet, reference_ws: gspread.Worksheet
-) -> date:
-    """
-    Resolve the effective order date:
-    - Use the reference worksheet's date title if available.
-    - Otherwise fall back to the previous date sheet by tab order.
-    - If still unavailable, use today's date.
-    """
-    ws_date = _parse_date_title(reference_ws.title)
-    if ws_date:
-        return ws_date
-
-    worksheets = spreadsheet.worksheets()
-    try:
-        ref_index = worksheets.index(reference_ws)
-    except ValueError:
-        ref_index = -1
-
-    if ref_index > 0:
-        prev_ws = worksheets[ref_index - 1]
-        prev_date = _parse_date_title(prev_ws.title)
-        if prev_date:
-            return prev_date
-
-    # Fall back to the latest date-like sheet if any exist.
-    dated_sheets: list[tuple[date, gspread.Worksheet]] = []
-    for ws in worksheets:
-        parsed = _parse_date_title(ws.title)
-        if parsed:
-            dated_sheets.append((parsed, ws))
-    if dated_sheets:
-        dated_sheets.sort(key=lambda item: item[0])
-        return dated_sheets[-1][0]
-
-    return date.today()
-
-
 def _get_spreadsheet() -> gspread.Spreadsheet:
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name("creds.json", scope)
-    client = gspread.authorize(creds)
-    return client.open(SPREADSHEET_NAME)
-
-
-def _dated_worksheets(spreadsheet: gspread.Spreadsheet) -> list[tuple[date, gspread.Worksheet]]:
-    dated: list[tuple[date, gspread.Worksheet]] = []
-    for ws in spreadsheet.worksheets():
-        parsed = _parse_date_title(ws.title)
-        if parsed:
-            dated.append((parsed, ws))
-    dated.sort(key=lambda item: item[0])
-    return dated
+    return sheet_pool.get_spreadsheet()
 
 
 def _format_date_md(d: date) -> str:
@@ -321,7 +227,7 @@ async def _parse_order_query_llm(message: str) -> dict[str, Any] | None:
         "Use M/D without year. If unknown, use null."
     )
     try:
-        raw = await asyncio.to_thread(call_llm, system_prompt, message)
+        raw = await acall_llm(system_prompt, message, timeout=INTENT_LLM_TIMEOUT_SEC)
         data = json.loads(raw)
         if not isinstance(data, dict):
             return None
@@ -330,9 +236,11 @@ async def _parse_order_query_llm(message: str) -> dict[str, Any] | None:
         return None
 
 
-async def _parse_order_query(message: str) -> dict[str, Any]:
+async def _parse_order_query(message: str, llm_query: dict[str, Any] | None = None) -> dict[str, Any]:
     """
     Combine rule-based extraction with a narrow LLM fallback.
+    `llm_query` holds fields already returned by the combined intent call;
+    when given, no extra LLM call is made.
     """
     dates = _extract_dates_from_message(message)
     item = _extract_item_from_message(message)
@@ -352,7 +260,7 @@ async def _parse_order_query(message: str) -> dict[str, Any]:
 
     needs_llm = date_from is None and date_to is None or item is None
     if needs_llm:
-        llm_data = await _parse_order_query_llm(message)
+        llm_data = llm_query if llm_query is not None else await _parse_order_query_llm(message)
         if llm_data:
             if date_from is None and llm_data.get("date_from"):
                 date_from = _parse_month_day_token(str(llm_data.get("date_from")))
@@ -375,20 +283,18 @@ async def _parse_order_query(message: str) -> dict[str, Any]:
     }
 
 
-def _worksheets_for_range(
-    spreadsheet: gspread.Spreadsheet, date_from: date | None, date_to: date | None
-) -> tuple[list[tuple[date, gspread.Worksheet]], date, date]:
+def _targets_for_range(
+    index: WorksheetIndex, date_from: date | None, date_to: date | None
+) -> tuple[list[tuple[date, Any]], date, date]:
     """
     Select worksheets that match the requested range.
     Falls back to the completed tab when no date range is given.
     """
     if date_from is None and date_to is None:
-        ref_ws = _select_reference_worksheet(spreadsheet)
-        if ref_ws is None:
+        if index.reference is None:
             today = date.today()
             return ([], today, today)
-        ref_date = _resolve_reference_date(spreadsheet, ref_ws)
-        return ([(ref_date, ref_ws)], ref_date, ref_date)
+        return ([(index.reference_date, index.reference)], index.reference_date, index.reference_date)
 
     # If only one side is specified, treat it as a single-day query.
     if date_from is None:
@@ -397,42 +303,55 @@ def _worksheets_for_range(
         date_to = date_from
     assert date_from is not None and date_to is not None
 
-    dated = _dated_worksheets(spreadsheet)
-    in_range = [(d, ws) for (d, ws) in dated if date_from <= d <= date_to]
+    in_range = index.in_range(date_from, date_to)
     if in_range:
         return (in_range, date_from, date_to)
 
     # If there is no exact range match, fall back to the latest sheet before the end date.
-    before_end = [(d, ws) for (d, ws) in dated if d <= date_to]
+    before_end = index.latest_on_or_before(date_to)
     if before_end:
-        d, ws = before_end[-1]
+        d, ws = before_end
         return ([(d, ws)], d, d)
 
     # Final fallback: completed tab or today.
-    ref_ws = _select_reference_worksheet(spreadsheet)
-    if ref_ws is None:
+    if index.reference is None:
         today = date.today()
         return ([], today, today)
-    ref_date = _resolve_reference_date(spreadsheet, ref_ws)
-    return ([(ref_date, ref_ws)], ref_date, ref_date)
-
-
-def _group_matches_item(rows: list[list[Any]], start: int, end: int, item: str | None) -> bool:
-    if not item:
-        return True
-    needle = item.strip().lower()
-    if not needle:
-        return True
-    for idx in range(start, end + 1):
-        row_text = " ".join(str(c) for c in rows[idx]).lower()
-        if needle in row_text:
-            return True
-    return False
+    return ([(index.reference_date, index.reference)], index.reference_date, index.reference_date)
+
+
+def _live_group_lookup(user_id: str) -> GroupLookup:
+    """
+    Group lookup backed by worksheet snapshots (Google Sheets).
+    """
+    def lookup(tabs: list[Any], item: str | None) -> list[tuple[UserGroup | None, bool]]:
+        results: list[tuple[UserGroup | None, bool]] = []
+        for snapshot in snapshot_cache.get_many(tabs):
+            group = snapshot.user_index.last_group(user_id)
+            matches = group is not None and group_matches_item(snapshot.rows, group.start, group.end, item)
+            results.append((group, matches))
+        return results
+
+    return lookup
+
+
+def _mirror_view(user_id: str) -> MirrorView | None:
+    if not MIRROR_ENABLED:
+        return None
+    try:
+        view = load_mirror_view(user_id)
+    except Exception:
+        logger.warning("sheet mirror lookup failed; using live sheet", exc_info=True)
+        view = None
+    record_cache("sheet_mirror", view is not None)
+    return view
 
 
 def _sheet_status_for_user(user_id: str) -> dict[str, Any]:
     """
     Compute delivery/order status signals from the reference worksheet.
+    In broadcast mode answers from the precomputed Redis table; otherwise
+    from the Postgres mirror when it is fresh, then from the live sheet.
     Returns a dict with keys:
     - found: bool
     - payment_confirmed: bool
@@ -440,8 +359,20 @@ def _sheet_status_for_user(user_id: str) -> dict[str, Any]:
     - order_date: date
     - age_days: int
     """
-    spreadsheet = _get_spreadsheet()
-    reference_ws = _select_reference_worksheet(spreadsheet)
+    if BROADCAST_MODE_ENABLED:
+        status = broadcast_status.lookup(user_id)
+        record_cache("broadcast_status", status is not None)
+        if status is not None:
+            return status
+    view = _mirror_view(user_id)
+    if view is not None:
+        return _status_for_user(view.index, view.lookup)
+    index = worksheet_index_cache.get(_get_spreadsheet())
+    return _status_for_user(index, _live_group_lookup(user_id))
+
+
+def _status_for_user(index: WorksheetIndex, lookup: GroupLookup) -> dict[str, Any]:
+    reference_ws = index.reference
     if reference_ws is None:
         return {
             "found": False,
@@ -451,11 +382,10 @@ def _sheet_status_for_user(user_id: str) -> dict[str, Any]:
             "age_days": 0,
         }
 
-    order_date = _resolve_reference_date(spreadsheet, reference_ws)
+    order_date = index.reference_date
     age_days = (date.today() - order_date).days
 
-    rows = reference_ws.get_all_values()
-    group = _find_user_group(rows, user_id)
+    group, _ = lookup([reference_ws], None)[0]
     if group is None:
         return {
             "found": False,
@@ -465,14 +395,10 @@ def _sheet_status_for_user(user_id: str) -> dict[str, Any]:
             "age_days": age_days,
         }
 
-    start, end = group
-    keep = _group_contains_keep(rows, start, end)
-    payment_confirmed = _is_payment_confirmed(rows, start, end)
-
     return {
         "found": True,
-        "payment_confirmed": payment_confirmed,
-        "keep": keep,
+        "payment_confirmed": group.payment_confirmed,
+        "keep": group.keep,
         "order_date": order_date,
         "age_days": age_days,
     }
@@ -480,10 +406,18 @@ def _sheet_status_for_user(user_id: str) -> dict[str, Any]:
 def _sheet_status_for_query(user_id: str, query: dict[str, Any]) -> dict[str, Any]:
     """
     Query-aware status across one or more worksheets.
+    Answers from the Postgres mirror when it is fresh, otherwise from the live sheet.
     """
-    spreadsheet = _get_spreadsheet()
-    targets, effective_from, effective_to = _worksheets_for_range(
-        spreadsheet, query.get("date_from"), query.get("date_to")
+    view = _mirror_view(user_id)
+    if view is not None:
+        return _status_for_query(view.index, view.lookup, query)
+    index = worksheet_index_cache.get(_get_spreadsheet())
+    return _status_for_query(index, _live_group_lookup(user_id), query)
+
+
+def _status_for_query(index: WorksheetIndex, lookup: GroupLookup, query: dict[str, Any]) -> dict[str, Any]:
+    targets, effective_from, effective_to = _targets_for_range(
+        index, query.get("date_from"), query.get("date_to")
     )
     item = query.get("item")
 
@@ -508,25 +442,21 @@ def _sheet_status_for_query(user_id: str, query: dict[str, Any]) -> dict[str, An
     max_age_days = 0
     matched_dates: list[date] = []
 
-    for ws_date, ws in targets:
-        rows = ws.get_all_values()
-        group = _find_user_group(rows, user_id)
+    results = lookup([ws for (_, ws) in targets], item)
+    for (ws_date, _), (group, matches_item) in zip(targets, results):
         if group is None:
             continue
 
-        start, end = group
         found_any = True
 
-        if not _group_matches_item(rows, start, end, item):
+        if not matches_item:
             continue
 
         item_found = True
         matched_dates.append(ws_date)
 
-        keep = _group_contains_keep(rows, start, end)
-        paid = _is_payment_confirmed(rows, start, end)
-        keep_any = keep_any or keep
-        paid_any = paid_any or paid
+        keep_any = keep_any or group.keep
+        paid_any = paid_any or group.payment_confirmed
 
         age_days = (date.today() - ws_date).days
         if age_days > max_age_days:
@@ -562,28 +492,80 @@ def _sheet_status_for_query(user_id: str, query: dict[str, Any]) -> dict[str, An
         "item": item,
     }
 
-async def _detect_intent_llm(message: str) -> str:
-    system_prompt = (
-        "You are an intent classifier for a live commerce chatbot. "
-        "Choose exactly one intent from: delivery_status, order_status, "
-        "smalltalk, sheet_compose, fallback. "
-        "Return JSON only: {\"intent\":\"<one_of_intents>\"}. "
-        "If ambiguous, use fallback."
-    )
-
-    raw = await asyncio.to_thread(call_llm, system_prompt, message)
+async def _detect_intent_cached(message: str, query_out: dict[str, Any] | None = None) -> str:
+    if INTENT_CACHE_ENABLED:
+        cached = await asyncio.to_thread(intent_cache.get, message, INTENT_CACHE_SCOPE)
+        record_cache("intent_cache", cached in configs.INTENTS)
+        if cached in configs.INTENTS:
+            return cached
 
     try:
-        data = json.loads(raw)
-    except json.JSONDecodeError:
+        intent = await _detect_intent_llm(message, query_out=query_out)
+    except LLMAdmissionError:
+        # Shed under load: answer with fallback, but don't cache it for the next repeat.
+        logger.warning("intent LLM call rejected by admission control")
         return "fallback"
+    if intent is None:
+        # Unparseable or unknown output is not a classification; ask again next time.
+        return "fallback"
+    if INTENT_CACHE_ENABLED:
+        await asyncio.to_thread(intent_cache.set, message, INTENT_CACHE_SCOPE, intent)
+    return intent
+
+
+async def _detect_intent_llm(message: str, query_out: dict[str, Any] | None = None) -> str | None:
+    """
+    Classify the message, or None when the LLM output did not parse or named
+    no known intent. With INTENT_COMBINED_QUERY, the same call also returns
+    the order lookup fields, copied into `query_out` for order_status.
+    With INTENT_BATCH_ENABLED, the call is shared with messages arriving in
+    the same short window.
+    """
+    if INTENT_BATCH_ENABLED:
+        data = await intent_batcher.submit(message)
+    else:
+        data = await _intent_single_llm(message)
 
-    intent = data.get("intent", "fallback")
+    intent = data.get("intent")
     if intent not in configs.INTENTS:
-        return "fallback"
+        return None
+    if INTENT_COMBINED_QUERY and intent == "order_status" and query_out is not None:
+        query_out.update({key: data.get(key) for key in ("date_from", "date_to", "item")})
     return intent
 
 
+async def _intent_single_llm(message: str) -> dict[str, Any]:
+    prompt = INTENT_QUERY_SYSTEM_PROMPT if INTENT_COMBINED_QUERY else INTENT_SYSTEM_PROMPT
+    raw = await acall_llm(prompt, message, timeout=INTENT_LLM_TIMEOUT_SEC)
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def _intent_batch_llm(messages: list[str]) -> list[dict[str, Any] | None]:
+    payload = json.dumps(
+        {"messages": [{"id": str(idx), "text": message} for idx, message in enumerate(messages)]},
+        ensure_ascii=False,
+    )
+    raw = await acall_llm(INTENT_BATCH_SYSTEM_PROMPT, payload, timeout=INTENT_LLM_TIMEOUT_SEC)
+    results = json.loads(raw).get("results")
+    if not isinstance(results, dict):
+        raise ValueError("intent batch output has no results object")
+    return [
+        result if isinstance(result, dict) and result.get("intent") in configs.INTENTS else None
+        for result in (results.get(str(idx)) for idx in range(len(messages)))
+    ]
+
+
+# Looked up at call time so the LLM helpers stay patchable.
+intent_batcher = MicroBatcher(
+    lambda messages: _intent_batch_llm(messages),
+    lambda message: _intent_single_llm(message),
+)
+
+
 def _get_intent_handler(intent: str) -> Callable[[ChatRequest], "asyncio.Future[ChatResponse]"]:
     if intent == "delivery_status":
         return delivery_status_service
@@ -598,7 +580,8 @@ def _get_intent_handler(intent: str) -> Callable[[ChatRequest], "asyncio.Future[
 
 async def delivery_status_service(req: ChatRequest) -> ChatResponse:
     try:
-        status = await asyncio.to_thread(_sheet_status_for_user, req.user_id)
+        with usage_stage("sheet_fetch"):
+            status = await asyncio.to_thread(_sheet_status_for_user, req.user_id)
     except FileNotFoundError:
         return ChatResponse(
             session_id=req.session_id,
@@ -628,10 +611,12 @@ async def delivery_status_service(req: ChatRequest) -> ChatResponse:
     )
 
 
-async def order_status_service(req: ChatRequest) -> ChatResponse:
+async def order_status_service(req: ChatRequest, llm_query: dict[str, Any] | None = None) -> ChatResponse:
     try:
-        query = await _parse_order_query(req.message)
-        status = await asyncio.to_thread(_sheet_status_for_query, req.user_id, query)
+        with usage_stage("query_parse"):
+            query = await _parse_order_query(req.message, llm_query)
+        with usage_stage("sheet_fetch"):
+            status = await asyncio.to_thread(_sheet_status_for_query, req.user_id, query)
     except FileNotFoundError:
         return ChatResponse(
             session_id=req.session_id,
@@ -682,8 +667,7 @@ async def fallback_service(req: ChatRequest) -> ChatResponse:
         usage=[],
     )
 
-async def call_sheet_compose_llm(message: str) -> dict[str, list]:
-    system_prompt = (
+COMPOSE_SYSTEM_PROMPT = (
         '채팅 메시지 전체를 전달할 것이다.'
         '그 중에서 문맥상 "주문"으로 명확히 판단되는 내용만 추려라.'
 
@@ -734,27 +718,46 @@ async def call_sheet_compose_llm(message: str) -> dict[str, list]:
 '설명, 주석, 자연어 문장은'
 '절대 포함하지 말 것.'
 
-    )
+)
+# Streaming mode writes orders to the new tab while the model is generating.
+COMPOSE_STREAMING_ENABLED = os.getenv("COMPOSE_STREAMING_ENABLED", "") == "1"
+
+
+async def call_sheet_compose_llm(message: str) -> dict[str, list]:
+    """
+    Extract one transcript chunk. Raises ValueError when the completion is
+    not the expected JSON object (e.g. truncated), so the chunk is reported
+    as failed instead of silently contributing no orders.
+    """
+    raw = await acall_llm(COMPOSE_SYSTEM_PROMPT, message, timeout=COMPOSE_LLM_TIMEOUT_SEC, priority=BULK)
+    logger.debug("compose llm output %s", raw)
 
-    raw = await asyncio.to_thread(call_llm, system_prompt, message)
-    
-    print(raw)
-    
     try:
         data = json.loads(raw)
-    except json.JSONDecodeError:
-        return {"orders": [], "fallbacks": []}
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"compose output is not valid JSON: {exc}") from exc
+    if not isinstance(data, dict):
+        raise ValueError("compose output is not a JSON object")
 
     orders = data.get("orders", [])
     fallbacks = data.get("fallbacks", [])
-
-    if not isinstance(orders, list):
-        orders = []
-    if not isinstance(fallbacks, list):
-        fallbacks = []
+    if not isinstance(orders, list) or not isinstance(fallbacks, list):
+        raise ValueError("compose output orders/fallbacks are not lists")
 
     return {"orders": orders, "fallbacks": fallbacks}
 
+
+async def stream_sheet_compose_llm(message: str, on_order: Callable[[Any], Awaitable[None]]) -> list[Any]:
+    """
+    Streaming variant of `call_sheet_compose_llm`: hands each `orders`
+    entry to `on_order` as soon as it is complete and returns the fallbacks.
+    """
+    parser = OrdersStreamParser()
+    async for delta in astream_llm(COMPOSE_SYSTEM_PROMPT, message, timeout=COMPOSE_LLM_TIMEOUT_SEC, priority=BULK):
+        for order in parser.feed(delta):
+            await on_order(order)
+    return parser.fallbacks()
+
 async def sheet_compose_service(req: ChatRequest) -> ChatResponse:
     # check user is in DB for this feature only
     result = await asyncio.to_thread(_ensure_user, req.session_id)
@@ -766,33 +769,86 @@ async def sheet_compose_service(req: ChatRequest) -> ChatResponse:
             usage=[],
         )
 
-    ai_result = await call_sheet_compose_llm(req.message)
-    orders = ai_result.get("orders", [])
-    fallbacks = ai_result.get("fallbacks", [])
-
-    spreadsheet = _get_spreadsheet()
-    new_sheet = spreadsheet.add_worksheet(title="NewTab")
-
-    for i in range(0, len(orders)):
-        new_sheet.append(orders[i])
-
-    if len(fallbacks) != 0:
-        new_sheet.append([])
-        new_sheet.append(["", "실패 사례"])
-
-        for i in range(0, len(fallbacks)):
-            new_sheet.append(["", fallbacks[i]])
-
-    new_sheet.format("A", {
-        "backgroundColor": {
-            "red": 1.0,
-            "green": 1.0,
-            "blue": 0.0
-        }
-    })
+    job = compose_jobs.start(lambda job: _run_sheet_compose(job, req.message))
 
     return ChatResponse(
         session_id=req.session_id,
-        reply="동작 완료! Google Sheet 확인을 부탁드립니다.",
+        reply=f"시트 작성을 시작했어요. 진행 상황은 작업 ID {job.job_id} 로 확인할 수 있어요.",
         usage=[],
     )
+
+
+async def _run_sheet_compose(job: ComposeJob, message: str) -> None:
+    # The job outlives the chat request, so it keeps its own telemetry record.
+    with track_usage() as usage:
+        try:
+            await _compose_sheet(job, message)
+        finally:
+            job.usage = usage.to_usage()
+            usage_stats.record("sheet_compose_job", usage)
+
+
+async def _compose_sheet(job: ComposeJob, message: str) -> None:
+    if COMPOSE_PREFILTER_ENABLED:
+        job.stage = "prefiltering"
+        filtered = prefilter_transcript(message)
+        job.prefilter = filtered.stats()
+        logger.info("compose prefilter job_id=%s %s", job.job_id, job.prefilter)
+        message = filtered.text
+
+    if COMPOSE_STREAMING_ENABLED:
+        await _compose_sheet_streaming(job, message)
+        return
+
+    job.stage = "extracting"
+    with usage_stage("compose_extract"):
+        ai_result = await extract_orders_chunked(message, call_sheet_compose_llm)
+    _record_failed_chunks(job, ai_result["failed_chunks"])
+    rows = build_compose_rows(ai_result.get("orders", []), ai_result.get("fallbacks", []))
+
+    job.stage = "writing"
+    job.total_rows = len(rows)
+
+    def on_progress(written: int) -> None:
+        job.written_rows = written
+
+    with usage_stage("compose_write"):
+        spreadsheet = await asyncio.to_thread(_get_spreadsheet)
+        new_sheet = await asyncio.to_thread(write_compose_sheet, spreadsheet, rows, on_progress)
+    worksheet_index_cache.invalidate(spreadsheet)
+    job.worksheet_title = new_sheet.title
+
+
+def _record_failed_chunks(job: ComposeJob, failed_chunks: list[int]) -> None:
+    if not failed_chunks:
+        return
+    job.failed_chunks = len(failed_chunks)
+    numbers = ", ".join(str(idx + 1) for idx in failed_chunks)
+    job.error = f"extraction failed for chunks {numbers}; their orders are missing"
+    logger.warning("compose job_id=%s failed_chunks=%s", job.job_id, failed_chunks)
+
+
+async def _compose_sheet_streaming(job: ComposeJob, message: str) -> None:
+    job.stage = "streaming"
+
+    def on_progress(written: int) -> None:
+        job.written_rows = written
+        job.total_rows = written
+
+    spreadsheet = await asyncio.to_thread(_get_spreadsheet)
+    writer = StreamingComposeWriter(spreadsheet, person_key, on_progress=on_progress)
+    new_sheet = await asyncio.to_thread(writer.start)
+
+    async def emit(order: Any) -> None:
+        writer.add_order(order)
+        if writer.pending_rows >= COMPOSE_STREAM_FLUSH_ROWS:
+            await asyncio.to_thread(writer.flush)
+
+    with usage_stage("compose_stream"):
+        result = await extract_orders_streaming(message, stream_sheet_compose_llm, emit)
+        _record_failed_chunks(job, result["failed_chunks"])
+        job.stage = "writing"
+        await asyncio.to_thread(writer.finish, result["fallbacks"])
+    job.total_rows = len(writer.rows)
+    worksheet_index_cache.invalidate(spreadsheet)
+    job.worksheet_title = new_sheet.title
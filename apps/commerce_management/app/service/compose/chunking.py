@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import os
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+COMPOSE_CHUNK_CHARS = int(os.getenv("COMPOSE_CHUNK_CHARS", "6000"))
+COMPOSE_CHUNK_OVERLAP_LINES = int(os.getenv("COMPOSE_CHUNK_OVERLAP_LINES", "3"))
+COMPOSE_LLM_CONCURRENCY = int(os.getenv("COMPOSE_LLM_CONCURRENCY", "4"))
+
+ComposeExtractor = Callable[[str], Awaitable[dict[str, list]]]
+
+
+def split_transcript(
+    transcript: str,
+    max_chars: int = COMPOSE_CHUNK_CHARS,
+    overlap_lines: int = COMPOSE_CHUNK_OVERLAP_LINES,
+) -> list[str]:
+    """
+    Split a chat log on line (message) boundaries into chunks of at most
+    `max_chars`, repeating the last `overlap_lines` lines of each chunk at the
+    start of the next so an order split across the boundary is seen whole.
+    A single line longer than `max_chars` becomes its own chunk.
+    """
+    lines = [line for line in (transcript or "").splitlines() if line.strip()]
+    if not lines:
+        return []
+
+    chunks: list[list[str]] = []
+    current: list[str] = []
+    size = 0
+    fresh = 0  # lines in `current` that are not overlap
+    for line in lines:
+        if fresh and size + len(line) + 1 > max_chars:
+            chunks.append(current)
+            current = current[-overlap_lines:] if overlap_lines > 0 else []
+            size = sum(len(x) + 1 for x in current)
+            fresh = 0
+        current.append(line)
+        size += len(line) + 1
+        fresh += 1
+    if fresh:
+        chunks.append(current)
+    return ["\n".join(chunk) for chunk in chunks]
+
+
+def order_key(order: Any) -> tuple[str, ...]:
+    if isinstance(order, list):
+        return tuple(str(v).strip().lower() for v in order)
+    return (str(order).strip().lower(),)
+
+
+def person_key(order: Any) -> str:
+    if isinstance(order, list) and len(order) > 1:
+        return str(order[1]).strip().lower()
+    return ""
+
+
+def chunk_overlaps(chunks: list[str], overlap_lines: int = COMPOSE_CHUNK_OVERLAP_LINES) -> list[str]:
+    """
+    Text each chunk shares with the previous one (its first `overlap_lines`
+    lines, see `split_transcript`); empty for the first chunk.
+    """
+    overlaps = [""]
+    for prev, chunk in zip(chunks, chunks[1:]):
+        shared = min(max(0, overlap_lines), len(prev.split("\n")))
+        overlaps.append("\n".join(chunk.split("\n")[:shared]) if shared else "")
+    return overlaps
+
+
+def order_in_text(order: Any, text: str) -> bool:
+    """
+    Whether `order` could have been extracted from `text`: one of its buyer
+    ID tokens appears there, and so does its item when it has one.
+    """
+    haystack = (text or "").lower()
+    if not haystack or not isinstance(order, list) or len(order) < 2:
+        return False
+    ids = [token.lstrip("@") for token in str(order[1]).lower().split()]
+    if not any(token and token in haystack for token in ids):
+        return False
+    item = str(order[2]).strip().lower() if len(order) > 2 else ""
+    return not item or item in haystack
+
+
+class OverlapEchoFilter:
+    """
+    Drops the second extraction of orders taken from the lines two adjacent
+    chunks share. Chunks must be fed in order (`start_chunk(0)`, its
+    orders, `start_chunk(1)`, ...).
+
+    An order in chunk k+1 is an echo only when it appears in the shared
+    overlap text and chunk k produced an identical order that also appears
+    there; each such order in chunk k cancels at most one in chunk k+1.
+    A buyer's genuine repeat order outside the overlap is kept.
+    """
+
+    def __init__(self, overlaps: list[str] | None) -> None:
+        self._overlaps = overlaps or []
+        self._echoes: Counter = Counter()
+        self._current: Counter = Counter()
+        self._idx = -1
+
+    def start_chunk(self, idx: int) -> None:
+        self._echoes = self._current
+        self._current = Counter()
+        self._idx = idx
+
+    def is_echo(self, order: Any) -> bool:
+        key = order_key(order)
+        if order_in_text(order, self._overlap(self._idx + 1)):
+            self._current[key] += 1
+        if self._echoes[key] > 0 and order_in_text(order, self._overlap(self._idx)):
+            self._echoes[key] -= 1
+            return True
+        return False
+
+    def _overlap(self, idx: int) -> str:
+        return self._overlaps[idx] if 0 <= idx < len(self._overlaps) else ""
+
+
+def dedupe_fallbacks(groups: list[list[Any]]) -> list[Any]:
+    fallbacks: list[Any] = []
+    seen: set[str] = set()
+    for group in groups:
+        for fallback in group:
+            key = str(fallback).strip()
+            if key in seen:
+                continue
+            seen.add(key)
+            fallbacks.append(fallback)
+    return fallbacks
+
+
+def merge_chunk_results(results: list[dict[str, list]], overlaps: list[str] | None = None) -> dict[str, list]:
+    """
+    Merge per-chunk extractions in chunk order.
+
+    - Orders extracted twice from the `overlaps` text two chunks share are
+      kept once (see OverlapEchoFilter). Without `overlaps` nothing is dropped.
+    - Orders are then regrouped by person in order of first appearance so one
+      person's orders stay in consecutive rows across chunk boundaries.
+    - Fallback lines are de-duplicated keeping the first occurrence.
+    """
+    echo_filter = OverlapEchoFilter(overlaps)
+    merged: list[Any] = []
+    for idx, result in enumerate(results):
+        echo_filter.start_chunk(idx)
+        merged.extend(order for order in result.get("orders", []) if not echo_filter.is_echo(order))
+
+    grouped: dict[str, list[Any]] = {}
+    for order in merged:
+        grouped.setdefault(person_key(order), []).append(order)
+    orders = [order for group in grouped.values() for order in group]
+
+    return {"orders": orders, "fallbacks": dedupe_fallbacks([r.get("fallbacks", []) for r in results])}
+
+
+async def extract_orders_chunked(
+    transcript: str,
+    extract: ComposeExtractor,
+    max_chars: int = COMPOSE_CHUNK_CHARS,
+    overlap_lines: int = COMPOSE_CHUNK_OVERLAP_LINES,
+    concurrency: int = COMPOSE_LLM_CONCURRENCY,
+) -> dict[str, list]:
+    """
+    Run `extract` over transcript chunks concurrently (at most `concurrency`
+    calls in flight) and merge the results. A chunk whose call fails only
+    loses its own orders; its index is logged and listed in `failed_chunks`.
+    """
+    chunks = split_transcript(transcript, max_chars, overlap_lines)
+    if not chunks:
+        return {"orders": [], "fallbacks": [], "failed_chunks": []}
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    failed: list[int] = []
+
+    async def run(idx: int, chunk: str) -> dict[str, list]:
+        async with semaphore:
+            try:
+                return await extract(chunk)
+            except Exception:
+                logger.warning("compose chunk %s/%s failed", idx + 1, len(chunks), exc_info=True)
+                failed.append(idx)
+                return {"orders": [], "fallbacks": []}
+
+    results = await asyncio.gather(*(run(idx, chunk) for idx, chunk in enumerate(chunks)))
+    merged = merge_chunk_results(list(results), chunk_overlaps(chunks, overlap_lines))
+    merged["failed_chunks"] = sorted(failed)
+    return merged
+
+
+OrderSink = Callable[[Any], Awaitable[None]]
+ChunkStreamer = Callable[[str, OrderSink], Awaitable[list[Any]]]
+
+
+async def extract_orders_streaming(
+    transcript: str,
+    stream_chunk: ChunkStreamer,
+    emit: OrderSink,
+    max_chars: int = COMPOSE_CHUNK_CHARS,
+    overlap_lines: int = COMPOSE_CHUNK_OVERLAP_LINES,
+    concurrency: int = COMPOSE_LLM_CONCURRENCY,
+) -> dict[str, list]:
+    """
+    Streaming counterpart of `extract_orders_chunked`.
+
+    `stream_chunk(chunk, on_order)` streams one chunk, calling `on_order` for
+    each order as soon as it is parsed, and returns the chunk's fallbacks.
+    Orders reach `emit` in chunk order (chunk k+1 is held until chunk k is
+    done) so overlap echoes are dropped exactly as in `merge_chunk_results`;
+    the first chunk is emitted live. Returns the de-duplicated `fallbacks`
+    and the `failed_chunks` whose stream broke (orders it emitted before
+    breaking are kept).
+    """
+    chunks = split_transcript(transcript, max_chars, overlap_lines)
+    if not chunks:
+        return {"fallbacks": [], "failed_chunks": []}
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    queues: list[asyncio.Queue] = [asyncio.Queue() for _ in chunks]
+    done = object()
+    failed: list[int] = []
+
+    async def run(idx: int, chunk: str) -> list[Any]:
+        async with semaphore:
+            try:
+                return await stream_chunk(chunk, queues[idx].put)
+            except Exception:
+                logger.warning("compose stream for chunk %s/%s failed", idx + 1, len(chunks), exc_info=True)
+                failed.append(idx)
+                return []
+            finally:
+                queues[idx].put_nowait(done)
+
+    producers = [asyncio.create_task(run(idx, chunk)) for idx, chunk in enumerate(chunks)]
+    try:
+        echo_filter = OverlapEchoFilter(chunk_overlaps(chunks, overlap_lines))
+        for idx, queue in enumerate(queues):
+            echo_filter.start_chunk(idx)
+            while (order := await queue.get()) is not done:
+                if not echo_filter.is_echo(order):
+                    await emit(order)
+        results = await asyncio.gather(*producers)
+    finally:
+        for producer in producers:
+            producer.cancel()
+
+    return {"fallbacks": dedupe_fallbacks(list(results)), "failed_chunks": sorted(failed)}
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+COMPOSE_JOB_HISTORY = int(os.getenv("COMPOSE_JOB_HISTORY", "100"))
+
+
+@dataclass
+class ComposeJob:
+    job_id: str
+    status: str = "pending"
+    stage: str = "queued"
+    total_rows: int = 0
+    written_rows: int = 0
+    worksheet_title: str | None = None
+    error: str | None = None
+    # Transcript chunks whose extraction failed; their orders are missing
+    failed_chunks: int = 0
+    # Line/token counts from the pre-filter stage, empty when it is disabled
+    prefilter: dict[str, int] = field(default_factory=dict)
+    # LLM token, stage timing and cache lines, filled when the job ends
+    usage: list[str] = field(default_factory=list)
+    _task: asyncio.Task | None = field(default=None, repr=False)
+
+
+class ComposeJobRegistry:
+    """
+    In-process registry of background compose jobs.
+    Keeps the most recent `history` jobs so their progress can be polled.
+    """
+
+    def __init__(self, history: int = COMPOSE_JOB_HISTORY) -> None:
+        self._history = history
+        self._jobs: OrderedDict[str, ComposeJob] = OrderedDict()
+
+    def start(self, runner: Callable[[ComposeJob], Awaitable[None]]) -> ComposeJob:
+        job = ComposeJob(job_id=uuid.uuid4().hex)
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self._history:
+            self._jobs.popitem(last=False)
+        job._task = asyncio.create_task(self._run(job, runner))
+        return job
+
+    def get(self, job_id: str) -> ComposeJob | None:
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: ComposeJob, runner: Callable[[ComposeJob], Awaitable[None]]) -> None:
+        job.status = "running"
+        try:
+            await runner(job)
+        except Exception as exc:
+            logger.exception("compose job failed job_id=%s", job.job_id)
+            job.status = "failed"
+            job.error = str(exc) or exc.__class__.__name__
+            return
+        # The sheet is written, but without the orders of the failed chunks.
+        job.status = "partial" if job.failed_chunks else "done"
+        job.stage = "done"
+
+
+compose_jobs = ComposeJobRegistry()
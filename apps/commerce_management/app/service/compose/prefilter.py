@@ -0,0 +1,133 @@
+import os
+import re
+from dataclasses import dataclass
+
+COMPOSE_PREFILTER_ENABLED = os.getenv("COMPOSE_PREFILTER_ENABLED", "1") == "1"
+COMPOSE_PREFILTER_CONTEXT_LINES = int(os.getenv("COMPOSE_PREFILTER_CONTEXT_LINES", "1"))
+
+# "@insta.id", "insta_id123", "카톡 abc", "kakao: abc"
+ID_RE = re.compile(
+    r"@[A-Za-z0-9._]{2,}"
+    r"|\b(?=[A-Za-z0-9._]*[0-9._])[A-Za-z][A-Za-z0-9._]{2,}\b"
+    r"|(?:카톡|카카오|인스타|insta|kakao)\s*(?:아이디|id)?\s*[:：]?\s*[A-Za-z0-9._가-힣]+",
+    re.IGNORECASE,
+)
+# "39,000원", "3만", "2만5천", "15000"
+PRICE_RE = re.compile(r"\d[\d,]*\s*(?:원|만\s*\d*\s*천?|천)|\b\d{4,}\b")
+# "1개", "2장", "3벌", "S", "FREE", "55", "66", "230mm"
+QUANTITY_RE = re.compile(
+    r"\d+\s*(?:개|장|벌|켤레|세트|set|ea|pcs|mm|cm|호)"
+    r"|(?<![A-Za-z])(?:XS|S|M|L|XL|XXL|FREE|프리)(?![A-Za-z])"
+    r"|\b(?:44|55|66|77|88)\b",
+    re.IGNORECASE,
+)
+COLOR_WORDS = (
+    "블랙", "검정", "검은", "화이트", "흰색", "하양", "아이보리", "크림", "베이지", "브라운", "갈색",
+    "카키", "올리브", "그린", "초록", "민트", "네이비", "남색", "블루", "파랑", "소라", "스카이",
+    "그레이", "회색", "차콜", "멜란지", "핑크", "분홍", "레드", "빨강", "와인", "버건디", "퍼플",
+    "보라", "라벤더", "옐로우", "노랑", "오렌지", "주황", "실버", "골드", "청", "연청", "중청", "진청",
+)
+ITEM_WORDS = (
+    "후드", "후디", "맨투맨", "티셔츠", "티", "셔츠", "블라우스", "니트", "가디건", "조끼", "베스트",
+    "자켓", "재킷", "점퍼", "패딩", "코트", "야상", "바지", "팬츠", "슬랙스", "청바지", "데님",
+    "레깅스", "스커트", "치마", "원피스", "트레이닝", "세트", "잠옷", "양말", "스타킹", "모자",
+    "가방", "백", "신발", "운동화", "슬리퍼", "부츠", "목도리", "머플러", "장갑", "벨트", "귀걸이",
+    "목걸이", "반지", "팔찌", "악세", "상품", "제품", "아이템",
+)
+ORDER_WORDS = (
+    "주문", "구매", "구입", "찜", "킵", "예약", "입금", "결제", "주세요", "할게요", "할께요", "살게요",
+    "살께요", "담아", "찜요", "가능", "사이즈", "색상", "컬러", "택배", "배송", "가격", "얼마",
+)
+VOCAB_RE = re.compile("|".join(re.escape(w) for w in sorted(COLOR_WORDS + ITEM_WORDS + ORDER_WORDS, key=len, reverse=True)))
+HANGUL_RE = re.compile(r"[가-힣ㄱ-ㅎㅏ-ㅣ]")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough GPT token estimate: about one token per Hangul character and one
+    per four other characters. Only used for reporting.
+    """
+    hangul = len(HANGUL_RE.findall(text))
+    return hangul + (len(text) - hangul + 3) // 4
+
+
+def is_candidate_line(line: str) -> bool:
+    return bool(
+        VOCAB_RE.search(line)
+        or PRICE_RE.search(line)
+        or QUANTITY_RE.search(line)
+        or ID_RE.search(line)
+    )
+
+
+@dataclass
+class PrefilterResult:
+    text: str
+    lines_in: int
+    lines_out: int
+    duplicate_lines: int
+    tokens_in: int
+    tokens_out: int
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "lines_in": self.lines_in,
+            "lines_out": self.lines_out,
+            "lines_removed": self.lines_in - self.lines_out,
+            "duplicate_lines": self.duplicate_lines,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "tokens_removed": self.tokens_in - self.tokens_out,
+        }
+
+
+def prefilter_transcript(transcript: str, context_lines: int = COMPOSE_PREFILTER_CONTEXT_LINES) -> PrefilterResult:
+    """
+    Keep only lines that look like part of an order (IDs, prices, quantities,
+    sizes, color/item/order vocabulary) plus `context_lines` lines around
+    each of them. Blank lines and exact repeats (after whitespace folding)
+    are dropped first.
+
+    A repeat only counts under the same speaker, i.e. the nearest line above
+    containing an ID, so two buyers sending the same text both keep their
+    line. ID lines themselves are only dropped when repeated back to back.
+    """
+    raw_lines = (transcript or "").splitlines()
+    lines: list[str] = []
+    seen: set[tuple[str, str]] = set()
+    speaker = ""
+    previous = ""
+    duplicates = 0
+    for raw in raw_lines:
+        folded = WHITESPACE_RE.sub(" ", raw).strip()
+        if not folded:
+            continue
+        is_id_line = bool(ID_RE.search(folded))
+        if folded == previous or (not is_id_line and (speaker, folded) in seen):
+            duplicates += 1
+            continue
+        if is_id_line:
+            speaker = folded
+        seen.add((speaker, folded))
+        previous = folded
+        lines.append(raw.strip())
+
+    keep = [False] * len(lines)
+    for idx, line in enumerate(lines):
+        if not is_candidate_line(line):
+            continue
+        for near in range(max(0, idx - context_lines), min(len(lines), idx + context_lines + 1)):
+            keep[near] = True
+
+    kept = [line for line, flag in zip(lines, keep) if flag]
+    text = "\n".join(kept)
+    non_blank_in = sum(1 for raw in raw_lines if raw.strip())
+    return PrefilterResult(
+        text=text,
+        lines_in=non_blank_in,
+        lines_out=len(kept),
+        duplicate_lines=duplicates,
+        tokens_in=estimate_tokens(transcript or ""),
+        tokens_out=estimate_tokens(text),
+    )
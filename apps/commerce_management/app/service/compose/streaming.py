@@ -0,0 +1,83 @@
+import json
+from typing import Any
+
+
+class OrdersStreamParser:
+    """
+    Incremental scanner for the compose completion
+    `{"orders": [[...], ...], "fallbacks": [...]}`.
+
+    `feed()` takes the next text delta and returns the `orders` entries that
+    were closed by it, so rows can be written while the model is still
+    generating. `fallbacks()` parses the complete text at the end.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: Any = None
+        self._in_orders = False
+        self._element_start: int | None = None
+        self.orders_seen = 0
+
+    def feed(self, delta: str) -> list[Any]:
+        self._text += delta
+        closed: list[Any] = []
+        text = self._text
+        for idx in range(self._pos, len(text)):
+            ch = text[idx]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = self._loads(text[self._string_start : idx + 1])
+                    elif self._in_orders and self._depth == 2 and self._element_start == self._string_start:
+                        self._close_element(text, idx, closed)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = idx
+                if self._in_orders and self._depth == 2 and self._element_start is None:
+                    self._element_start = idx
+            elif ch in "[{":
+                if self._in_orders and self._depth == 2 and self._element_start is None:
+                    self._element_start = idx
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._last_key == "orders":
+                    self._in_orders = True
+            elif ch in "]}":
+                self._depth -= 1
+                if self._in_orders and self._depth == 2 and self._element_start is not None:
+                    self._close_element(text, idx, closed)
+                elif self._in_orders and self._depth == 1:
+                    self._in_orders = False
+        self._pos = len(text)
+        return closed
+
+    def fallbacks(self) -> list[Any]:
+        data = self._loads(self._text)
+        fallbacks = data.get("fallbacks", []) if isinstance(data, dict) else []
+        return fallbacks if isinstance(fallbacks, list) else []
+
+    def _close_element(self, text: str, idx: int, closed: list[Any]) -> None:
+        element = self._loads(text[self._element_start : idx + 1])
+        self._element_start = None
+        if element is not None:
+            self.orders_seen += 1
+            closed.append(element)
+
+    @staticmethod
+    def _loads(fragment: str) -> Any:
+        try:
+            return json.loads(fragment)
+        except json.JSONDecodeError:
+            return None
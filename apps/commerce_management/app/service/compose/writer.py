@@ -0,0 +1,201 @@
+import os
+from collections.abc import Callable
+from typing import Any
+
+import gspread
+
+COMPOSE_SHEET_TITLE = "NewTab"
+COMPOSE_COLUMNS = 6
+COMPOSE_WRITE_CHUNK_ROWS = int(os.getenv("COMPOSE_WRITE_CHUNK_ROWS", "500"))
+# Streaming mode: rows per batchUpdate while the model is still generating.
+COMPOSE_STREAM_FLUSH_ROWS = int(os.getenv("COMPOSE_STREAM_FLUSH_ROWS", "20"))
+COMPOSE_STREAM_GRID_ROWS = 500
+HIGHLIGHT_COLOR = {"red": 1.0, "green": 1.0, "blue": 0.0}
+
+
+def build_compose_rows(orders: list[Any], fallbacks: list[Any]) -> list[list[Any]]:
+    """
+    Sheet layout: one row per order, then a blank row, a "실패 사례" header
+    and one row per fallback line.
+    """
+    rows: list[list[Any]] = [_order_row(order) for order in orders]
+    rows.extend(_fallback_rows(fallbacks))
+    return rows
+
+
+def _order_row(order: Any) -> list[Any]:
+    return list(order) if isinstance(order, list) else [order]
+
+
+def _fallback_rows(fallbacks: list[Any]) -> list[list[Any]]:
+    if not fallbacks:
+        return []
+    return [[], ["", "실패 사례"]] + [["", fallback] for fallback in fallbacks]
+
+
+def _cell(value: Any) -> dict[str, Any]:
+    if value is None:
+        return {}
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
+
+
+def _update_cells_request(sheet_id: int, start_row: int, rows: list[list[Any]]) -> dict[str, Any]:
+    return {
+        "updateCells": {
+            "start": {"sheetId": sheet_id, "rowIndex": start_row, "columnIndex": 0},
+            "rows": [{"values": [_cell(v) for v in row]} for row in rows],
+            "fields": "userEnteredValue",
+        }
+    }
+
+
+def _highlight_request(sheet_id: int) -> dict[str, Any]:
+    # Same effect as worksheet.format("A", {"backgroundColor": ...}).
+    return {
+        "repeatCell": {
+            "range": {"sheetId": sheet_id, "startColumnIndex": 0, "endColumnIndex": 1},
+            "cell": {"userEnteredFormat": {"backgroundColor": HIGHLIGHT_COLOR}},
+            "fields": "userEnteredFormat.backgroundColor",
+        }
+    }
+
+
+def write_compose_sheet(
+    spreadsheet: gspread.Spreadsheet,
+    rows: list[list[Any]],
+    on_progress: Callable[[int], None] | None = None,
+    title: str = COMPOSE_SHEET_TITLE,
+    chunk_rows: int = COMPOSE_WRITE_CHUNK_ROWS,
+) -> gspread.Worksheet:
+    """
+    Create the compose tab and write every row plus the column A highlight
+    with `spreadsheets.batchUpdate`: one call per `chunk_rows` rows, with the
+    highlight riding along in the first call.
+    """
+    width = max([COMPOSE_COLUMNS] + [len(row) for row in rows])
+    worksheet = spreadsheet.add_worksheet(title=title, rows=max(len(rows), 1), cols=width)
+
+    requests: list[dict[str, Any]] = [_highlight_request(worksheet.id)]
+    written = 0
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start : start + chunk_rows]
+        requests.append(_update_cells_request(worksheet.id, start, chunk))
+        spreadsheet.batch_update({"requests": requests})
+        requests = []
+        written += len(chunk)
+        if on_progress is not None:
+            on_progress(written)
+
+    if requests:
+        spreadsheet.batch_update({"requests": requests})
+    return worksheet
+
+
+def _insert_rows_request(sheet_id: int, row: int) -> dict[str, Any]:
+    return {
+        "insertDimension": {
+            "range": {"sheetId": sheet_id, "dimension": "ROWS", "startIndex": row, "endIndex": row + 1},
+            "inheritFromBefore": row > 0,
+        }
+    }
+
+
+def _append_dimension_request(sheet_id: int, dimension: str, length: int) -> dict[str, Any]:
+    return {"appendDimension": {"sheetId": sheet_id, "dimension": dimension, "length": length}}
+
+
+class StreamingComposeWriter:
+    """
+    Writes compose orders to a new tab while they are still being extracted.
+
+    Rows keep the `build_compose_rows` layout: orders of one person stay in
+    consecutive rows, so an order for a person seen earlier is inserted
+    under that person's block (insertDimension) instead of appended.
+    Requests are queued and sent in order with one batchUpdate per `flush()`.
+    """
+
+    def __init__(
+        self,
+        spreadsheet: gspread.Spreadsheet,
+        person_key: Callable[[Any], str],
+        title: str = COMPOSE_SHEET_TITLE,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> None:
+        self._spreadsheet = spreadsheet
+        self._person_key = person_key
+        self._title = title
+        self._on_progress = on_progress
+        self._worksheet: gspread.Worksheet | None = None
+        self._grid_rows = 0
+        self._grid_cols = 0
+        self._rows: list[list[Any]] = []
+        # person -> [first row, last row], in order of first appearance
+        self._blocks: dict[str, list[int]] = {}
+        self._pending: list[dict[str, Any]] = []
+        self.pending_rows = 0
+
+    @property
+    def rows(self) -> list[list[Any]]:
+        return self._rows
+
+    def start(self) -> gspread.Worksheet:
+        self._worksheet = self._spreadsheet.add_worksheet(
+            title=self._title, rows=COMPOSE_STREAM_GRID_ROWS, cols=COMPOSE_COLUMNS
+        )
+        self._grid_rows = COMPOSE_STREAM_GRID_ROWS
+        self._grid_cols = COMPOSE_COLUMNS
+        self._pending.append(_highlight_request(self._worksheet.id))
+        return self._worksheet
+
+    def add_order(self, order: Any) -> None:
+        row = _order_row(order)
+        person = self._person_key(order)
+        block = self._blocks.get(person)
+        position = len(self._rows) if block is None else block[1] + 1
+
+        self._ensure_grid(len(self._rows) + 1, len(row))
+        if position < len(self._rows):
+            self._pending.append(_insert_rows_request(self._worksheet.id, position))
+            for other in self._blocks.values():
+                if other[0] >= position:
+                    other[0] += 1
+                    other[1] += 1
+        if block is None:
+            self._blocks[person] = [position, position]
+        else:
+            block[1] += 1
+        self._rows.insert(position, row)
+        self._pending.append(_update_cells_request(self._worksheet.id, position, [row]))
+        self.pending_rows += 1
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        requests, self._pending = self._pending, []
+        self._spreadsheet.batch_update({"requests": requests})
+        self.pending_rows = 0
+        if self._on_progress is not None:
+            self._on_progress(len(self._rows))
+
+    def finish(self, fallbacks: list[Any]) -> gspread.Worksheet:
+        tail = _fallback_rows(fallbacks)
+        if tail:
+            start = len(self._rows)
+            self._ensure_grid(start + len(tail), max(len(r) for r in tail))
+            self._rows.extend(tail)
+            self._pending.append(_update_cells_request(self._worksheet.id, start, tail))
+        self.flush()
+        return self._worksheet
+
+    def _ensure_grid(self, rows: int, cols: int) -> None:
+        if rows > self._grid_rows:
+            grow = max(COMPOSE_STREAM_GRID_ROWS, rows - self._grid_rows)
+            self._pending.append(_append_dimension_request(self._worksheet.id, "ROWS", grow))
+            self._grid_rows += grow
+        if cols > self._grid_cols:
+            self._pending.append(_append_dimension_request(self._worksheet.id, "COLUMNS", cols - self._grid_cols))
+            self._grid_cols = cols
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import os
+import threading
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+INTENT_BATCH_ENABLED = os.getenv("INTENT_BATCH_ENABLED", "") == "1"
+INTENT_BATCH_WINDOW_MS = float(os.getenv("INTENT_BATCH_WINDOW_MS", "50"))
+INTENT_BATCH_MAX_SIZE = int(os.getenv("INTENT_BATCH_MAX_SIZE", "16"))
+
+# Returns one parsed result per message, None where the batch output was unusable.
+BatchRunner = Callable[[list[str]], Awaitable[list[dict[str, Any] | None]]]
+SingleRunner = Callable[[str], Awaitable[dict[str, Any]]]
+
+
+class MicroBatcher:
+    """
+    Collects messages for up to `window_ms` or `max_size` messages and
+    classifies them with one `run_batch` call. Messages the batch output
+    does not cover (or the whole batch, if the call fails) are retried one
+    by one with `run_one`. Identical messages in a window share one slot.
+    """
+
+    def __init__(
+        self,
+        run_batch: BatchRunner,
+        run_one: SingleRunner,
+        window_ms: float = INTENT_BATCH_WINDOW_MS,
+        max_size: int = INTENT_BATCH_MAX_SIZE,
+    ) -> None:
+        self._run_batch = run_batch
+        self._run_one = run_one
+        self._window_sec = window_ms / 1000
+        self._max_size = max(1, max_size)
+        self._pending: dict[str, list[asyncio.Future]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self._counters = {"submitted": 0, "batches": 0, "batched_messages": 0, "single_calls": 0, "fallbacks": 0}
+
+    async def submit(self, message: str) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A new event loop (tests, reload): pending futures of the old one are unusable.
+            self._pending = {}
+            self._timer = None
+            self._loop = loop
+
+        future: asyncio.Future = loop.create_future()
+        self._pending.setdefault(message, []).append(future)
+        with self._lock:
+            self._counters["submitted"] += 1
+        if len(self._pending) >= self._max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window_sec, self._flush)
+        return await future
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict[str, list[asyncio.Future]]) -> None:
+        messages = list(batch)
+        results: list[dict[str, Any] | None] = [None] * len(messages)
+        if len(messages) == 1:
+            with self._lock:
+                self._counters["single_calls"] += 1
+        else:
+            with self._lock:
+                self._counters["batches"] += 1
+                self._counters["batched_messages"] += len(messages)
+            try:
+                output = await self._run_batch(messages)
+                if len(output) == len(messages):
+                    results = list(output)
+                else:
+                    logger.warning("intent batch returned %s results for %s messages", len(output), len(messages))
+            except Exception:
+                logger.warning("intent batch call failed size=%s", len(messages), exc_info=True)
+
+        missing = [idx for idx, result in enumerate(results) if not isinstance(result, dict)]
+        if len(messages) > 1 and missing:
+            with self._lock:
+                self._counters["fallbacks"] += len(missing)
+        singles = await asyncio.gather(*(self._run_one(messages[idx]) for idx in missing), return_exceptions=True)
+        for idx, single in zip(missing, singles):
+            results[idx] = single
+
+        for message, result in zip(messages, results):
+            for future in batch[message]:
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
@@ -0,0 +1,185 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+
+from app.client.db.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+INTENT_CACHE_ENABLED = os.getenv("INTENT_CACHE_ENABLED", "1") == "1"
+INTENT_CACHE_TTL_SEC = int(os.getenv("INTENT_CACHE_TTL_SEC", "86400"))
+INTENT_CACHE_LOCAL_SIZE = int(os.getenv("INTENT_CACHE_LOCAL_SIZE", "2048"))
+INTENT_CACHE_LOCAL_TTL_SEC = float(os.getenv("INTENT_CACHE_LOCAL_TTL_SEC", "600"))
+# How long a worker trusts its copy of the shared version counter.
+INTENT_CACHE_VERSION_REFRESH_SEC = float(os.getenv("INTENT_CACHE_VERSION_REFRESH_SEC", "30"))
+# Longer messages (pasted chat logs) are rarely repeated verbatim.
+INTENT_CACHE_MAX_CHARS = int(os.getenv("INTENT_CACHE_MAX_CHARS", "200"))
+
+INTENT_CACHE_PREFIX = "intent:cache"
+INTENT_CACHE_VERSION_KEY = f"{INTENT_CACHE_PREFIX}:version"
+
+REPEATED_CHAR_RE = re.compile(r"(\D)\1+")
+
+
+def normalize_message(message: str) -> str:
+    """
+    Fold a chat message to its cache key text: NFKC, lower-case, drop
+    whitespace, punctuation, symbols/emoji and collapse repeated characters
+    ("배송언제와요??" and "배송 언제 와요" give the same key).
+    """
+    text = unicodedata.normalize("NFKC", message or "").lower()
+    kept = [
+        ch
+        for ch in text
+        if not ch.isspace() and unicodedata.category(ch)[0] not in ("P", "S", "C", "Z")
+    ]
+    return REPEATED_CHAR_RE.sub(r"\1", "".join(kept))
+
+
+def intent_cache_scope(prompt: str, intents: Iterable[str]) -> str:
+    """
+    Short fingerprint of the classifier prompt and intent set; part of every
+    key, so changing either starts a fresh keyspace.
+    """
+    payload = prompt + "\0" + ",".join(intents)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:10]
+
+
+class IntentCache:
+    """
+    Two-tier cache of LLM intent results keyed by normalized message text.
+
+    - Local tier: per-process LRU with a short TTL.
+    - Shared tier: Redis string keys with `ttl_sec`, shared by all workers.
+
+    Keys carry the classifier scope and a version counter stored in Redis;
+    `flush()` bumps the counter so every worker drops to a fresh keyspace.
+    Redis errors are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        redis: Any = redis_client,
+        ttl_sec: int = INTENT_CACHE_TTL_SEC,
+        local_size: int = INTENT_CACHE_LOCAL_SIZE,
+        local_ttl_sec: float = INTENT_CACHE_LOCAL_TTL_SEC,
+        version_refresh_sec: float = INTENT_CACHE_VERSION_REFRESH_SEC,
+        max_chars: int = INTENT_CACHE_MAX_CHARS,
+    ) -> None:
+        self._redis = redis
+        self._ttl_sec = ttl_sec
+        self._local_size = local_size
+        self._local_ttl_sec = local_ttl_sec
+        self._version_refresh_sec = version_refresh_sec
+        self._max_chars = max_chars
+        self._lock = threading.Lock()
+        self._local: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._version: str | None = None
+        self._version_checked_at = 0.0
+        self._counters = {"local_hits": 0, "redis_hits": 0, "misses": 0, "stores": 0, "redis_errors": 0}
+
+    def get(self, message: str, scope: str) -> str | None:
+        key = self._key(message, scope)
+        if key is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None and entry[1] > now:
+                self._local.move_to_end(key)
+                self._counters["local_hits"] += 1
+                return entry[0]
+
+        try:
+            intent = self._redis.get(key)
+        except Exception:
+            self._redis_error("get")
+            intent = None
+
+        with self._lock:
+            if intent is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["redis_hits"] += 1
+            self._remember(key, intent, now)
+        return intent
+
+    def set(self, message: str, scope: str, intent: str) -> None:
+        key = self._key(message, scope)
+        if key is None:
+            return
+        with self._lock:
+            self._counters["stores"] += 1
+            self._remember(key, intent, time.monotonic())
+        try:
+            self._redis.setex(key, self._ttl_sec, intent)
+        except Exception:
+            self._redis_error("set")
+
+    def flush(self) -> None:
+        try:
+            version = str(self._redis.incr(INTENT_CACHE_VERSION_KEY))
+        except Exception:
+            self._redis_error("flush")
+            version = None
+        with self._lock:
+            self._local.clear()
+            self._version = version
+            self._version_checked_at = time.monotonic() if version is not None else 0.0
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+            self._version = None
+            self._version_checked_at = 0.0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._counters, "local_entries": len(self._local)}
+
+    def _key(self, message: str, scope: str) -> str | None:
+        if not message or len(message) > self._max_chars:
+            return None
+        normalized = normalize_message(message)
+        if not normalized:
+            return None
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        return f"{INTENT_CACHE_PREFIX}:{scope}:v{self._current_version()}:{digest}"
+
+    def _current_version(self) -> str:
+        now = time.monotonic()
+        with self._lock:
+            if self._version is not None and now - self._version_checked_at < self._version_refresh_sec:
+                return self._version
+        try:
+            version = self._redis.get(INTENT_CACHE_VERSION_KEY) or "0"
+        except Exception:
+            self._redis_error("version")
+            version = self._version or "0"
+        with self._lock:
+            if version != self._version:
+                self._local.clear()
+            self._version = version
+            self._version_checked_at = now
+        return version
+
+    def _remember(self, key: str, intent: str, now: float) -> None:
+        self._local[key] = (intent, now + self._local_ttl_sec)
+        self._local.move_to_end(key)
+        while len(self._local) > self._local_size:
+            self._local.popitem(last=False)
+
+    def _redis_error(self, op: str) -> None:
+        with self._lock:
+            self._counters["redis_errors"] += 1
+        logger.warning("intent cache redis %s failed", op, exc_info=True)
+
+
+intent_cache = IntentCache()
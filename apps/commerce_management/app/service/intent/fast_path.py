@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import threading
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+INTENT_FAST_PATH_ENABLED = os.getenv("INTENT_FAST_PATH_ENABLED", "1") == "1"
+INTENT_FAST_PATH_THRESHOLD = float(os.getenv("INTENT_FAST_PATH_THRESHOLD", "0.8"))
+# Fraction of fast-path hits that are also sent to the LLM in the background
+# to measure agreement on the messages the fast path actually answers.
+INTENT_FAST_PATH_SHADOW_RATE = float(os.getenv("INTENT_FAST_PATH_SHADOW_RATE", "0"))
+# A pasted chat log (sheet_compose) is many short lines.
+COMPOSE_MIN_LINES = int(os.getenv("INTENT_COMPOSE_MIN_LINES", "5"))
+
+FALLBACK_INTENT = "fallback"
+
+
+@dataclass(frozen=True)
+class IntentRule:
+    intent: str
+    pattern: re.Pattern
+    # Probability-like evidence in (0, 1); rules for one intent combine as a noisy-OR.
+    weight: float
+
+
+def _rule(intent: str, pattern: str, weight: float) -> IntentRule:
+    return IntentRule(intent, re.compile(pattern, re.IGNORECASE), weight)
+
+
+RULES: tuple[IntentRule, ...] = (
+    _rule("delivery_status", r"배\s*송", 0.7),
+    _rule("delivery_status", r"택\s*배|송\s*장|운송장|발\s*송|출\s*고", 0.8),
+    _rule("delivery_status", r"언제\s*(?:와|오|도착|받|보내|나가)|도\s*착|안\s*(?:왔|와|오)", 0.8),
+    _rule("order_status", r"주\s*문", 0.6),
+    _rule("order_status", r"주문\s*(?:확인|내역|상태|조회|들어)|(?:주문|구매)\s*했", 0.9),
+    _rule("order_status", r"입\s*금|결\s*제|계좌|송\s*금", 0.8),
+    _rule("order_status", r"킵|찜\s*(?:한|했|목록)|장바구니", 0.6),
+    _rule("sheet_compose", r"시트\s*(?:작성|만들|정리|생성)|(?:작성|정리)\s*해\s*줘.*시트", 0.95),
+    _rule("smalltalk", r"^\s*(?:안녕|하이|반가|감사|고마|수고|좋은\s*(?:아침|하루|밤))", 0.85),
+    _rule("smalltalk", r"ㅋㅋ|ㅎㅎ|사랑해|예뻐|이뻐|최고|화이팅|파이팅", 0.6),
+)
+
+
+def _noisy_or(weights: Iterable[float]) -> float:
+    miss = 1.0
+    for weight in weights:
+        miss *= 1.0 - weight
+    return 1.0 - miss
+
+
+def score_intents(message: str, rules: tuple[IntentRule, ...] = RULES) -> dict[str, float]:
+    """
+    Per-intent evidence in [0, 1] from the matching rules.
+    """
+    text = message or ""
+    matched: dict[str, list[float]] = {}
+    if len([line for line in text.splitlines() if line.strip()]) >= COMPOSE_MIN_LINES:
+        matched.setdefault("sheet_compose", []).append(0.9)
+    for rule in rules:
+        if rule.pattern.search(text):
+            matched.setdefault(rule.intent, []).append(rule.weight)
+    return {intent: _noisy_or(weights) for intent, weights in matched.items()}
+
+
+def classify_fast(message: str, rules: tuple[IntentRule, ...] = RULES) -> tuple[str, float]:
+    """
+    Best rule-based intent and its confidence: the top intent's evidence
+    discounted by the runner-up's, so mixed messages fall through to the LLM.
+    Returns ("fallback", 0.0) when no rule matches.
+    """
+    scores = score_intents(message, rules)
+    if not scores:
+        return (FALLBACK_INTENT, 0.0)
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    intent, top = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    return (intent, top * (1.0 - runner_up))
+
+
+class FastPathIntentClassifier:
+    """
+    Rule tier in front of the LLM intent classifier.
+
+    Messages whose rule confidence reaches `threshold` are answered locally;
+    the rest go to the LLM. Tracks the fast-path hit rate and how often the
+    rule guess agrees with the LLM (on fall-throughs, and on a sampled
+    fraction of fast-path hits when `shadow_rate` > 0).
+    """
+
+    def __init__(
+        self,
+        threshold: float = INTENT_FAST_PATH_THRESHOLD,
+        shadow_rate: float = INTENT_FAST_PATH_SHADOW_RATE,
+        enabled: bool = INTENT_FAST_PATH_ENABLED,
+    ) -> None:
+        self._threshold = threshold
+        self._shadow_rate = shadow_rate
+        self._enabled = enabled
+        self._lock = threading.Lock()
+        self._shadow_tasks: set[asyncio.Task] = set()
+        self._counters = {
+            "requests": 0,
+            "fast_hits": 0,
+            "llm_calls": 0,
+            "compared": 0,
+            "agreed": 0,
+            "shadow_compared": 0,
+            "shadow_agreed": 0,
+        }
+
+    async def classify(self, message: str, llm: Callable[[str], Awaitable[str]]) -> str:
+        intent, confidence = classify_fast(message) if self._enabled else (FALLBACK_INTENT, 0.0)
+        with self._lock:
+            self._counters["requests"] += 1
+            fast = self._enabled and confidence >= self._threshold
+            if fast:
+                self._counters["fast_hits"] += 1
+            else:
+                self._counters["llm_calls"] += 1
+
+        if fast:
+            if self._shadow_rate > 0 and random.random() < self._shadow_rate:
+                task = asyncio.create_task(self._shadow(message, intent, llm))
+                self._shadow_tasks.add(task)
+                task.add_done_callback(self._shadow_tasks.discard)
+            return intent
+
+        llm_intent = await llm(message)
+        if confidence > 0:
+            self._record("compared", "agreed", intent == llm_intent)
+        return llm_intent
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            counters = dict(self._counters)
+        requests = counters["requests"]
+        compared = counters["compared"] + counters["shadow_compared"]
+        agreed = counters["agreed"] + counters["shadow_agreed"]
+        return {
+            **counters,
+            "fast_hit_rate": counters["fast_hits"] / requests if requests else 0.0,
+            "agreement_rate": agreed / compared if compared else 0.0,
+        }
+
+    async def _shadow(self, message: str, intent: str, llm: Callable[[str], Awaitable[str]]) -> None:
+        try:
+            llm_intent = await llm(message)
+        except Exception:
+            logger.warning("intent shadow check failed", exc_info=True)
+            return
+        self._record("shadow_compared", "shadow_agreed", intent == llm_intent)
+
+    def _record(self, compared_key: str, agreed_key: str, agreed: bool) -> None:
+        with self._lock:
+            self._counters[compared_key] += 1
+            if agreed:
+                self._counters[agreed_key] += 1
+
+
+def evaluate(
+    samples: Iterable[tuple[str, str]], threshold: float = INTENT_FAST_PATH_THRESHOLD
+) -> dict[str, float]:
+    """
+    Offline metrics over labeled (message, intent) samples: fast-path hit
+    rate and the precision of the answers it gives.
+    """
+    total = hits = correct = 0
+    for message, label in samples:
+        total += 1
+        intent, confidence = classify_fast(message)
+        if confidence >= threshold:
+            hits += 1
+            correct += intent == label
+    return {
+        "samples": total,
+        "fast_hits": hits,
+        "fast_hit_rate": hits / total if total else 0.0,
+        "fast_precision": correct / hits if hits else 0.0,
+    }
+
+
+intent_fast_path = FastPathIntentClassifier()
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import date
+from typing import Any
+
+from app.client.db.redis import redis_client
+from app.service.sheet.rows import normalize_user_key
+from app.service.sheet.snapshot import snapshot_cache, worksheet_identity
+from app.service.sheet.sync import TabChange
+from app.service.sheet.user_index import UserGroupIndex
+from app.service.sheet.worksheet_index import WorksheetIndex
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_MODE_ENABLED = os.getenv("BROADCAST_MODE_ENABLED", "") == "1"
+# Refreshed on every sync tick; if the sync loop stops, lookups fall back to the sheet.
+BROADCAST_STATUS_TTL_SEC = int(os.getenv("BROADCAST_STATUS_TTL_SEC", "600"))
+
+BROADCAST_STATUS_KEY = "sheet:broadcast:status"
+# Hash field holding the table metadata; user keys are never empty strings.
+META_FIELD = ""
+
+
+def build_status_table(user_index: UserGroupIndex) -> dict[str, str]:
+    """
+    Per-buyer keep / payment flags of the last group on the reference tab,
+    serialized as hash field values. Same group `_status_for_user` reads.
+    """
+    table: dict[str, str] = {}
+    for key, groups in user_index.items():
+        if not key or not groups:
+            continue
+        group = groups[-1]
+        table[key] = json.dumps({"keep": group.keep, "payment_confirmed": group.payment_confirmed})
+    return table
+
+
+def table_fingerprint(worksheet_id: str, order_date: date, table: dict[str, str]) -> str:
+    payload = json.dumps([worksheet_id, order_date.isoformat(), sorted(table.items())], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class BroadcastStatusTable:
+    """
+    Precomputed delivery status for every buyer on the reference tab, kept
+    in one Redis hash shared by all workers.
+
+    - `refresh()` runs after each sheet sync. It rebuilds the table only when
+      the reference tab, its order date or its rows changed, writes it to a
+      temporary key and RENAMEs it over the live one, so readers never see a
+      half-written table. Other replicas skip an identical rebuild.
+    - `lookup()` is one HMGET (buyer field + metadata field). It returns None
+      when there is no live table, and callers then read the sheet.
+    """
+
+    def __init__(
+        self, redis: Any = redis_client, key: str = BROADCAST_STATUS_KEY, ttl_sec: int = BROADCAST_STATUS_TTL_SEC
+    ) -> None:
+        self._redis = redis
+        self._key = key
+        self._ttl = ttl_sec
+        self._lock = threading.Lock()
+        self._published: tuple[str, str] | None = None
+        self._counters = {
+            "hits": 0,
+            "not_found": 0,
+            "unavailable": 0,
+            "errors": 0,
+            "refreshes": 0,
+            "refresh_skipped": 0,
+        }
+
+    def refresh(self, index: WorksheetIndex, changes: list[TabChange] | None = None) -> bool:
+        """
+        Publish the table for `index.reference` if it changed. Returns True
+        when a new table was written. Rows come from the sync change when the
+        reference tab is among `changes`, otherwise from the snapshot cache.
+        """
+        reference = index.reference
+        if reference is None:
+            return False
+        worksheet_id = worksheet_identity(reference)[1]
+        order_date = index.reference_date
+
+        change = next((c for c in changes or [] if worksheet_identity(c.worksheet)[1] == worksheet_id), None)
+        with self._lock:
+            published = self._published
+        # Reference rows unchanged since our last publish: just keep the table
+        # alive. EXPIRE returns False when the live key is gone, so rebuild then.
+        if change is None and published == (worksheet_id, order_date.isoformat()) and self._redis.expire(self._key, self._ttl):
+            self._count("refresh_skipped")
+            return False
+
+        user_index = change.user_index if change is not None else snapshot_cache.get(reference).user_index
+        table = build_status_table(user_index)
+        fingerprint = table_fingerprint(worksheet_id, order_date, table)
+
+        live_meta = self._read_meta(self._redis.hget(self._key, META_FIELD))
+        if live_meta is not None and live_meta.get("fingerprint") == fingerprint:
+            # Another worker already published this exact table.
+            self._redis.expire(self._key, self._ttl)
+            self._remember(worksheet_id, order_date)
+            self._count("refresh_skipped")
+            return False
+
+        meta = {
+            "worksheet_id": worksheet_id,
+            "order_date": order_date.isoformat(),
+            "fingerprint": fingerprint,
+            "built_at": time.time(),
+        }
+        staging = f"{self._key}:staging:{uuid.uuid4().hex}"
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.hset(staging, mapping={**table, META_FIELD: json.dumps(meta)})
+        pipe.expire(staging, self._ttl)
+        pipe.rename(staging, self._key)
+        pipe.execute()
+
+        self._remember(worksheet_id, order_date)
+        self._count("refreshes")
+        logger.info("broadcast status table published buyers=%s worksheet=%s", len(table), worksheet_id)
+        return True
+
+    def lookup(self, user_id: str) -> dict[str, Any] | None:
+        """
+        Status dict in the shape `_status_for_user` returns, or None when no
+        table is live (or Redis is unreachable).
+        """
+        user_key = normalize_user_key(user_id)
+        try:
+            raw_status, raw_meta = self._redis.hmget(self._key, [user_key or META_FIELD, META_FIELD])
+        except Exception:
+            logger.warning("broadcast status lookup failed", exc_info=True)
+            self._count("errors")
+            return None
+
+        meta = self._read_meta(raw_meta)
+        if meta is None:
+            self._count("unavailable")
+            return None
+
+        order_date = date.fromisoformat(meta["order_date"])
+        status = {
+            "found": False,
+            "payment_confirmed": False,
+            "keep": False,
+            "order_date": order_date,
+            "age_days": (date.today() - order_date).days,
+        }
+        if user_key and raw_status is not None:
+            flags = json.loads(raw_status)
+            status.update(found=True, keep=bool(flags["keep"]), payment_confirmed=bool(flags["payment_confirmed"]))
+            self._count("hits")
+        else:
+            self._count("not_found")
+        return status
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._published = None
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def _read_meta(self, raw: str | None) -> dict[str, Any] | None:
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def _remember(self, worksheet_id: str, order_date: date) -> None:
+        with self._lock:
+            self._published = (worksheet_id, order_date.isoformat())
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+
+broadcast_status = BroadcastStatusTable()
+
+
+def refresh_broadcast_status(index: WorksheetIndex, changes: list[TabChange]) -> None:
+    """
+    `run_sheet_sync_loop` change callback.
+    """
+    try:
+        broadcast_status.refresh(index, changes)
+    except Exception:
+        logger.warning("broadcast status refresh failed", exc_info=True)
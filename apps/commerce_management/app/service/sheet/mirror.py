@@ -0,0 +1,228 @@
+import logging
+import os
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any
+
+from sqlalchemy import and_, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.client.db.psql import session_scope
+from app.db.models.sheet_mirror import SheetMirrorState, SheetOrderRow, SheetUserGroup
+from app.service.sheet.rows import coerce_float, normalize_user_key
+from app.service.sheet.snapshot import TabKey, worksheet_identity
+from app.service.sheet.sync import TabChange
+from app.service.sheet.user_index import UserGroup
+from app.service.sheet.worksheet_index import WorksheetIndex, parse_date_title
+
+logger = logging.getLogger(__name__)
+
+MIRROR_ENABLED = os.getenv("SHEET_MIRROR_ENABLED", "") == "1"
+MIRROR_MAX_AGE_SEC = float(os.getenv("SHEET_MIRROR_MAX_AGE_SEC", "120"))
+MIRROR_LOCK_KEY = 710_001
+
+# (tabs, item) -> [(last user group on the tab, group matches item)] per tab
+GroupLookup = Callable[[list[Any], str | None], list[tuple[UserGroup | None, bool]]]
+
+# Changes detected by this worker that have not been written yet.
+_pending: dict[TabKey, TabChange] = {}
+_pending_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class MirrorTab:
+    """
+    Detached copy of a SheetMirrorState row; quacks like a worksheet for WorksheetIndex.
+    """
+
+    worksheet_id: str
+    title: str
+    tab_index: int
+    synced_at: datetime
+
+
+@dataclass
+class MirrorView:
+    """
+    Everything the status functions need for one user, loaded in a single query.
+    """
+
+    index: WorksheetIndex
+    groups: dict[str, tuple[UserGroup, list[str]]]
+    synced_at: datetime
+
+    def lookup(self, tabs: list[Any], item: str | None) -> list[tuple[UserGroup | None, bool]]:
+        needle = (item or "").strip().lower()
+        results: list[tuple[UserGroup | None, bool]] = []
+        for tab in tabs:
+            found = self.groups.get(tab.worksheet_id)
+            if found is None:
+                results.append((None, False))
+                continue
+            group, row_texts = found
+            matches = not needle or any(needle in text for text in row_texts)
+            results.append((group, matches))
+        return results
+
+
+def load_mirror_view(user_id: str, max_age_sec: float = MIRROR_MAX_AGE_SEC) -> MirrorView | None:
+    """
+    Return the mirrored tabs plus the user's groups, or None when the mirror
+    is empty or older than `max_age_sec` (callers then read the live sheet).
+    """
+    key = normalize_user_key(user_id)
+    stmt = (
+        select(
+            SheetMirrorState.worksheet_id,
+            SheetMirrorState.title,
+            SheetMirrorState.tab_index,
+            SheetMirrorState.synced_at,
+            SheetUserGroup.start_row,
+            SheetUserGroup.end_row,
+            SheetUserGroup.keep,
+            SheetUserGroup.payment_confirmed,
+            SheetUserGroup.row_texts,
+        )
+        .outerjoin(
+            SheetUserGroup,
+            and_(
+                SheetUserGroup.worksheet_id == SheetMirrorState.worksheet_id,
+                SheetUserGroup.user_key == key,
+            ),
+        )
+        .order_by(SheetMirrorState.tab_index, SheetUserGroup.end_row)
+    )
+    with session_scope() as db:
+        rows = db.execute(stmt).all()
+
+    if not rows:
+        return None
+
+    tabs: dict[str, MirrorTab] = {}
+    groups: dict[str, tuple[UserGroup, list[str]]] = {}
+    for row in rows:
+        if row.worksheet_id not in tabs:
+            tabs[row.worksheet_id] = MirrorTab(row.worksheet_id, row.title, row.tab_index, row.synced_at)
+        if key and row.start_row is not None:
+            # Ordered by end_row, so the last assignment is the last block.
+            group = UserGroup(row.start_row, row.end_row, row.keep, row.payment_confirmed)
+            groups[row.worksheet_id] = (group, list(row.row_texts or []))
+
+    synced_at = min(tab.synced_at for tab in tabs.values())
+    if synced_at.tzinfo is None:
+        # Drivers without timezone support (e.g. SQLite) return naive UTC values.
+        synced_at = synced_at.replace(tzinfo=timezone.utc)
+    age = (datetime.now(timezone.utc) - synced_at).total_seconds()
+    if age > max_age_sec:
+        return None
+
+    return MirrorView(WorksheetIndex(list(tabs.values())), groups, synced_at)
+
+
+def apply_mirror_changes(index: WorksheetIndex, changes: list[TabChange]) -> bool:
+    """
+    Rewrite only the changed tabs in Postgres and refresh every tab's state row.
+    Returns False when another worker holds the mirror lock; the changes are
+    kept and retried on the next call.
+    """
+    with _pending_lock:
+        for change in changes:
+            _pending[worksheet_identity(change.worksheet)] = change
+        pending = dict(_pending)
+
+    live_ids = [worksheet_identity(ws)[1] for ws in index.worksheets]
+    synced_at = datetime.now(timezone.utc)
+    with session_scope() as db:
+        # Only one uvicorn worker writes the mirror at a time.
+        if not db.execute(select(func.pg_try_advisory_xact_lock(MIRROR_LOCK_KEY))).scalar():
+            return False
+
+        db.execute(delete(SheetMirrorState))
+        for model in (SheetOrderRow, SheetUserGroup):
+            db.execute(delete(model).where(model.worksheet_id.not_in(live_ids)))
+
+        for tab_index, ws in enumerate(index.worksheets):
+            write_tab_state(db, index, ws, tab_index, synced_at)
+
+        for (_, worksheet_id), change in pending.items():
+            if worksheet_id not in live_ids:
+                continue
+            for model in (SheetOrderRow, SheetUserGroup):
+                db.execute(delete(model).where(model.worksheet_id == worksheet_id))
+            write_tab_rows(db, index, change)
+
+    with _pending_lock:
+        for key, change in pending.items():
+            if _pending.get(key) is change:
+                del _pending[key]
+    return True
+
+
+def tab_order_date(index: WorksheetIndex, worksheet: Any) -> date | None:
+    parsed = parse_date_title(worksheet.title)
+    if parsed:
+        return parsed
+    if worksheet is index.reference:
+        return index.reference_date
+    return None
+
+
+def write_tab_state(db: Session, index: WorksheetIndex, worksheet: Any, tab_index: int, synced_at: datetime) -> None:
+    spreadsheet_id, worksheet_id = worksheet_identity(worksheet)
+    db.add(
+        SheetMirrorState(
+            spreadsheet_id=spreadsheet_id,
+            worksheet_id=worksheet_id,
+            title=worksheet.title,
+            order_date=tab_order_date(index, worksheet),
+            tab_index=tab_index,
+            is_reference=worksheet is index.reference,
+            synced_at=synced_at,
+        )
+    )
+
+
+def write_tab_rows(db: Session, index: WorksheetIndex, change: TabChange) -> None:
+    _, worksheet_id = worksheet_identity(change.worksheet)
+    order_date = tab_order_date(index, change.worksheet)
+    rows = change.rows
+
+    order_rows = []
+    for row_index, row in enumerate(rows):
+        user_key = normalize_user_key(row[1] if len(row) > 1 else "")
+        if not user_key:
+            continue
+        order_rows.append(
+            {
+                "worksheet_id": worksheet_id,
+                "order_date": order_date,
+                "row_index": row_index,
+                "user_key": user_key,
+                "amount": coerce_float(row[0] if len(row) > 0 else None),
+                "cells": list(row),
+            }
+        )
+    if order_rows:
+        db.execute(insert(SheetOrderRow), order_rows)
+
+    group_rows = []
+    for user_key, groups in change.user_index.items():
+        for group in groups:
+            group_rows.append(
+                {
+                    "worksheet_id": worksheet_id,
+                    "order_date": order_date,
+                    "user_key": user_key,
+                    "start_row": group.start,
+                    "end_row": group.end,
+                    "keep": group.keep,
+                    "payment_confirmed": group.payment_confirmed,
+                    "row_texts": [
+                        " ".join(str(c) for c in rows[idx]).lower() for idx in range(group.start, group.end + 1)
+                    ],
+                }
+            )
+    if group_rows:
+        db.execute(insert(SheetUserGroup), group_rows)
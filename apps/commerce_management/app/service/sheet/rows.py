@@ -0,0 +1,110 @@
+import re
+from typing import Any
+
+
+def coerce_float(value: Any) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    if not text:
+        return None
+    # Extract the first numeric token and remove commas.
+    match = re.search(r"-?\d[\d,]*(?:\.\d+)?", text)
+    if not match:
+        return None
+    try:
+        return float(match.group(0).replace(",", ""))
+    except ValueError:
+        return None
+
+
+def normalize_user_key(value: Any) -> str:
+    return str(value or "").strip().lower()
+
+
+def find_user_group(rows: list[list[Any]], user_id: str) -> tuple[int, int] | None:
+    """
+    Find the last contiguous block (group) of rows where column B matches the user_id.
+    Returns (start_index, end_index) inclusive, or None if not found.
+    """
+    target = normalize_user_key(user_id)
+    if not target:
+        return None
+
+    matches: list[int] = []
+    for idx, row in enumerate(rows):
+        col_b = row[1] if len(row) > 1 else ""
+        if normalize_user_key(col_b) == target:
+            matches.append(idx)
+
+    if not matches:
+        return None
+
+    pivot = matches[-1]
+
+    start = pivot
+    while start - 1 >= 0:
+        prev_row = rows[start - 1]
+        prev_b = prev_row[1] if len(prev_row) > 1 else ""
+        if normalize_user_key(prev_b) != target:
+            break
+        start -= 1
+
+    end = pivot
+    last_index = len(rows) - 1
+    while end + 1 <= last_index:
+        next_row = rows[end + 1]
+        next_b = next_row[1] if len(next_row) > 1 else ""
+        if normalize_user_key(next_b) != target:
+            break
+        end += 1
+
+    return (start, end)
+
+
+def group_contains_keep(rows: list[list[Any]], start: int, end: int) -> bool:
+    for idx in range(start, end + 1):
+        row = rows[idx]
+        for cell in row:
+            if "킵" in str(cell):
+                return True
+    return False
+
+
+def is_payment_confirmed(rows: list[list[Any]], start: int, end: int) -> bool:
+    """
+    Payment is considered confirmed if:
+    - The last row's column A value exists, and
+    - It is strictly greater than the sum of prior column A values in the group.
+    """
+    if start < 0 or end < start or end >= len(rows):
+        return False
+
+    last_row = rows[end]
+    last_amount = coerce_float(last_row[0] if len(last_row) > 0 else None)
+    if last_amount is None:
+        return False
+
+    grouped_sum = 0.0
+    for idx in range(start, end):
+        row = rows[idx]
+        amount = coerce_float(row[0] if len(row) > 0 else None)
+        if amount is not None:
+            grouped_sum += amount
+
+    return last_amount > grouped_sum
+
+
+def group_matches_item(rows: list[list[Any]], start: int, end: int, item: str | None) -> bool:
+    if not item:
+        return True
+    needle = item.strip().lower()
+    if not needle:
+        return True
+    for idx in range(start, end + 1):
+        row_text = " ".join(str(c) for c in rows[idx]).lower()
+        if needle in row_text:
+            return True
+    return False
@@ -0,0 +1,284 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from gspread.utils import absolute_range_name, fill_gaps
+
+from app.service.sheet.user_index import UserGroupIndex
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TTL_SEC = float(os.getenv("SHEET_SNAPSHOT_TTL_SEC", "30"))
+SNAPSHOT_STALE_SEC = float(os.getenv("SHEET_SNAPSHOT_STALE_SEC", "300"))
+SNAPSHOT_MAX_ENTRIES = int(os.getenv("SHEET_SNAPSHOT_MAX_ENTRIES", "64"))
+FETCH_FANOUT = int(os.getenv("SHEET_FETCH_FANOUT", "4"))
+
+TabKey = tuple[str, str]
+SnapshotKey = tuple[str, str, int]
+
+
+def worksheet_identity(worksheet: Any) -> TabKey:
+    """
+    Return (spreadsheet_id, worksheet_id) for a gspread worksheet.
+    Falls back to the title when the object carries no sheet id.
+    """
+    spreadsheet_id = str(getattr(worksheet, "spreadsheet_id", "") or "")
+    worksheet_id = getattr(worksheet, "id", None)
+    if worksheet_id is None:
+        worksheet_id = f"title:{getattr(worksheet, 'title', '')}"
+    return (spreadsheet_id, str(worksheet_id))
+
+
+def fetch_rows_batch(worksheets: list[Any]) -> list[list[list[Any]]]:
+    """
+    Read several tabs in one `values:batchGet` round trip.
+    Falls back to a bounded concurrent fan-out of `get_all_values()` when the
+    tabs do not share a batch-capable spreadsheet handle.
+    """
+    if not worksheets:
+        return []
+
+    spreadsheet = getattr(worksheets[0], "spreadsheet", None)
+    same_spreadsheet = all(getattr(ws, "spreadsheet", None) is spreadsheet for ws in worksheets)
+    if len(worksheets) > 1 and same_spreadsheet and hasattr(spreadsheet, "values_batch_get"):
+        ranges = [absolute_range_name(ws.title) for ws in worksheets]
+        response = spreadsheet.values_batch_get(ranges)
+        value_ranges = response.get("valueRanges", [])
+        if len(value_ranges) == len(worksheets):
+            results: list[list[list[Any]]] = []
+            for value_range in value_ranges:
+                # Match get_all_values(): rows padded to the same width.
+                try:
+                    results.append(fill_gaps(value_range.get("values", [[]])))
+                except KeyError:
+                    results.append([[]])
+            return results
+
+    if len(worksheets) == 1:
+        return [worksheets[0].get_all_values()]
+    with ThreadPoolExecutor(max_workers=min(FETCH_FANOUT, len(worksheets))) as pool:
+        return list(pool.map(lambda ws: ws.get_all_values(), worksheets))
+
+
+@dataclass
+class WorksheetSnapshot:
+    spreadsheet_id: str
+    worksheet_id: str
+    revision: int
+    # Shared between readers; treat as read-only.
+    rows: list[list[Any]]
+    fetched_at: float
+    _user_index: UserGroupIndex | None = field(default=None, repr=False)
+
+    @property
+    def user_index(self) -> UserGroupIndex:
+        # Built lazily; a concurrent double build is harmless.
+        if self._user_index is None:
+            self._user_index = UserGroupIndex.build(self.rows)
+        return self._user_index
+
+
+class WorksheetSnapshotCache:
+    """
+    LRU cache of `get_all_values()` results keyed by (spreadsheet, worksheet, revision).
+
+    - Fresh entries (younger than ttl) are served directly.
+    - Entries past ttl but within the stale window are served as-is while a
+      background thread revalidates them.
+    - Only one fetch per key runs at a time; concurrent callers wait on it.
+    """
+
+    def __init__(
+        self,
+        ttl_sec: float = SNAPSHOT_TTL_SEC,
+        stale_sec: float = SNAPSHOT_STALE_SEC,
+        max_entries: int = SNAPSHOT_MAX_ENTRIES,
+    ) -> None:
+        self._ttl = ttl_sec
+        self._stale = stale_sec
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[SnapshotKey, WorksheetSnapshot] = OrderedDict()
+        self._revisions: dict[TabKey, int] = {}
+        self._inflight: dict[SnapshotKey, Future] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    def get(self, worksheet: Any) -> WorksheetSnapshot:
+        tab = worksheet_identity(worksheet)
+        with self._lock:
+            key = self._key(tab)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                age = time.monotonic() - entry.fetched_at
+                if age <= self._ttl:
+                    self._counters["hits"] += 1
+                    return entry
+                if age <= self._ttl + self._stale:
+                    self._counters["stale_hits"] += 1
+                    future, owner = self._claim(key)
+                    if owner:
+                        self._background().submit(self._fetch, key, worksheet, future)
+                    return entry
+
+            future, owner = self._claim(key)
+            if owner:
+                self._counters["misses"] += 1
+            else:
+                self._counters["coalesced"] += 1
+
+        if owner:
+            self._fetch(key, worksheet, future)
+        return future.result()
+
+    def get_many(self, worksheets: list[Any]) -> list[WorksheetSnapshot]:
+        """
+        Like `get()` for several tabs; every missing tab is fetched in one batch.
+        """
+        results: list[WorksheetSnapshot | Future] = []
+        owned: list[tuple[SnapshotKey, Any, Future]] = []
+        with self._lock:
+            for worksheet in worksheets:
+                key = self._key(worksheet_identity(worksheet))
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    age = time.monotonic() - entry.fetched_at
+                    if age <= self._ttl:
+                        self._counters["hits"] += 1
+                        results.append(entry)
+                        continue
+                    if age <= self._ttl + self._stale:
+                        self._counters["stale_hits"] += 1
+                        future, owner = self._claim(key)
+                        if owner:
+                            self._background().submit(self._fetch, key, worksheet, future)
+                        results.append(entry)
+                        continue
+
+                future, owner = self._claim(key)
+                if owner:
+                    self._counters["misses"] += 1
+                    owned.append((key, worksheet, future))
+                else:
+                    self._counters["coalesced"] += 1
+                results.append(future)
+
+        if owned:
+            self._fetch_batch(owned)
+        return [r.result() if isinstance(r, Future) else r for r in results]
+
+    def mark_changed(self, spreadsheet_id: str, worksheet_id: str) -> int:
+        """
+        Bump the tab revision so the next read fetches fresh rows.
+        Call this after writing to a tab or when a sync detects a change.
+        """
+        with self._lock:
+            return self._bump((spreadsheet_id, str(worksheet_id)))
+
+    def replace(
+        self, worksheet: Any, rows: list[list[Any]], user_index: UserGroupIndex | None = None
+    ) -> WorksheetSnapshot:
+        """
+        Install rows obtained elsewhere (e.g. an incremental sync) as a new revision.
+        """
+        tab = worksheet_identity(worksheet)
+        with self._lock:
+            revision = self._bump(tab)
+            key = (tab[0], tab[1], revision)
+            snapshot = WorksheetSnapshot(tab[0], tab[1], revision, rows, time.monotonic(), user_index)
+            self._store(key, snapshot)
+            return snapshot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._revisions.clear()
+            self._inflight.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries), "inflight": len(self._inflight)}
+
+    def _key(self, tab: TabKey) -> SnapshotKey:
+        return (tab[0], tab[1], self._revisions.get(tab, 0))
+
+    def _bump(self, tab: TabKey) -> int:
+        revision = self._revisions.get(tab, 0) + 1
+        self._revisions[tab] = revision
+        for key in [k for k in self._entries if k[:2] == tab]:
+            del self._entries[key]
+        return revision
+
+    def _claim(self, key: SnapshotKey) -> tuple[Future, bool]:
+        future = self._inflight.get(key)
+        if future is not None:
+            return (future, False)
+        future = Future()
+        self._inflight[key] = future
+        return (future, True)
+
+    def _fetch(self, key: SnapshotKey, worksheet: Any, future: Future) -> None:
+        try:
+            rows = worksheet.get_all_values()
+        except Exception as exc:
+            logger.warning("worksheet fetch failed key=%s", key, exc_info=True)
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(exc)
+            return
+
+        snapshot = WorksheetSnapshot(key[0], key[1], key[2], rows, time.monotonic())
+        with self._lock:
+            self._inflight.pop(key, None)
+            # A write may have bumped the revision while we were downloading.
+            if self._key(key[:2]) == key:
+                self._store(key, snapshot)
+        future.set_result(snapshot)
+
+    def _fetch_batch(self, owned: list[tuple[SnapshotKey, Any, Future]]) -> None:
+        try:
+            batch = fetch_rows_batch([worksheet for (_, worksheet, _) in owned])
+        except Exception as exc:
+            logger.warning("batched worksheet fetch failed", exc_info=True)
+            with self._lock:
+                for key, _, _ in owned:
+                    self._inflight.pop(key, None)
+            for _, _, future in owned:
+                future.set_exception(exc)
+            return
+
+        snapshots: list[WorksheetSnapshot] = []
+        now = time.monotonic()
+        with self._lock:
+            for (key, _, _), rows in zip(owned, batch):
+                snapshot = WorksheetSnapshot(key[0], key[1], key[2], rows, now)
+                snapshots.append(snapshot)
+                self._inflight.pop(key, None)
+                if self._key(key[:2]) == key:
+                    self._store(key, snapshot)
+        for (_, _, future), snapshot in zip(owned, snapshots):
+            future.set_result(snapshot)
+
+    def _store(self, key: SnapshotKey, snapshot: WorksheetSnapshot) -> None:
+        self._entries[key] = snapshot
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _background(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sheet-revalidate")
+        return self._executor
+
+
+snapshot_cache = WorksheetSnapshotCache()
@@ -0,0 +1,335 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from gspread.utils import absolute_range_name, fill_gaps
+
+from app.service.sheet.snapshot import (
+    TabKey,
+    WorksheetSnapshotCache,
+    fetch_rows_batch,
+    snapshot_cache,
+    worksheet_identity,
+)
+from app.service.sheet.user_index import UserGroupIndex
+from app.service.sheet.worksheet_index import (
+    WorksheetIndex,
+    WorksheetIndexCache,
+    parse_date_title,
+    worksheet_index_cache,
+)
+
+logger = logging.getLogger(__name__)
+
+SYNC_ENABLED = os.getenv("SHEET_SYNC_ENABLED", "") == "1"
+SYNC_INTERVAL_SEC = float(os.getenv("SHEET_SYNC_INTERVAL_SEC", "15"))
+SYNC_BLOCK_ROWS = int(os.getenv("SHEET_SYNC_BLOCK_ROWS", "100"))
+SYNC_TAIL_OVERLAP = int(os.getenv("SHEET_SYNC_TAIL_OVERLAP", "5"))
+# Every Nth sync re-reads every tab in full to catch edits above the tail window.
+SYNC_FULL_VERIFY_EVERY = int(os.getenv("SHEET_SYNC_FULL_VERIFY_EVERY", "20"))
+
+
+@dataclass
+class TabFingerprint:
+    row_count: int
+    block_hashes: list[str]
+    modified: str | None
+
+
+@dataclass
+class TabChange:
+    worksheet: Any
+    rows: list[list[Any]]
+    # First 0-based row that differs from the previous sync (0 for a new tab).
+    changed_from: int
+    user_index: UserGroupIndex
+
+
+def _trim(row: list[Any]) -> list[Any]:
+    """
+    Drop trailing blanks so padding differences between reads do not count as edits.
+    """
+    end = len(row)
+    while end > 0 and row[end - 1] in ("", None):
+        end -= 1
+    return list(row[:end])
+
+
+def block_hashes(rows: list[list[Any]], block_rows: int = SYNC_BLOCK_ROWS) -> list[str]:
+    hashes: list[str] = []
+    for start in range(0, len(rows), block_rows):
+        block = [_trim(row) for row in rows[start : start + block_rows]]
+        payload = json.dumps(block, ensure_ascii=False, separators=(",", ":"))
+        hashes.append(hashlib.sha1(payload.encode("utf-8")).hexdigest())
+    return hashes
+
+
+def first_changed_row(
+    old_rows: list[list[Any]], new_rows: list[list[Any]], old_hashes: list[str], new_hashes: list[str], block_rows: int
+) -> int | None:
+    """
+    Compare block hashes, then rows inside the first differing block.
+    Returns None when both row lists are equivalent.
+    """
+    for block, (old_hash, new_hash) in enumerate(zip(old_hashes, new_hashes)):
+        if old_hash != new_hash:
+            start = block * block_rows
+            for idx in range(start, min(start + block_rows, len(old_rows), len(new_rows))):
+                if _trim(old_rows[idx]) != _trim(new_rows[idx]):
+                    return idx
+            return min(start + block_rows, len(old_rows), len(new_rows))
+    if len(old_rows) != len(new_rows):
+        return min(len(old_rows), len(new_rows))
+    return None
+
+
+def _last_modified(spreadsheet: Any) -> str | None:
+    getter = getattr(spreadsheet, "get_lastUpdateTime", None)
+    if getter is None:
+        return None
+    try:
+        return getter()
+    except Exception:
+        logger.warning("spreadsheet modifiedTime lookup failed", exc_info=True)
+        return None
+
+
+def _fetch_tails(worksheets: list[Any], starts: list[int]) -> list[list[list[Any]]] | None:
+    """
+    Read rows from `starts[i]` (0-based) to the end of each tab in one batch.
+    Returns None when the handle cannot do batched range reads.
+    """
+    spreadsheet = getattr(worksheets[0], "spreadsheet", None)
+    if not hasattr(spreadsheet, "values_batch_get"):
+        return None
+    if any(getattr(ws, "spreadsheet", None) is not spreadsheet for ws in worksheets):
+        return None
+    ranges = [absolute_range_name(ws.title, f"A{start + 1}:ZZ") for ws, start in zip(worksheets, starts)]
+    value_ranges = spreadsheet.values_batch_get(ranges).get("valueRanges", [])
+    if len(value_ranges) != len(worksheets):
+        return None
+    return [value_range.get("values", []) for value_range in value_ranges]
+
+
+class SheetSyncer:
+    """
+    Incremental change detection for the order tabs.
+
+    - Spreadsheet modifiedTime unchanged: nothing is read.
+    - Hot tabs (reference tab, latest dated tab, tabs that changed recently)
+      are read from `row_count - overlap` to the end; if the overlap rows
+      still match, only the appended window is applied.
+    - A tail read cannot see edits above its window, so a hot tab whose tail
+      is unchanged while modifiedTime moved is read in full, and a tab with
+      appended rows is read in full on the next sync to confirm the rest.
+    - New tabs, tail mismatches and the periodic full verify read whole tabs.
+
+    Changed tabs are applied as deltas to the per-tab UserGroupIndex. Fully
+    read tabs are installed into the snapshot cache; a tail-applied tab only
+    has its cache entry dropped, since its upper rows were not re-read.
+    """
+
+    def __init__(
+        self,
+        cache: WorksheetSnapshotCache = snapshot_cache,
+        index_cache: WorksheetIndexCache = worksheet_index_cache,
+        block_rows: int = SYNC_BLOCK_ROWS,
+        tail_overlap: int = SYNC_TAIL_OVERLAP,
+        full_verify_every: int = SYNC_FULL_VERIFY_EVERY,
+    ) -> None:
+        self._cache = cache
+        self._index_cache = index_cache
+        self._block_rows = block_rows
+        self._tail_overlap = tail_overlap
+        self._full_verify_every = max(1, full_verify_every)
+        self._lock = threading.Lock()
+        self._fingerprints: dict[TabKey, TabFingerprint] = {}
+        self._rows: dict[TabKey, list[list[Any]]] = {}
+        self._indexes: dict[TabKey, UserGroupIndex] = {}
+        self._recently_changed: set[TabKey] = set()
+        # Tabs applied from a tail read; read in full on the next sync.
+        self._unconfirmed: set[TabKey] = set()
+        self._modified: str | None = None
+        self._runs = 0
+        self._counters = {
+            "syncs": 0,
+            "skipped_unchanged": 0,
+            "full_reads": 0,
+            "tail_reads": 0,
+            "rows_read": 0,
+            "tabs_changed": 0,
+        }
+
+    def sync_once(self, spreadsheet: Any) -> tuple[WorksheetIndex, list[TabChange]]:
+        with self._lock:
+            self._runs += 1
+            self._counters["syncs"] += 1
+            full_verify = self._runs % self._full_verify_every == 1 or self._full_verify_every == 1
+
+            modified = _last_modified(spreadsheet)
+            unchanged = modified is not None and modified == self._modified
+            if not full_verify and unchanged and not self._unconfirmed:
+                self._counters["skipped_unchanged"] += 1
+                return (self._index_cache.get(spreadsheet), [])
+
+            self._index_cache.invalidate(spreadsheet)
+            index = self._index_cache.get(spreadsheet)
+            tabs = [ws for ws in index.worksheets if parse_date_title(ws.title) or ws is index.reference]
+            live_keys = {worksheet_identity(ws) for ws in tabs}
+            for key in [k for k in self._fingerprints if k not in live_keys]:
+                self._forget(key)
+
+            full_targets: list[Any] = []
+            tail_targets: list[Any] = []
+            hot = self._hot_tabs(index)
+            for ws in tabs:
+                key = worksheet_identity(ws)
+                if full_verify or key not in self._fingerprints or key in self._unconfirmed:
+                    full_targets.append(ws)
+                elif key in hot:
+                    tail_targets.append(ws)
+
+            # (worksheet, rows, every row was re-read)
+            fetched: list[tuple[Any, list[list[Any]], bool]] = []
+            if tail_targets:
+                # Without a modifiedTime there is no signal that anything changed.
+                modified_changed = modified is not None and not unchanged
+                tails = self._read_tails(tail_targets, full_targets, modified_changed)
+                fetched.extend((ws, rows, False) for ws, rows in tails)
+            if full_targets:
+                batch = fetch_rows_batch(full_targets)
+                self._counters["full_reads"] += len(full_targets)
+                self._counters["rows_read"] += sum(len(rows) for rows in batch)
+                fetched.extend((ws, rows, True) for ws, rows in zip(full_targets, batch))
+
+            changes: list[TabChange] = []
+            self._recently_changed = set()
+            self._unconfirmed = set()
+            for ws, rows, full_read in fetched:
+                key = worksheet_identity(ws)
+                is_new = key not in self._fingerprints
+                change = self._apply(ws, rows, modified, full_read)
+                if change is not None:
+                    changes.append(change)
+                    if not is_new:
+                        self._recently_changed.add(key)
+
+            self._modified = modified
+            self._counters["tabs_changed"] += len(changes)
+            return (index, changes)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._counters, "tabs_tracked": len(self._fingerprints)}
+
+    def _hot_tabs(self, index: WorksheetIndex) -> set[TabKey]:
+        hot = set(self._recently_changed)
+        if index.reference is not None:
+            hot.add(worksheet_identity(index.reference))
+        if index.dated:
+            hot.add(worksheet_identity(index.dated[-1][1]))
+        today = index.in_range(date.today(), date.today())
+        hot.update(worksheet_identity(ws) for (_, ws) in today)
+        return hot
+
+    def _read_tails(
+        self, tail_targets: list[Any], full_targets: list[Any], modified_changed: bool
+    ) -> list[tuple[Any, list[list[Any]]]]:
+        """
+        Rows of each hot tab rebuilt from its tail, for tabs that grew.
+        Tabs that need a whole read are appended to `full_targets`; tabs with
+        an unchanged tail and no sign of another edit are left out.
+        """
+        starts = [
+            max(0, self._fingerprints[worksheet_identity(ws)].row_count - self._tail_overlap) for ws in tail_targets
+        ]
+        tails = _fetch_tails(tail_targets, starts)
+        if tails is None:
+            # No batched range reads on this handle: read the hot tabs in full.
+            full_targets.extend(tail_targets)
+            return []
+
+        self._counters["tail_reads"] += len(tail_targets)
+        merged: list[tuple[Any, list[list[Any]]]] = []
+        for ws, start, tail in zip(tail_targets, starts, tails):
+            self._counters["rows_read"] += len(tail)
+            old_rows = self._rows[worksheet_identity(ws)]
+            overlap = old_rows[start:]
+            if [_trim(r) for r in tail[: len(overlap)]] != [_trim(r) for r in overlap]:
+                # Rows above the window moved or were edited; fall back to a full read.
+                full_targets.append(ws)
+                continue
+            if len(tail) <= len(overlap):
+                if modified_changed:
+                    # Nothing appended, yet the spreadsheet changed: maybe an edit above the window.
+                    full_targets.append(ws)
+                continue
+            merged.append((ws, fill_gaps(old_rows[:start] + tail) if tail or start else []))
+        return merged
+
+    def _apply(
+        self, worksheet: Any, rows: list[list[Any]], modified: str | None, full_read: bool = True
+    ) -> TabChange | None:
+        key = worksheet_identity(worksheet)
+        hashes = block_hashes(rows, self._block_rows)
+        previous = self._fingerprints.get(key)
+
+        if previous is None:
+            changed_from: int | None = 0
+            user_index = UserGroupIndex.build(rows)
+        else:
+            old_rows = self._rows[key]
+            changed_from = first_changed_row(old_rows, rows, previous.block_hashes, hashes, self._block_rows)
+            if changed_from is None:
+                previous.modified = modified
+                if full_read:
+                    # Re-read and unchanged: refresh the cache entry without a rebuild.
+                    self._cache.replace(worksheet, rows, self._indexes[key])
+                return None
+            user_index = self._indexes[key].updated(rows, changed_from)
+
+        self._fingerprints[key] = TabFingerprint(len(rows), hashes, modified)
+        self._rows[key] = rows
+        self._indexes[key] = user_index
+        if full_read:
+            self._cache.replace(worksheet, rows, user_index)
+        else:
+            # Rows above the tail were not re-read: let lookups refetch the tab.
+            self._unconfirmed.add(key)
+            self._cache.mark_changed(*key)
+        return TabChange(worksheet, rows, changed_from, user_index)
+
+    def _forget(self, key: TabKey) -> None:
+        self._unconfirmed.discard(key)
+        self._fingerprints.pop(key, None)
+        self._rows.pop(key, None)
+        self._indexes.pop(key, None)
+
+
+sheet_syncer = SheetSyncer()
+
+
+async def run_sheet_sync_loop(
+    get_spreadsheet: Callable[[], Any],
+    on_changes: Callable[[WorksheetIndex, list[TabChange]], Any] | None = None,
+    interval_sec: float = SYNC_INTERVAL_SEC,
+) -> None:
+    while True:
+        try:
+            index, changes = await asyncio.to_thread(lambda: sheet_syncer.sync_once(get_spreadsheet()))
+            if changes:
+                logger.info("sheet sync applied changed_tabs=%s", len(changes))
+            if on_changes is not None:
+                await asyncio.to_thread(on_changes, index, changes)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("sheet sync failed")
+        await asyncio.sleep(interval_sec)
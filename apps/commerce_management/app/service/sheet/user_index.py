@@ -0,0 +1,98 @@
+from collections.abc import ItemsView
+from dataclasses import dataclass
+from typing import Any
+
+from app.service.sheet.rows import group_contains_keep, is_payment_confirmed, normalize_user_key
+
+
+@dataclass(frozen=True)
+class UserGroup:
+    start: int
+    end: int
+    keep: bool
+    payment_confirmed: bool
+
+
+class UserGroupIndex:
+    """
+    Normalized column B key -> contiguous row groups, built once per snapshot.
+    Each group carries its keep / payment flags so lookups never rescan rows.
+    """
+
+    def __init__(self, groups: dict[str, list[UserGroup]]) -> None:
+        self._groups = groups
+
+    @classmethod
+    def build(cls, rows: list[list[Any]]) -> "UserGroupIndex":
+        groups: dict[str, list[UserGroup]] = {}
+        _scan_groups(rows, 0, groups)
+        return cls(groups)
+
+    def updated(self, rows: list[list[Any]], changed_from: int) -> "UserGroupIndex":
+        """
+        Index for `rows`, assuming only rows at or after `changed_from` differ
+        from the rows this index was built on. Groups that end before the
+        changed window are reused; the rest are rescanned.
+        """
+        # A group touching the window may grow or shrink, so rescan it whole.
+        rescan_from = changed_from
+        for groups in self._groups.values():
+            for group in groups:
+                if group.start < changed_from <= group.end + 1:
+                    rescan_from = group.start
+
+        kept: dict[str, list[UserGroup]] = {}
+        for key, groups in self._groups.items():
+            unchanged = [g for g in groups if g.end < rescan_from]
+            if unchanged:
+                kept[key] = unchanged
+        _scan_groups(rows, rescan_from, kept)
+        return UserGroupIndex(kept)
+
+    def groups(self, user_id: str) -> list[UserGroup]:
+        return self._groups.get(normalize_user_key(user_id), [])
+
+    def last_group(self, user_id: str) -> UserGroup | None:
+        """
+        Same group `find_user_group` returns: the last contiguous block for the user.
+        """
+        groups = self.groups(user_id)
+        return groups[-1] if groups else None
+
+    def items(self) -> ItemsView[str, list[UserGroup]]:
+        return self._groups.items()
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+
+def _scan_groups(rows: list[list[Any]], begin: int, groups: dict[str, list[UserGroup]]) -> None:
+    """
+    Append the contiguous runs found in rows[begin:] to `groups`.
+    `begin` must be the first row of a run (or the end of the rows).
+    """
+    run_key = ""
+    run_start = begin
+
+    for idx in range(begin, len(rows) + 1):
+        if idx < len(rows):
+            row = rows[idx]
+            key = normalize_user_key(row[1] if len(row) > 1 else "")
+        else:
+            key = ""
+
+        if idx > begin and key == run_key:
+            continue
+
+        if run_key:
+            end = idx - 1
+            groups.setdefault(run_key, []).append(
+                UserGroup(
+                    start=run_start,
+                    end=end,
+                    keep=group_contains_keep(rows, run_start, end),
+                    payment_confirmed=is_payment_confirmed(rows, run_start, end),
+                )
+            )
+        run_key = key
+        run_start = idx
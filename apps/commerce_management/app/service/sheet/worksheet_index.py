@@ -0,0 +1,144 @@
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Any
+
+COMPLETED_TAB_INDEX = 2  # "3번 탭" (0-based index)
+DATE_TITLE_RE = re.compile(r"^\s*(\d{1,2})\s*/\s*(\d{1,2})\s*$")
+METADATA_TTL_SEC = float(os.getenv("SHEET_METADATA_TTL_SEC", "60"))
+
+
+def parse_date_title(title: str) -> date | None:
+    """
+    Parse worksheet titles like "1/22" into a date in the current year.
+    Returns None if the title is not a simple month/day sheet.
+    """
+    m = DATE_TITLE_RE.match(title or "")
+    if not m:
+        return None
+    month = int(m.group(1))
+    day = int(m.group(2))
+    try:
+        return date(date.today().year, month, day)
+    except ValueError:
+        return None
+
+
+class WorksheetIndex:
+    """
+    One `spreadsheet.worksheets()` call turned into:
+    - the tab list in sheet order,
+    - the completed/reference tab and its effective order date,
+    - a date-sorted list of "M/D" tabs for bisect range selection.
+    """
+
+    def __init__(self, worksheets: list[Any]) -> None:
+        self.worksheets = worksheets
+        dated: list[tuple[date, Any]] = []
+        for ws in worksheets:
+            parsed = parse_date_title(ws.title)
+            if parsed:
+                dated.append((parsed, ws))
+        dated.sort(key=lambda item: item[0])
+        self.dated = dated
+        self._dates = [d for (d, _) in dated]
+
+        self.reference = self._select_reference()
+        self.reference_date = self._resolve_reference_date() if self.reference is not None else date.today()
+
+    def in_range(self, date_from: date, date_to: date) -> list[tuple[date, Any]]:
+        lo = bisect_left(self._dates, date_from)
+        hi = bisect_right(self._dates, date_to)
+        return self.dated[lo:hi]
+
+    def latest_on_or_before(self, day: date) -> tuple[date, Any] | None:
+        idx = bisect_right(self._dates, day)
+        if idx == 0:
+            return None
+        return self.dated[idx - 1]
+
+    def _select_reference(self) -> Any | None:
+        """
+        The business rule says the "3rd tab" represents completed processing.
+        Prefer that tab when it exists; otherwise fall back to the last tab.
+        """
+        if not self.worksheets:
+            return None
+        if len(self.worksheets) > COMPLETED_TAB_INDEX:
+            return self.worksheets[COMPLETED_TAB_INDEX]
+        return self.worksheets[-1]
+
+    def _resolve_reference_date(self) -> date:
+        """
+        Resolve the effective order date:
+        - Use the reference worksheet's date title if available.
+        - Otherwise fall back to the previous date sheet by tab order.
+        - If still unavailable, use the latest date sheet, then today's date.
+        """
+        ws_date = parse_date_title(self.reference.title)
+        if ws_date:
+            return ws_date
+
+        try:
+            ref_index = self.worksheets.index(self.reference)
+        except ValueError:
+            ref_index = -1
+
+        if ref_index > 0:
+            prev_date = parse_date_title(self.worksheets[ref_index - 1].title)
+            if prev_date:
+                return prev_date
+
+        if self.dated:
+            return self.dated[-1][0]
+        return date.today()
+
+
+class WorksheetIndexCache:
+    """
+    Caches one WorksheetIndex per spreadsheet for `ttl_sec`.
+    Call `invalidate()` after adding or renaming tabs.
+    """
+
+    def __init__(self, ttl_sec: float = METADATA_TTL_SEC) -> None:
+        self._ttl = ttl_sec
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[WorksheetIndex, float]] = {}
+        self._counters = {"hits": 0, "misses": 0}
+
+    def get(self, spreadsheet: Any) -> WorksheetIndex:
+        key = str(getattr(spreadsheet, "id", "") or "")
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and time.monotonic() - cached[1] <= self._ttl:
+                self._counters["hits"] += 1
+                return cached[0]
+
+            # Built under the lock so concurrent misses share one metadata fetch.
+            self._counters["misses"] += 1
+            index = WorksheetIndex(spreadsheet.worksheets())
+            self._entries[key] = (index, time.monotonic())
+            return index
+
+    def invalidate(self, spreadsheet: Any | None = None) -> None:
+        with self._lock:
+            if spreadsheet is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(getattr(spreadsheet, "id", "") or ""), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries)}
+
+
+worksheet_index_cache = WorksheetIndexCache()
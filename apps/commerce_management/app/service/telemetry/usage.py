@@ -0,0 +1,144 @@
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+
+@dataclass
+class LLMCallUsage:
+    stage: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    ms: float
+    # Answered by another request's in-flight call; its tokens are not billed twice.
+    coalesced: bool = False
+
+
+@dataclass
+class RequestUsage:
+    llm_calls: list[LLMCallUsage] = field(default_factory=list)
+    stages: dict[str, float] = field(default_factory=dict)
+    cache: dict[str, bool] = field(default_factory=dict)
+
+    def to_usage(self) -> list[str]:
+        """
+        Flat `key=value` lines for ChatResponse.usage.
+        """
+        lines = [
+            f"llm stage={call.stage} model={call.model} prompt_tokens={call.prompt_tokens} "
+            f"completion_tokens={call.completion_tokens} ms={call.ms:.0f} coalesced={int(call.coalesced)}"
+            for call in self.llm_calls
+        ]
+        lines.extend(f"stage {name} ms={ms:.0f}" for name, ms in self.stages.items())
+        lines.extend(f"cache {name}={'hit' if hit else 'miss'}" for name, hit in self.cache.items())
+        return lines
+
+
+_current_usage: ContextVar[RequestUsage | None] = ContextVar("request_usage", default=None)
+_current_stage: ContextVar[str] = ContextVar("usage_stage", default="other")
+
+
+@contextmanager
+def track_usage() -> Iterator[RequestUsage]:
+    """
+    Collect telemetry for the enclosed request. Threads started through
+    asyncio.to_thread and tasks created inside it share the same record.
+    """
+    usage = RequestUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+@contextmanager
+def usage_stage(name: str) -> Iterator[None]:
+    """
+    Time the enclosed block as `name`; LLM calls inside it are tagged with it.
+    """
+    token = _current_stage.set(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+        usage = _current_usage.get()
+        if usage is not None:
+            usage.stages[name] = usage.stages.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+
+def record_llm_call(model: str, prompt_tokens: int, completion_tokens: int, ms: float, coalesced: bool = False) -> None:
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.llm_calls.append(
+            LLMCallUsage(_current_stage.get(), model, prompt_tokens, completion_tokens, ms, coalesced)
+        )
+
+
+def record_cache(name: str, hit: bool) -> None:
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.cache[name] = hit
+
+
+class UsageAggregator:
+    """
+    In-memory per-intent totals of request telemetry.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._intents: dict[str, dict] = {}
+
+    def record(self, intent: str, usage: RequestUsage) -> None:
+        with self._lock:
+            entry = self._intents.setdefault(
+                intent,
+                {
+                    "requests": 0,
+                    "llm_calls": 0,
+                    "coalesced_calls": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "stage_ms": {},
+                    "cache_hits": {},
+                    "cache_misses": {},
+                },
+            )
+            entry["requests"] += 1
+            for call in usage.llm_calls:
+                if call.coalesced:
+                    entry["coalesced_calls"] += 1
+                    continue
+                entry["llm_calls"] += 1
+                entry["prompt_tokens"] += call.prompt_tokens
+                entry["completion_tokens"] += call.completion_tokens
+            for name, ms in usage.stages.items():
+                entry["stage_ms"][name] = entry["stage_ms"].get(name, 0.0) + ms
+            for name, hit in usage.cache.items():
+                bucket = entry["cache_hits"] if hit else entry["cache_misses"]
+                bucket[name] = bucket.get(name, 0) + 1
+
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            result = {}
+            for intent, entry in self._intents.items():
+                requests = entry["requests"]
+                result[intent] = {
+                    **{k: v for k, v in entry.items() if k not in ("stage_ms", "cache_hits", "cache_misses")},
+                    "stage_ms_avg": {name: ms / requests for name, ms in entry["stage_ms"].items()},
+                    "cache_hits": dict(entry["cache_hits"]),
+                    "cache_misses": dict(entry["cache_misses"]),
+                }
+            return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._intents.clear()
+
+
+usage_stats = UsageAggregator()
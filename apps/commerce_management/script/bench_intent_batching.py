@@ -0,0 +1,88 @@
+"""
+Micro-batching trade-off for intent classification against a simulated LLM.
+
+The fake upstream costs a fixed round trip plus a small per-message cost and
+allows a limited number of concurrent requests (the rate limit). Messages
+arrive as a Poisson burst. For each batch window, prints throughput and
+p50/p99 end-to-end latency.
+
+    python script/bench_intent_batching.py --rate 150 --seconds 3
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.service.intent.batching import MicroBatcher  # noqa: E402
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _run(window_ms: float, args: argparse.Namespace) -> dict[str, float]:
+    upstream = asyncio.Semaphore(args.concurrency)
+
+    async def fake_llm(count: int) -> None:
+        async with upstream:
+            await asyncio.sleep((args.base_ms + args.per_msg_ms * count) / 1000)
+
+    async def run_batch(messages: list[str]) -> list[dict]:
+        await fake_llm(len(messages))
+        return [{"intent": "smalltalk"} for _ in messages]
+
+    async def run_one(message: str) -> dict:
+        await fake_llm(1)
+        return {"intent": "smalltalk"}
+
+    batcher = MicroBatcher(run_batch, run_one, window_ms=window_ms, max_size=args.max_size)
+    latencies: list[float] = []
+
+    async def one_request(idx: int) -> None:
+        started = time.perf_counter()
+        if window_ms > 0:
+            await batcher.submit(f"message {idx}")
+        else:
+            await run_one(f"message {idx}")
+        latencies.append(time.perf_counter() - started)
+
+    rng = random.Random(7)
+    tasks = []
+    started = time.perf_counter()
+    for idx in range(int(args.rate * args.seconds)):
+        tasks.append(asyncio.create_task(one_request(idx)))
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=150, help="arriving messages per second")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--base-ms", type=float, default=400, help="upstream round trip per call")
+    parser.add_argument("--per-msg-ms", type=float, default=15, help="extra upstream time per batched message")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent upstream calls allowed")
+    parser.add_argument("--max-size", type=int, default=16)
+    parser.add_argument("--windows", default="0,10,25,50,100")
+    args = parser.parse_args()
+
+    print(f"{'window_ms':>9} {'msg/s':>8} {'p50_ms':>8} {'p99_ms':>8}")
+    for window in (float(w) for w in args.windows.split(",")):
+        result = await _run(window, args)
+        print(f"{window:>9.0f} {result['throughput']:>8.1f} {result['p50_ms']:>8.0f} {result['p99_ms']:>8.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
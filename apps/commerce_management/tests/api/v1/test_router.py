@@ -1,4 +1,5 @@
 import app.api.v1.route as v1_router_module
+from app.service.compose.jobs import ComposeJob, compose_jobs
 
 def test_chat_endpoint_success_check(client, monkeypatch):
     async def fake_ai_service(req):
@@ -31,3 +32,30 @@ def test_chat_endpoint_error_check(client):
     response = client.post("/api/v1/chat", json={"session_id": "session-123"})
 
     assert response.status_code == 422
+
+
+def test_compose_job_status_endpoint(client):
+    job = ComposeJob(job_id="job-1", status="running", stage="writing", total_rows=10, written_rows=4)
+    compose_jobs._jobs[job.job_id] = job
+
+    response = client.get("/api/v1/compose/jobs/job-1")
+
+    assert response.status_code == 200
+    assert response.json()["written_rows"] == 4
+    assert client.get("/api/v1/compose/jobs/missing").status_code == 404
+
+
+def test_usage_stats_endpoint_reports_per_intent_totals(client):
+    from app.service.telemetry.usage import RequestUsage, usage_stats
+
+    usage_stats.clear()
+    usage_stats.record("order_status", RequestUsage(stages={"intent": 10.0}, cache={"intent_cache": True}))
+
+    response = client.get("/api/v1/stats/usage")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["intents"]["order_status"]["requests"] == 1
+    assert body["intents"]["order_status"]["cache_hits"] == {"intent_cache": 1}
+    assert set(body["llm_scheduler"]) == {"interactive", "bulk"}
+    usage_stats.clear()
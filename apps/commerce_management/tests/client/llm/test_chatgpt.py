@@ -0,0 +1,141 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+import app.client.llm.chatgpt as chatgpt
+
+
+class _Completions:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        message = type("Message", (), {"content": outcome})()
+        choice = type("Choice", (), {"message": message})()
+        return type("Response", (), {"choices": [choice]})()
+
+
+def _install(monkeypatch, outcomes):
+    completions = _Completions(outcomes)
+    fake = type("Client", (), {"chat": type("Chat", (), {"completions": completions})()})()
+    monkeypatch.setattr(chatgpt, "get_async_client", lambda: fake)
+    monkeypatch.setattr(chatgpt, "backoff_delay", lambda attempt: 0)
+    return completions
+
+
+def _timeout_error():
+    return openai.APITimeoutError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+
+@pytest.mark.asyncio
+async def test_acall_llm_retries_transient_errors(monkeypatch):
+    completions = _install(monkeypatch, [_timeout_error(), '{"intent":"smalltalk"}'])
+
+    raw = await chatgpt.acall_llm("prompt", "hi", timeout=3, max_retries=2)
+
+    assert raw == '{"intent":"smalltalk"}'
+    assert len(completions.calls) == 2
+    assert completions.calls[0]["timeout"] == 3
+
+
+@pytest.mark.asyncio
+async def test_acall_llm_gives_up_after_max_retries(monkeypatch):
+    completions = _install(monkeypatch, [_timeout_error(), _timeout_error()])
+
+    with pytest.raises(openai.APITimeoutError):
+        await chatgpt.acall_llm("prompt", "hi", max_retries=1)
+    assert len(completions.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_client_is_reused_within_a_loop():
+    first = chatgpt.get_async_client()
+    assert chatgpt.get_async_client() is first
+    await chatgpt.aclose_llm_client()
+    assert chatgpt.get_async_client() is not first
+    await chatgpt.aclose_llm_client()
+
+
+def test_backoff_delay_is_capped_and_jittered():
+    delays = {chatgpt.backoff_delay(10, base=0.5, cap=2.0) for _ in range(20)}
+    assert all(0 <= d <= 2.0 for d in delays)
+    assert len(delays) > 1
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_calls_share_one_upstream_request(monkeypatch):
+    monkeypatch.setattr(chatgpt, "llm_single_flight", chatgpt.SingleFlight())
+    release = asyncio.Event()
+    calls = []
+
+    async def slow_once(system_prompt, message, timeout, max_retries, priority="interactive"):
+        calls.append(message)
+        await release.wait()
+        return chatgpt.LLMResult('{"intent":"order_status"}')
+
+    monkeypatch.setattr(chatgpt, "_acall_llm_once", slow_once)
+
+    waiters = [asyncio.create_task(chatgpt.acall_llm("p", text)) for text in ("입금 확인 부탁드려요",) * 5]
+    other = asyncio.create_task(chatgpt.acall_llm("p", "배송 언제"))
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*waiters, other)
+    assert set(results) == {'{"intent":"order_status"}'}
+    assert sorted(calls) == sorted(["입금 확인 부탁드려요", "배송 언제"])
+    stats = chatgpt.llm_single_flight.stats()
+    assert stats["calls"] == 2 and stats["coalesced"] == 4 and stats["inflight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = chatgpt.SingleFlight()
+    release = asyncio.Event()
+    key = chatgpt.single_flight_key("p", "m")
+
+    async def call():
+        await release.wait()
+        return "ok"
+
+    first = asyncio.create_task(flight.run(key, call))
+    second = asyncio.create_task(flight.run(key, call))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == ("ok", True)
+    assert first.cancelled()
+    assert flight.stats()["cancelled_waiters"] == 1 and flight.stats()["abandoned"] == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_call_is_cancelled_when_all_waiters_leave():
+    flight = chatgpt.SingleFlight()
+    started = asyncio.Event()
+    key = chatgpt.single_flight_key("p", "m")
+
+    async def call():
+        started.set()
+        await asyncio.sleep(10)
+        return "late"
+
+    waiter = asyncio.create_task(flight.run(key, call))
+    await started.wait()
+    waiter.cancel()
+    await asyncio.sleep(0.01)
+
+    assert flight.stats() == {"calls": 1, "coalesced": 0, "cancelled_waiters": 1, "abandoned": 1, "inflight": 0}
+
+
+def test_single_flight_key_folds_whitespace_only():
+    assert chatgpt.single_flight_key("p", "배송  언제\n") == chatgpt.single_flight_key("p", "배송 언제")
+    assert chatgpt.single_flight_key("p", "배송 언제") != chatgpt.single_flight_key("q", "배송 언제")
+    assert chatgpt.single_flight_key("p", "배송 언제", "m1") != chatgpt.single_flight_key("p", "배송 언제", "m2")
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from app.client.llm.scheduler import BULK, INTERACTIVE, LLMAdmissionError, LLMScheduler, TokenBucket
+
+
+def test_token_bucket_wait_time_and_floor():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket._updated
+
+    assert bucket.wait_time(60, now) == 0.0
+    bucket.take(60)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 10, floor=5) == 0.0
+    assert bucket.wait_time(1, now + 10, floor=10) == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_bulk_never_uses_the_interactive_reserve():
+    scheduler = LLMScheduler(rpm=10, tpm=1_000_000, bulk_reserve=0.5, bulk_deadline_sec=0.05)
+
+    for _ in range(5):
+        await scheduler.acquire(BULK, 10)
+    with pytest.raises(LLMAdmissionError):
+        await scheduler.acquire(BULK, 10)
+    for _ in range(5):
+        await scheduler.acquire(INTERACTIVE, 10)
+
+    stats = scheduler.stats()
+    assert stats[BULK]["admitted"] == 5 and stats[BULK]["rejected_deadline"] == 1
+    assert stats[INTERACTIVE]["admitted"] == 5
+
+
+@pytest.mark.asyncio
+async def test_waiting_bulk_yields_to_interactive():
+    scheduler = LLMScheduler(rpm=600, tpm=1_000_000, bulk_reserve=0.0)
+    scheduler._requests.tokens = 0  # empty: next slot in 0.1s
+    order = []
+
+    async def call(priority, name):
+        await scheduler.acquire(priority, 1)
+        order.append(name)
+
+    bulk = asyncio.create_task(call(BULK, "bulk"))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(call(INTERACTIVE, "interactive"))
+    await asyncio.wait_for(asyncio.gather(bulk, interactive), timeout=2)
+
+    assert order == ["interactive", "bulk"]
+
+
+@pytest.mark.asyncio
+async def test_deadline_rejection_is_immediate_when_buckets_are_too_slow():
+    scheduler = LLMScheduler(rpm=1, tpm=1_000_000)
+    await scheduler.acquire(INTERACTIVE, 1)
+
+    started = asyncio.get_running_loop().time()
+    with pytest.raises(LLMAdmissionError):
+        await scheduler.acquire(INTERACTIVE, 1, deadline_sec=4)
+
+    assert asyncio.get_running_loop().time() - started < 0.5
+    assert scheduler.stats()[INTERACTIVE]["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_new_calls():
+    scheduler = LLMScheduler(rpm=1, tpm=1_000_000, interactive_queue_limit=1, interactive_deadline_sec=100)
+    await scheduler.acquire(INTERACTIVE, 1)
+    waiting = asyncio.create_task(scheduler.acquire(INTERACTIVE, 1))
+    await asyncio.sleep(0)
+
+    with pytest.raises(LLMAdmissionError):
+        await scheduler.acquire(INTERACTIVE, 1)
+
+    assert scheduler.stats()[INTERACTIVE]["rejected_queue_full"] == 1
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert scheduler.stats()[INTERACTIVE]["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_settle_charges_actual_usage():
+    scheduler = LLMScheduler(rpm=1000, tpm=600)
+    await scheduler.acquire(INTERACTIVE, 100)
+    scheduler.settle(100, 400)
+
+    assert scheduler._tokens.tokens == pytest.approx(200, abs=1)
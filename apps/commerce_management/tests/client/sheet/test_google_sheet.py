@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+import app.client.sheet.google_sheet as google_sheet_module
+
+
+class _StubAuth:
+    def __init__(self, expires_in_sec: int):
+        self.token = "token"
+        self.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=expires_in_sec)
+
+
+class _StubHttpClient:
+    def __init__(self, expires_in_sec: int):
+        self.auth = _StubAuth(expires_in_sec)
+        self.logins = 0
+
+    def login(self):
+        self.logins += 1
+        self.auth.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+
+
+class _StubSpreadsheet:
+    id = "sheet-key"
+
+
+class _StubClient:
+    def __init__(self, expires_in_sec: int = 3600):
+        self.http_client = _StubHttpClient(expires_in_sec)
+        self.opened = []
+
+    def open(self, title):
+        self.opened.append(("title", title))
+        return _StubSpreadsheet()
+
+    def open_by_key(self, key):
+        self.opened.append(("key", key))
+        return _StubSpreadsheet()
+
+
+def _patch_auth(monkeypatch, client):
+    calls = {"authorize": 0}
+
+    def fake_authorize(_creds):
+        calls["authorize"] += 1
+        return client
+
+    monkeypatch.setattr(google_sheet_module.ServiceAccountCredentials, "from_json_keyfile_name", lambda *_: object())
+    monkeypatch.setattr(google_sheet_module.gspread, "authorize", fake_authorize)
+    return calls
+
+
+def test_sheet_pool_reuses_client_and_spreadsheet(monkeypatch):
+    client = _StubClient()
+    calls = _patch_auth(monkeypatch, client)
+    pool = google_sheet_module.SheetClientPool(spreadsheet_name="orders", spreadsheet_key="")
+
+    first = pool.get_spreadsheet()
+    second = pool.get_spreadsheet()
+
+    assert first is second
+    assert calls["authorize"] == 1
+    assert client.opened == [("title", "orders")]
+    assert pool.stats()["hits"] == 1
+    assert pool.stats()["misses"] == 1
+
+    pool.invalidate()
+    pool.get_spreadsheet()
+    assert client.opened[-1] == ("key", "sheet-key")
+
+
+def test_sheet_pool_refreshes_token_before_expiry(monkeypatch):
+    client = _StubClient(expires_in_sec=3600)
+    _patch_auth(monkeypatch, client)
+    pool = google_sheet_module.SheetClientPool(spreadsheet_key="sheet-key", refresh_margin_sec=300)
+
+    pool.get_spreadsheet()
+    refreshes = pool.stats()["refreshes"]
+
+    client.http_client.auth.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=60)
+    pool.get_spreadsheet()
+
+    assert pool.stats()["refreshes"] == refreshes + 1
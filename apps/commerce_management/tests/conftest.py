@@ -1,8 +1,29 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.service.intent.cache import intent_cache
+from app.service.sheet.snapshot import snapshot_cache
+from app.service.sheet.worksheet_index import worksheet_index_cache
 
 #scope : function < class < module < package < session
 @pytest.fixture(scope="function")
 def client():
     return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def reset_sheet_caches():
+    # Stub worksheets reuse date titles across tests, so cached rows must not leak.
+    snapshot_cache.clear()
+    worksheet_index_cache.clear()
+    yield
+    snapshot_cache.clear()
+    worksheet_index_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_intent_cache():
+    # Handler tests patch the LLM per test; a cached intent must not carry over.
+    intent_cache.clear_local()
+    yield
+    intent_cache.clear_local()
@@ -1,15 +1,17 @@
+import asyncio
 import pytest
 import json
 from datetime import date, timedelta
 
 import app.service.chat.chat as chat_module
+from app.client.llm.scheduler import LLMAdmissionError
 from app.model.chat.chat_response import ChatResponse
 from app.model.chat.chat_request import ChatRequest
 from openai import AuthenticationError
 
 @pytest.mark.asyncio
 async def test_ai_service_smalltalk_success_check(monkeypatch):
-    async def fake_detect_intent(_):
+    async def fake_detect_intent(_, query_out=None):
         return "smalltalk"
     
     async def fake_smalltalk(req):
@@ -28,7 +30,7 @@ async def test_ai_service_smalltalk_success_check(monkeypatch):
 
 @pytest.mark.asyncio
 async def test_ai_service_delivery_status_success_check(monkeypatch):
-    async def fake_detect_intent(_):
+    async def fake_detect_intent(_, query_out=None):
         return "delivery_status"
     
     async def fake_delivery_status(req):
@@ -47,7 +49,7 @@ async def test_ai_service_delivery_status_success_check(monkeypatch):
 
 @pytest.mark.asyncio
 async def test_ai_service_order_status_success_check(monkeypatch):
-    async def fake_detect_intent(_):
+    async def fake_detect_intent(_, query_out=None):
         return "order_status"
     
     async def fake_order_status(req):
@@ -186,7 +188,7 @@ async def test_order_status_range_and_item_paid(monkeypatch):
 
 @pytest.mark.asyncio
 async def test_ai_service_fallback_status_success_check(monkeypatch):
-    async def fake_detect_intent(_):
+    async def fake_detect_intent(_, query_out=None):
         return "fallback"
     
     async def fake_fallback_status(req):
@@ -205,7 +207,7 @@ async def test_ai_service_fallback_status_success_check(monkeypatch):
     
 @pytest.mark.asyncio
 async def test_ai_service_sheet_compose_status_success_check(monkeypatch):
-    async def fake_detect_intent(_):
+    async def fake_detect_intent(_, query_out=None):
         return "sheet_compose"
 
     called = {"value": False}
@@ -226,7 +228,7 @@ async def test_ai_service_sheet_compose_status_success_check(monkeypatch):
     
 @pytest.mark.asyncio
 async def test_ai_service_sheet_compose_status_fail_check(monkeypatch):
-    async def fake_detect_intent(_):
+    async def fake_detect_intent(_, query_out=None):
         return "sheet_compose"
 
     def fake_ensure_user(_user_id: str) -> None:
@@ -280,3 +282,301 @@ async def test_detect_intent_llm_test(monkeypatch):
     
     # result = await chat_module._detect_intent_llm("send me fallback as an intent")
     # assert result == "fallback"
+
+
+@pytest.mark.asyncio
+async def test_sheet_compose_runs_as_background_job(monkeypatch):
+    async def fake_compose_llm(_message: str):
+        return {"orders": [["", "insta kakao", "후드", "블랙", "", ""]], "fallbacks": ["후드 얼마?"]}
+
+    class _Sheet:
+        id = 1
+        title = "NewTab"
+
+    class _Spreadsheet:
+        def __init__(self):
+            self.batches = []
+
+        def add_worksheet(self, title, rows, cols):
+            return _Sheet()
+
+        def batch_update(self, body):
+            self.batches.append(body)
+
+    stub = _Spreadsheet()
+    monkeypatch.setattr(chat_module, "_ensure_user", lambda _user_id: True)
+    monkeypatch.setattr(chat_module, "call_sheet_compose_llm", fake_compose_llm)
+    monkeypatch.setattr(chat_module, "_get_spreadsheet", lambda: stub)
+
+    res = await chat_module.sheet_compose_service(
+        ChatRequest(session_id="s", user_id="user1", message="ㅋㅋㅋ\n안녕하세요\n\n@insta 블랙 후드 주세요", context=None)
+    )
+    job_id = res.reply.split("작업 ID ")[1].split(" ")[0]
+    job = chat_module.compose_jobs.get(job_id)
+    await job._task
+
+    assert job.status == "done"
+    assert job.total_rows == 4 and job.written_rows == 4
+    assert len(stub.batches) == 1
+    assert job.prefilter["lines_in"] == 3 and job.prefilter["lines_out"] == 2
+
+
+@pytest.mark.asyncio
+async def test_sheet_compose_reports_failed_chunks(monkeypatch):
+    async def truncated_acall_llm(system_prompt, message, timeout=None, priority=None):
+        return '{"orders": [["", "insta kakao", "후드", "블'
+
+    class _Spreadsheet:
+        def add_worksheet(self, title, rows, cols):
+            return type("_Sheet", (), {"id": 1, "title": "NewTab"})()
+
+        def batch_update(self, body):
+            pass
+
+    monkeypatch.setattr(chat_module, "_ensure_user", lambda _user_id: True)
+    monkeypatch.setattr(chat_module, "acall_llm", truncated_acall_llm)
+    monkeypatch.setattr(chat_module, "_get_spreadsheet", lambda: _Spreadsheet())
+
+    res = await chat_module.sheet_compose_service(
+        ChatRequest(session_id="s", user_id="user1", message="@insta 블랙 후드 주세요", context=None)
+    )
+    job = chat_module.compose_jobs.get(res.reply.split("작업 ID ")[1].split(" ")[0])
+    await job._task
+
+    assert job.status == "partial"
+    assert job.failed_chunks == 1 and "chunks 1" in job.error
+
+
+@pytest.mark.asyncio
+async def test_call_sheet_compose_llm_rejects_malformed_output(monkeypatch):
+    outputs = iter(['{"orders": [["", "a"', '["not", "an", "object"]', '{"orders": {"a": 1}}'])
+
+    async def fake_acall_llm(system_prompt, message, timeout=None, priority=None):
+        return next(outputs)
+
+    monkeypatch.setattr(chat_module, "acall_llm", fake_acall_llm)
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            await chat_module.call_sheet_compose_llm("chunk")
+
+
+@pytest.mark.asyncio
+async def test_ai_service_reuses_cached_intent_for_normalized_repeats(monkeypatch):
+    calls = []
+
+    async def fake_detect_intent(message, query_out=None):
+        calls.append(message)
+        return "fallback"
+
+    async def fake_fallback(req):
+        return ChatResponse(session_id=req.session_id, reply="patched", usage=[])
+
+    monkeypatch.setattr(chat_module, "_detect_intent_llm", fake_detect_intent)
+    monkeypatch.setattr(chat_module, "fallback_service", fake_fallback)
+
+    for message in ("환불 되나요??", "환불 되나요", "환불되나요~~"):
+        await chat_module.ai_service(ChatRequest(session_id="s", user_id="u", message=message, context=None))
+
+    assert calls == ["환불 되나요??"]
+
+
+@pytest.mark.asyncio
+async def test_rejected_intent_call_falls_back_without_caching(monkeypatch):
+    calls = []
+
+    async def rejecting_acall_llm(system_prompt, message, timeout=None):
+        calls.append(message)
+        raise LLMAdmissionError("interactive LLM queue is full")
+
+    monkeypatch.setattr(chat_module, "acall_llm", rejecting_acall_llm)
+
+    assert await chat_module._detect_intent_cached("배송 언제 와요?") == "fallback"
+    assert await chat_module._detect_intent_cached("배송 언제 와요?") == "fallback"
+
+    assert len(calls) == 2
+    assert chat_module.intent_cache.get("배송 언제 와요?", chat_module.INTENT_CACHE_SCOPE) is None
+
+
+@pytest.mark.asyncio
+async def test_only_known_intents_are_cached(monkeypatch):
+    outputs = {"a": "not json", "b": '{"intent": "refund"}', "c": '{"intent": "smalltalk"}'}
+
+    async def fake_acall_llm(system_prompt, message, timeout=None):
+        return outputs[message]
+
+    monkeypatch.setattr(chat_module, "acall_llm", fake_acall_llm)
+
+    assert await chat_module._detect_intent_cached("a") == "fallback"
+    assert await chat_module._detect_intent_cached("b") == "fallback"
+    assert await chat_module._detect_intent_cached("c") == "smalltalk"
+
+    cached = [chat_module.intent_cache.get(m, chat_module.INTENT_CACHE_SCOPE) for m in outputs]
+    assert cached == [None, None, "smalltalk"]
+
+
+def _order_status_llm_setup(monkeypatch, combined: bool):
+    d1 = date.today() - timedelta(days=4)
+    d2 = date.today() - timedelta(days=3)
+    stub = _make_dated_spreadsheet([
+        (d1, [["10000", "user1", "후드"], ["16000", "user1", "후드"]]),
+        (d2, [["9000", "user1", "티셔츠"]]),
+    ])
+    calls = []
+
+    async def fake_acall_llm(system_prompt, _message, timeout=None):
+        calls.append(system_prompt)
+        if "query parser" in system_prompt:
+            return json.dumps({"intent": "order_status", "date_from": _md_title(d1), "date_to": _md_title(d1), "item": "후드"})
+        if "intent classifier" in system_prompt:
+            return json.dumps({"intent": "order_status"})
+        return json.dumps({"date_from": _md_title(d1), "date_to": _md_title(d1), "item": "후드"})
+
+    monkeypatch.setattr(chat_module, "INTENT_COMBINED_QUERY", combined)
+    monkeypatch.setattr(chat_module, "INTENT_CACHE_ENABLED", False)
+    monkeypatch.setattr(chat_module, "acall_llm", fake_acall_llm)
+    monkeypatch.setattr(chat_module, "_get_spreadsheet", lambda: stub)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_ai_service_order_status_combined_call_skips_query_llm(monkeypatch):
+    calls = _order_status_llm_setup(monkeypatch, combined=True)
+
+    res = await chat_module.ai_service(
+        ChatRequest(session_id="s", user_id="user1", message="저번에 산 거 어떻게 됐어요?", context=None)
+    )
+
+    assert len(calls) == 1
+    assert "배송 완료" in res.reply
+
+
+@pytest.mark.asyncio
+async def test_ai_service_order_status_separate_calls_when_combined_disabled(monkeypatch):
+    calls = _order_status_llm_setup(monkeypatch, combined=False)
+
+    res = await chat_module.ai_service(
+        ChatRequest(session_id="s", user_id="user1", message="저번에 산 거 어떻게 됐어요?", context=None)
+    )
+
+    assert len(calls) == 2
+    assert "배송 완료" in res.reply
+
+
+@pytest.mark.asyncio
+async def test_ai_service_returns_usage_telemetry_when_requested(monkeypatch):
+    calls = _order_status_llm_setup(monkeypatch, combined=True)
+
+    res = await chat_module.ai_service(
+        ChatRequest(session_id="s", user_id="user1", message="저번에 산 거 어떻게 됐어요?", context=None, include_usage=True)
+    )
+
+    assert len(calls) == 1
+    assert any(line.startswith("stage intent ") for line in res.usage)
+    assert any(line.startswith("stage sheet_fetch ") for line in res.usage)
+    assert "cache intent_fast_path=miss" in res.usage
+
+
+@pytest.mark.asyncio
+async def test_streaming_compose_writes_rows_before_generation_ends(monkeypatch):
+    class _Sheet:
+        id = 1
+        title = "NewTab"
+
+    class _Spreadsheet:
+        def __init__(self):
+            self.batches = []
+
+        def add_worksheet(self, title, rows, cols):
+            return _Sheet()
+
+        def batch_update(self, body):
+            self.batches.append(body)
+
+    stub = _Spreadsheet()
+    orders = [["", f"user{i} k{i}", "후드", "블랙", "", ""] for i in range(3)]
+    text = json.dumps({"orders": orders, "fallbacks": ["얼마?"]}, ensure_ascii=False)
+    batches_seen_while_streaming = []
+
+    async def fake_astream_llm(system_prompt, message, timeout=None, priority=None):
+        for start in range(0, len(text), 10):
+            batches_seen_while_streaming.append(len(stub.batches))
+            yield text[start : start + 10]
+            await asyncio.sleep(0.001)
+
+    monkeypatch.setattr(chat_module, "COMPOSE_STREAMING_ENABLED", True)
+    monkeypatch.setattr(chat_module, "COMPOSE_STREAM_FLUSH_ROWS", 1)
+    monkeypatch.setattr(chat_module, "astream_llm", fake_astream_llm)
+    monkeypatch.setattr(chat_module, "_ensure_user", lambda _user_id: True)
+    monkeypatch.setattr(chat_module, "_get_spreadsheet", lambda: stub)
+
+    res = await chat_module.sheet_compose_service(
+        ChatRequest(session_id="s", user_id="user1", message="@user0 블랙 후드 주세요", context=None)
+    )
+    job = chat_module.compose_jobs.get(res.reply.split("작업 ID ")[1].split(" ")[0])
+    await job._task
+
+    assert job.status == "done"
+    assert job.total_rows == 6 and job.written_rows == 6
+    assert max(batches_seen_while_streaming) >= 2
+    written = [
+        row["values"][1]["userEnteredValue"]["stringValue"]
+        for batch in stub.batches
+        for request in batch["requests"]
+        if "updateCells" in request
+        for row in request["updateCells"]["rows"]
+        if len(row["values"]) > 1
+    ]
+    assert written[:3] == ["user0 k0", "user1 k1", "user2 k2"]
+
+
+@pytest.mark.asyncio
+async def test_streaming_compose_reports_a_broken_stream(monkeypatch):
+    class _Spreadsheet:
+        def add_worksheet(self, title, rows, cols):
+            return type("_Sheet", (), {"id": 1, "title": "NewTab"})()
+
+        def batch_update(self, body):
+            pass
+
+    async def broken_astream_llm(system_prompt, message, timeout=None, priority=None):
+        yield '{"orders": [["", "user0 k0", "후드", "블랙", "", ""], '
+        raise ConnectionError("stream reset")
+
+    monkeypatch.setattr(chat_module, "COMPOSE_STREAMING_ENABLED", True)
+    monkeypatch.setattr(chat_module, "astream_llm", broken_astream_llm)
+    monkeypatch.setattr(chat_module, "_ensure_user", lambda _user_id: True)
+    monkeypatch.setattr(chat_module, "_get_spreadsheet", lambda: _Spreadsheet())
+
+    res = await chat_module.sheet_compose_service(
+        ChatRequest(session_id="s", user_id="user1", message="@user0 블랙 후드 주세요", context=None)
+    )
+    job = chat_module.compose_jobs.get(res.reply.split("작업 ID ")[1].split(" ")[0])
+    await job._task
+
+    assert job.status == "partial" and job.failed_chunks == 1
+    # The order parsed before the stream broke is still written.
+    assert job.total_rows >= 1
+
+
+@pytest.mark.asyncio
+async def test_delivery_status_broadcast_mode_never_reads_sheet(monkeypatch):
+    status = {
+        "found": True,
+        "payment_confirmed": True,
+        "keep": True,
+        "order_date": date.today() - timedelta(days=1),
+        "age_days": 1,
+    }
+
+    def no_sheet():
+        raise AssertionError("sheet read in broadcast mode")
+
+    monkeypatch.setattr(chat_module, "BROADCAST_MODE_ENABLED", True)
+    monkeypatch.setattr(chat_module.broadcast_status, "lookup", lambda user_id: status)
+    monkeypatch.setattr(chat_module, "_get_spreadsheet", no_sheet)
+
+    res = await chat_module.delivery_status_service(
+        ChatRequest(session_id="s", user_id="user1", message="배송", context=None)
+    )
+    assert "킵" in res.reply
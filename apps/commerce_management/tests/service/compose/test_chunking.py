@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+
+from app.service.compose.chunking import (
+    chunk_overlaps,
+    extract_orders_chunked,
+    extract_orders_streaming,
+    merge_chunk_results,
+    split_transcript,
+)
+
+
+def test_split_transcript_respects_lines_and_overlap():
+    lines = [f"line{i:02d} " + "x" * 20 for i in range(10)]
+
+    chunks = split_transcript("\n".join(lines), max_chars=90, overlap_lines=1)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert all(line in lines for line in chunk.split("\n"))
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert prev.split("\n")[-1] == nxt.split("\n")[0]
+    covered = {line for chunk in chunks for line in chunk.split("\n")}
+    assert covered == set(lines)
+
+
+def test_merge_drops_overlap_echo_and_keeps_people_contiguous():
+    results = [
+        {"orders": [["", "a ka", "후드", "블랙"], ["", "b kb", "바지", ""]], "fallbacks": ["얼마?"]},
+        {"orders": [["", "b kb", "바지", ""], ["", "a ka", "양말", "흰색"]], "fallbacks": ["얼마?", "사이즈?"]},
+    ]
+
+    merged = merge_chunk_results(results, ["", "b kb 바지 주세요"])
+
+    assert merged["orders"] == [
+        ["", "a ka", "후드", "블랙"],
+        ["", "a ka", "양말", "흰색"],
+        ["", "b kb", "바지", ""],
+    ]
+    assert merged["fallbacks"] == ["얼마?", "사이즈?"]
+
+
+def test_merge_keeps_repeat_order_outside_the_overlap():
+    order = ["", "a ka", "후드", "블랙"]
+    results = [{"orders": [list(order)]}, {"orders": [list(order)]}]
+
+    # The overlap holds someone else's lines, so chunk 2's order is a new one.
+    assert merge_chunk_results(results, ["", "b kb 바지 주세요"])["orders"] == [order, order]
+    assert merge_chunk_results(results)["orders"] == [order, order]
+
+
+def test_chunk_overlaps_are_the_lines_shared_with_the_previous_chunk():
+    lines = [f"line{i:02d} " + "x" * 20 for i in range(10)]
+    chunks = split_transcript("\n".join(lines), max_chars=90, overlap_lines=1)
+
+    overlaps = chunk_overlaps(chunks, overlap_lines=1)
+
+    assert overlaps[0] == ""
+    for prev, chunk, overlap in zip(chunks, chunks[1:], overlaps[1:]):
+        assert overlap == prev.split("\n")[-1] == chunk.split("\n")[0]
+
+
+@pytest.mark.asyncio
+async def test_extract_orders_chunked_caps_concurrency_and_isolates_failures():
+    transcript = "\n".join(f"user{i} 후드 블랙 주문" for i in range(40))
+    state = {"active": 0, "peak": 0, "calls": 0}
+
+    async def fake_extract(chunk: str):
+        state["calls"] += 1
+        call = state["calls"]
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        if call == 2:
+            raise ValueError("bad json")
+        return {"orders": [["", line.split()[0], "후드", "블랙"] for line in chunk.split("\n")], "fallbacks": []}
+
+    merged = await extract_orders_chunked(transcript, fake_extract, max_chars=120, overlap_lines=1, concurrency=2)
+
+    assert state["calls"] > 2
+    assert state["peak"] <= 2
+    assert merged["failed_chunks"] == [1]
+    assert merged["orders"]
+    people = [order[1] for order in merged["orders"]]
+    assert len(people) == len(set(people))
+
+
+@pytest.mark.asyncio
+async def test_extract_orders_streaming_emits_in_chunk_order_without_overlap_echoes():
+    transcript = "\n".join(f"line{i:02d} " + "x" * 20 for i in range(6))
+    chunks = split_transcript(transcript, max_chars=90, overlap_lines=1)
+    assert len(chunks) >= 2
+
+    async def stream_chunk(chunk, on_order):
+        idx = chunks.index(chunk)
+        if idx == 0:
+            await asyncio.sleep(0.01)  # later chunks finish first
+        for line in chunk.split("\n"):
+            await on_order(["", line.split(" ")[0], "", "", "", ""])
+        return [f"fallback{idx}", "shared"]
+
+    emitted = []
+
+    async def emit(order):
+        emitted.append(order[1])
+
+    result = await extract_orders_streaming(transcript, stream_chunk, emit, max_chars=90, overlap_lines=1)
+    fallbacks = result["fallbacks"]
+
+    assert emitted == [f"line{i:02d}" for i in range(6)]
+    assert result["failed_chunks"] == []
+    assert fallbacks[:2] == ["fallback0", "shared"]
+    assert len(fallbacks) == len(set(fallbacks))
+
+
+@pytest.mark.asyncio
+async def test_extract_orders_streaming_survives_a_failed_chunk():
+    transcript = "\n".join(f"line{i:02d} " + "x" * 20 for i in range(6))
+
+    async def stream_chunk(chunk, on_order):
+        if "line00" in chunk:
+            raise RuntimeError("stream broke")
+        await on_order(["", chunk.split("\n")[-1].split(" ")[0], "", "", "", ""])
+        return []
+
+    emitted = []
+
+    async def emit(order):
+        emitted.append(order[1])
+
+    result = await extract_orders_streaming(transcript, stream_chunk, emit, max_chars=90, overlap_lines=0)
+
+    assert emitted and "line00" not in emitted
+    assert result["failed_chunks"] == [0]
+
+
+@pytest.mark.asyncio
+async def test_extract_orders_streaming_keeps_repeat_orders_outside_the_overlap():
+    transcript = "\n".join(["a 후드 주세요", "x" * 40, "a 후드 주세요 한 개 더"])
+    # Adjacent chunks; only the "x" line is shared.
+    assert len(split_transcript(transcript, max_chars=60, overlap_lines=1)) == 2
+
+    async def stream_chunk(chunk, on_order):
+        for line in chunk.split("\n"):
+            if line.startswith("a "):
+                await on_order(["", "a", "후드", "", "", ""])
+        return []
+
+    emitted = []
+
+    async def emit(order):
+        emitted.append(order)
+
+    await extract_orders_streaming(transcript, stream_chunk, emit, max_chars=60, overlap_lines=1)
+
+    assert len(emitted) == 2
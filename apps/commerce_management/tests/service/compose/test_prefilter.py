@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from app.service.compose.prefilter import estimate_tokens, is_candidate_line, prefilter_transcript
+
+CORPUS = Path(__file__).parent / "data" / "prefilter_corpus.txt"
+
+
+def _load_corpus() -> tuple[str, list[str], list[str]]:
+    lines, orders, chatter = [], [], []
+    for raw in CORPUS.read_text(encoding="utf-8").splitlines():
+        if not raw or raw.startswith("#"):
+            continue
+        label, text = raw.split("|", 1)
+        lines.append(text)
+        (orders if label == "O" else chatter).append(text)
+    return "\n".join(lines), orders, chatter
+
+
+def test_prefilter_keeps_every_order_line_in_corpus():
+    transcript, orders, chatter = _load_corpus()
+
+    result = prefilter_transcript(transcript, context_lines=0)
+
+    kept = result.text.split("\n")
+    assert [line for line in orders if line not in kept] == []
+    assert len([line for line in chatter if line in kept]) <= len(chatter) // 4
+
+
+def test_prefilter_reports_removed_lines_and_tokens():
+    transcript, _, _ = _load_corpus()
+
+    stats = prefilter_transcript(transcript, context_lines=1).stats()
+
+    assert stats["lines_removed"] > 0
+    # Repeats under a different buyer's ID line are not duplicates.
+    assert stats["duplicate_lines"] == 1
+    assert stats["lines_in"] - stats["lines_removed"] == stats["lines_out"]
+    assert 0 < stats["tokens_out"] < stats["tokens_in"]
+
+
+def test_prefilter_keeps_context_around_candidates():
+    transcript = "\n".join(["ㅋㅋ", "저요!", "블랙 후드 원하시는 분?", "ㅎㅎ", "좋아요", "😍"])
+
+    result = prefilter_transcript(transcript, context_lines=1)
+
+    assert result.text.split("\n") == ["저요!", "블랙 후드 원하시는 분?", "ㅎㅎ"]
+
+
+def test_prefilter_keeps_same_line_from_two_buyers():
+    transcript = "buyer_a\n블랙 후드 1개요\nbuyer_b\n블랙 후드 1개요"
+
+    result = prefilter_transcript(transcript, context_lines=0)
+
+    assert result.text == transcript
+    assert result.duplicate_lines == 0
+
+
+def test_prefilter_drops_repeats_from_the_same_buyer():
+    transcript = "buyer_a\n블랙 후드 1개요\n블랙 후드 1개요\nbuyer_a\nbuyer_a\n블랙 후드 1개요\n바지도요"
+
+    result = prefilter_transcript(transcript, context_lines=0)
+
+    assert result.text.split("\n") == ["buyer_a", "블랙 후드 1개요", "buyer_a", "바지도요"]
+    assert result.duplicate_lines == 3
+
+
+def test_candidate_patterns():
+    assert is_candidate_line("@user.name 안녕")
+    assert is_candidate_line("15000")
+    assert is_candidate_line("XL 있어요?")
+    assert not is_candidate_line("ㅋㅋㅋㅋ 너무 웃겨요")
+    assert not is_candidate_line("LOL")
+    assert estimate_tokens("") == 0
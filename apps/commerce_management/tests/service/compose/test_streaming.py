@@ -0,0 +1,43 @@
+import json
+
+from app.service.compose.streaming import OrdersStreamParser
+
+
+def _feed_in_pieces(text: str, size: int) -> tuple[list, OrdersStreamParser]:
+    parser = OrdersStreamParser()
+    closed = []
+    for start in range(0, len(text), size):
+        closed.extend(parser.feed(text[start : start + size]))
+    return closed, parser
+
+
+def test_parser_emits_orders_as_they_close():
+    parser = OrdersStreamParser()
+
+    assert parser.feed('{"orders": [["", "a ka", "후드"') == []
+    assert parser.feed(', "블랙", "", ""], ["", "b') == [["", "a ka", "후드", "블랙", "", ""]]
+    assert parser.feed(' kb", "바지", "", "", ""]') == [["", "b kb", "바지", "", "", ""]]
+    assert parser.feed('], "fallbacks": ["얼마?"]}') == []
+    assert parser.fallbacks() == ["얼마?"]
+
+
+def test_parser_handles_brackets_and_escapes_inside_strings():
+    document = {
+        "fallbacks": ["[먼저] 온 문장"],
+        "orders": [["", 'a "quoted" ka', "바지]", "{색}", "", ""], "plain string order"],
+    }
+    text = json.dumps(document, ensure_ascii=False)
+
+    for size in (1, 3, 7, len(text)):
+        closed, parser = _feed_in_pieces(text, size)
+        assert closed == document["orders"]
+        assert parser.fallbacks() == document["fallbacks"]
+
+
+def test_parser_ignores_nested_orders_keys_and_truncated_output():
+    text = '{"meta": {"orders": [["x"]]}, "orders": [["", "a", "후드", "", "", ""], ["", "b", "바'
+
+    closed, parser = _feed_in_pieces(text, 4)
+
+    assert closed == [["", "a", "후드", "", "", ""]]
+    assert parser.fallbacks() == []
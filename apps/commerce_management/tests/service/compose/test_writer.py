@@ -0,0 +1,143 @@
+from app.service.compose.writer import (
+    COMPOSE_STREAM_GRID_ROWS,
+    StreamingComposeWriter,
+    build_compose_rows,
+    write_compose_sheet,
+)
+
+
+class _StubWorksheet:
+    id = 42
+    title = "NewTab"
+
+
+class _RecordingSpreadsheet:
+    def __init__(self):
+        self.added = []
+        self.batches = []
+
+    def add_worksheet(self, title, rows, cols):
+        self.added.append((title, rows, cols))
+        return _StubWorksheet()
+
+    def batch_update(self, body):
+        self.batches.append(body)
+        return {}
+
+
+def test_build_compose_rows_appends_fallback_section():
+    rows = build_compose_rows([["", "insta kakao", "후드", "블랙", "", ""]], ["후드 얼마에요?"])
+
+    assert rows == [
+        ["", "insta kakao", "후드", "블랙", "", ""],
+        [],
+        ["", "실패 사례"],
+        ["", "후드 얼마에요?"],
+    ]
+
+
+def test_write_compose_sheet_batches_rows_and_format():
+    orders = [["", f"user{i} kakao{i}", "후드", "블랙", "", ""] for i in range(300)]
+    rows = build_compose_rows(orders, ["애매한 문장"])
+    spreadsheet = _RecordingSpreadsheet()
+    progress = []
+
+    write_compose_sheet(spreadsheet, rows, progress.append, chunk_rows=500)
+
+    assert spreadsheet.added == [("NewTab", 303, 6)]
+    assert len(spreadsheet.batches) == 1
+    requests = spreadsheet.batches[0]["requests"]
+    assert "repeatCell" in requests[0]
+    written = requests[1]["updateCells"]["rows"]
+    assert len(written) == 303
+    assert written[0]["values"][1] == {"userEnteredValue": {"stringValue": "user0 kakao0"}}
+    assert progress == [303]
+
+
+def test_write_compose_sheet_chunks_large_transcripts():
+    rows = [["", f"user{i}"] for i in range(1200)]
+    spreadsheet = _RecordingSpreadsheet()
+    progress = []
+
+    write_compose_sheet(spreadsheet, rows, progress.append, chunk_rows=500)
+
+    assert len(spreadsheet.batches) == 3
+    assert progress == [500, 1000, 1200]
+
+
+class _GridSpreadsheet(_RecordingSpreadsheet):
+    """
+    Applies the batchUpdate requests to an in-memory grid of cell values.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.grid = []
+        self.grid_rows = 0
+
+    def add_worksheet(self, title, rows, cols):
+        self.grid_rows = rows
+        return super().add_worksheet(title, rows, cols)
+
+    def batch_update(self, body):
+        for request in body["requests"]:
+            if "insertDimension" in request:
+                span = request["insertDimension"]["range"]
+                self.grid.insert(span["startIndex"], [])
+                self.grid_rows += 1
+            elif "appendDimension" in request and request["appendDimension"]["dimension"] == "ROWS":
+                self.grid_rows += request["appendDimension"]["length"]
+            elif "updateCells" in request:
+                start = request["updateCells"]["start"]["rowIndex"]
+                for offset, row in enumerate(request["updateCells"]["rows"]):
+                    while len(self.grid) <= start + offset:
+                        self.grid.append([])
+                    assert start + offset < self.grid_rows
+                    self.grid[start + offset] = [
+                        cell.get("userEnteredValue", {}).get("stringValue", "") for cell in row["values"]
+                    ]
+        return super().batch_update(body)
+
+
+def _person(order):
+    return order[1]
+
+
+def test_streaming_writer_keeps_each_person_contiguous():
+    spreadsheet = _GridSpreadsheet()
+    progress = []
+    writer = StreamingComposeWriter(spreadsheet, _person, on_progress=progress.append)
+    writer.start()
+
+    for person, item in [("a", "후드"), ("b", "바지"), ("a", "양말"), ("c", "티"), ("b", "모자")]:
+        writer.add_order(["", person, item, "", "", ""])
+        writer.flush()
+    writer.finish(["얼마?"])
+
+    expected = [
+        ["", "a", "후드", "", "", ""],
+        ["", "a", "양말", "", "", ""],
+        ["", "b", "바지", "", "", ""],
+        ["", "b", "모자", "", "", ""],
+        ["", "c", "티", "", "", ""],
+        [],
+        ["", "실패 사례"],
+        ["", "얼마?"],
+    ]
+    assert writer.rows == expected
+    assert spreadsheet.grid == expected
+    assert progress[0] == 1 and progress[-1] == len(expected)
+    assert "repeatCell" in spreadsheet.batches[0]["requests"][0]
+
+
+def test_streaming_writer_grows_the_grid():
+    spreadsheet = _GridSpreadsheet()
+    writer = StreamingComposeWriter(spreadsheet, _person)
+    writer.start()
+
+    for i in range(COMPOSE_STREAM_GRID_ROWS + 3):
+        writer.add_order(["", f"user{i}", "후드", "", "", ""])
+    writer.finish([])
+
+    assert len(spreadsheet.grid) == COMPOSE_STREAM_GRID_ROWS + 3
+    assert len(spreadsheet.batches) == 1
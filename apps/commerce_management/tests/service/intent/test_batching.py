@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+import app.service.chat.chat as chat_module
+from app.service.intent.batching import MicroBatcher
+
+
+def _runners(batch_output=None, batch_error=None):
+    calls = {"batch": [], "one": []}
+
+    async def run_batch(messages):
+        calls["batch"].append(list(messages))
+        if batch_error is not None:
+            raise batch_error
+        if batch_output is not None:
+            return batch_output(messages)
+        return [{"intent": f"i:{m}"} for m in messages]
+
+    async def run_one(message):
+        calls["one"].append(message)
+        return {"intent": f"one:{message}"}
+
+    return calls, run_batch, run_one
+
+
+@pytest.mark.asyncio
+async def test_messages_in_one_window_share_a_batch_call():
+    calls, run_batch, run_one = _runners()
+    batcher = MicroBatcher(run_batch, run_one, window_ms=20, max_size=10)
+
+    results = await asyncio.gather(*(batcher.submit(m) for m in ["a", "b", "a", "c"]))
+
+    assert results == [{"intent": "i:a"}, {"intent": "i:b"}, {"intent": "i:a"}, {"intent": "i:c"}]
+    assert calls == {"batch": [["a", "b", "c"]], "one": []}
+
+
+@pytest.mark.asyncio
+async def test_max_size_flushes_before_the_window_ends():
+    calls, run_batch, run_one = _runners()
+    batcher = MicroBatcher(run_batch, run_one, window_ms=10_000, max_size=2)
+
+    results = await asyncio.wait_for(asyncio.gather(batcher.submit("a"), batcher.submit("b")), timeout=1)
+
+    assert [r["intent"] for r in results] == ["i:a", "i:b"]
+    assert batcher.stats()["batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_malformed_entries_fall_back_to_single_calls():
+    calls, run_batch, run_one = _runners(batch_output=lambda messages: [{"intent": "i:a"}, None, "junk"])
+    batcher = MicroBatcher(run_batch, run_one, window_ms=5, max_size=10)
+
+    results = await asyncio.gather(*(batcher.submit(m) for m in ["a", "b", "c"]))
+
+    assert results == [{"intent": "i:a"}, {"intent": "one:b"}, {"intent": "one:c"}]
+    assert sorted(calls["one"]) == ["b", "c"]
+    assert batcher.stats()["fallbacks"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_call_falls_back_for_every_message():
+    calls, run_batch, run_one = _runners(batch_error=ValueError("bad json"))
+    batcher = MicroBatcher(run_batch, run_one, window_ms=5, max_size=10)
+
+    results = await asyncio.gather(batcher.submit("a"), batcher.submit("b"))
+
+    assert results == [{"intent": "one:a"}, {"intent": "one:b"}]
+
+
+@pytest.mark.asyncio
+async def test_lone_message_uses_single_call():
+    calls, run_batch, run_one = _runners()
+    batcher = MicroBatcher(run_batch, run_one, window_ms=5, max_size=10)
+
+    assert await batcher.submit("a") == {"intent": "one:a"}
+    assert calls["batch"] == []
+
+
+@pytest.mark.asyncio
+async def test_intent_batch_prompt_output_is_mapped_by_id(monkeypatch):
+    async def fake_acall_llm(system_prompt, message, timeout=None):
+        ids = [entry["id"] for entry in json.loads(message)["messages"]]
+        assert ids == ["0", "1", "2"]
+        return json.dumps({"results": {"0": {"intent": "delivery_status"}, "2": {"intent": "bogus"}}})
+
+    monkeypatch.setattr(chat_module, "acall_llm", fake_acall_llm)
+
+    results = await chat_module._intent_batch_llm(["배송", "주문", "??"])
+
+    assert results == [{"intent": "delivery_status"}, None, None]
@@ -0,0 +1,85 @@
+import pytest
+
+from app.service.intent.cache import IntentCache, intent_cache_scope, normalize_message
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+        self.ttls[key] = ttl
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, "0")) + 1)
+        return int(self.data[key])
+
+
+class _DownRedis:
+    def get(self, key):
+        raise ConnectionError("down")
+
+    setex = incr = get
+
+
+def test_normalize_message_folds_spacing_punctuation_emoji_and_repeats():
+    assert normalize_message("배송언제와요??") == normalize_message("배송 언제 와요")
+    assert normalize_message("배송 언제 와요~~ 😭😭") == normalize_message("배송언제와요")
+    assert normalize_message("입금 했어요ㅠㅠㅠㅠ") == normalize_message("입금했어요ㅠ")
+    assert normalize_message("1/11 주문") != normalize_message("1/1 주문")
+
+
+def test_shared_tier_is_seen_by_other_workers():
+    redis = _FakeRedis()
+    worker_a = IntentCache(redis=redis, ttl_sec=60)
+    worker_b = IntentCache(redis=redis, ttl_sec=60)
+
+    worker_a.set("배송 언제 와요?", "s1", "delivery_status")
+
+    assert worker_b.get("배송언제와요", "s1") == "delivery_status"
+    assert worker_b.get("배송언제와요", "s1") == "delivery_status"
+    assert worker_b.stats()["redis_hits"] == 1 and worker_b.stats()["local_hits"] == 1
+    assert set(redis.ttls.values()) == {60}
+    assert worker_b.get("배송언제와요", "s2") is None
+
+
+def test_flush_bumps_version_for_all_workers():
+    redis = _FakeRedis()
+    worker_a = IntentCache(redis=redis, version_refresh_sec=0)
+    worker_b = IntentCache(redis=redis, version_refresh_sec=0)
+    worker_a.set("주문 확인", "s", "order_status")
+    assert worker_b.get("주문 확인", "s") == "order_status"
+
+    worker_a.flush()
+
+    assert worker_a.get("주문 확인", "s") is None
+    assert worker_b.get("주문 확인", "s") is None
+
+
+def test_redis_outage_degrades_to_local_tier():
+    cache = IntentCache(redis=_DownRedis())
+
+    cache.set("안녕하세요", "s", "smalltalk")
+
+    assert cache.get("안녕하세요!!", "s") == "smalltalk"
+    assert cache.get("배송", "s") is None
+    assert cache.stats()["redis_errors"] > 0
+
+
+def test_scope_changes_with_prompt_or_intents():
+    base = intent_cache_scope("prompt", ("a", "b"))
+    assert intent_cache_scope("prompt v2", ("a", "b")) != base
+    assert intent_cache_scope("prompt", ("a", "b", "c")) != base
+
+
+@pytest.mark.parametrize("message", ["", "!!!", "x" * 500])
+def test_uncacheable_messages_are_skipped(message):
+    cache = IntentCache(redis=_FakeRedis())
+    cache.set(message, "s", "fallback")
+    assert cache.get(message, "s") is None
+    assert cache.stats()["stores"] == 0
@@ -0,0 +1,64 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from app.service.intent.fast_path import FastPathIntentClassifier, classify_fast, evaluate
+
+EVAL_SET = Path(__file__).parent / "data" / "intent_eval.jsonl"
+
+
+def _samples() -> list[tuple[str, str]]:
+    lines = EVAL_SET.read_text(encoding="utf-8").splitlines()
+    return [(row["message"], row["intent"]) for row in map(json.loads, filter(None, lines))]
+
+
+def test_eval_set_hit_rate_and_precision():
+    metrics = evaluate(_samples())
+
+    assert metrics["fast_hit_rate"] >= 0.6
+    assert metrics["fast_precision"] == 1.0
+
+
+def test_mixed_or_weak_messages_fall_through():
+    assert classify_fast("배송 주문 둘 다 확인해주세요")[1] < 0.8
+    assert classify_fast("ㅋㅋ")[1] < 0.8
+    assert classify_fast("이거 환불 되나요?") == ("fallback", 0.0)
+
+
+@pytest.mark.asyncio
+async def test_classifier_calls_llm_only_below_threshold():
+    calls = []
+
+    async def llm(message: str) -> str:
+        calls.append(message)
+        return "order_status"
+
+    classifier = FastPathIntentClassifier(threshold=0.8, shadow_rate=0.0)
+
+    assert await classifier.classify("배송 언제 와요?", llm) == "delivery_status"
+    assert await classifier.classify("주문", llm) == "order_status"
+    assert await classifier.classify("환불 되나요", llm) == "order_status"
+
+    assert calls == ["주문", "환불 되나요"]
+    stats = classifier.stats()
+    assert stats["fast_hits"] == 1 and stats["llm_calls"] == 2
+    assert stats["compared"] == 1 and stats["agreed"] == 1
+    assert stats["fast_hit_rate"] == pytest.approx(1 / 3)
+
+
+@pytest.mark.asyncio
+async def test_shadow_sampling_measures_agreement_on_hits():
+    async def llm(_message: str) -> str:
+        return "smalltalk"
+
+    classifier = FastPathIntentClassifier(threshold=0.8, shadow_rate=1.0)
+
+    assert await classifier.classify("배송 언제 와요?", llm) == "delivery_status"
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    stats = classifier.stats()
+    assert stats["shadow_compared"] == 1 and stats["shadow_agreed"] == 0
+    assert stats["agreement_rate"] == 0.0
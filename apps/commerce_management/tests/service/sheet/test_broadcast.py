@@ -0,0 +1,142 @@
+from datetime import date, timedelta
+
+from app.service.sheet.broadcast import BroadcastStatusTable
+from app.service.sheet.sync import TabChange
+from app.service.sheet.user_index import UserGroupIndex
+from app.service.sheet.worksheet_index import WorksheetIndex
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def hset(self, key, mapping):
+        self.ops.append(lambda: self.redis.hashes.setdefault(key, {}).update(mapping))
+
+    def expire(self, key, ttl):
+        self.ops.append(lambda: self.redis.expire(key, ttl))
+
+    def rename(self, src, dst):
+        self.ops.append(lambda: self.redis.hashes.__setitem__(dst, self.redis.hashes.pop(src)))
+
+    def execute(self):
+        self.redis.writes += 1
+        for op in self.ops:
+            op()
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.writes = 0
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(f) for f in fields]
+
+    def expire(self, key, ttl):
+        return key in self.hashes
+
+
+class _DownRedis:
+    def hmget(self, key, fields):
+        raise ConnectionError("down")
+
+
+class _Worksheet:
+    def __init__(self, sheet_id, title):
+        self.spreadsheet_id = "sheet"
+        self.id = sheet_id
+        self.title = title
+
+
+def _md(d: date) -> str:
+    return f"{d.month}/{d.day}"
+
+
+def _index(days_ago: int = 3):
+    ref = date.today() - timedelta(days=days_ago)
+    tabs = [_Worksheet(i, _md(ref - timedelta(days=2 - i))) for i in range(3)]
+    return WorksheetIndex(tabs)
+
+
+def _change(index, rows):
+    return TabChange(index.reference, rows, 0, UserGroupIndex.build(rows))
+
+
+ROWS = [
+    ["10000", "User1", "아이템"],
+    ["12000", "user1", "킵"],
+    ["5000", "user2"],
+    ["16000", "user2"],
+    ["3000", "user3"],
+    ["", "user3"],
+]
+
+
+def test_lookup_matches_reference_tab_groups():
+    table = BroadcastStatusTable(redis=_FakeRedis())
+    index = _index(days_ago=3)
+
+    assert table.refresh(index, [_change(index, ROWS)]) is True
+
+    user1 = table.lookup(" USER1 ")
+    assert user1["found"] and user1["keep"] and user1["order_date"] == index.reference_date
+    user2 = table.lookup("user2")
+    assert user2["payment_confirmed"] and not user2["keep"] and user2["age_days"] == 3
+    user3 = table.lookup("user3")
+    assert user3["found"] and not user3["payment_confirmed"]
+    missing = table.lookup("nobody")
+    assert missing["found"] is False and missing["order_date"] == index.reference_date
+    assert table.stats()["hits"] == 3 and table.stats()["not_found"] == 1
+
+
+def test_refresh_rewrites_only_when_reference_changes():
+    redis = _FakeRedis()
+    worker_a = BroadcastStatusTable(redis=redis)
+    worker_b = BroadcastStatusTable(redis=redis)
+    index = _index()
+
+    worker_a.refresh(index, [_change(index, ROWS)])
+    # No reference change since the last publish: nothing is rebuilt.
+    assert worker_a.refresh(index, []) is False
+    # Another replica syncing the same rows does not rewrite the table.
+    assert worker_b.refresh(index, [_change(index, ROWS)]) is False
+    assert redis.writes == 1
+
+    worker_b.refresh(index, [_change(index, ROWS + [["9000", "user4"]])])
+    assert redis.writes == 2
+    assert worker_a.lookup("user4")["found"] is True
+    assert not any(":staging:" in key for key in redis.hashes)
+
+
+def test_expired_table_is_rebuilt_from_snapshot(monkeypatch):
+    import app.service.sheet.broadcast as broadcast_module
+
+    redis = _FakeRedis()
+    table = BroadcastStatusTable(redis=redis)
+    index = _index()
+    change = _change(index, ROWS)
+    table.refresh(index, [change])
+    redis.hashes.clear()
+
+    class _Snapshot:
+        user_index = change.user_index
+
+    monkeypatch.setattr(broadcast_module.snapshot_cache, "get", lambda ws: _Snapshot())
+    assert table.lookup("user1") is None
+    assert table.refresh(index, []) is True
+    assert table.lookup("user1")["keep"] is True
+
+
+def test_lookup_returns_none_without_table_or_redis():
+    assert BroadcastStatusTable(redis=_FakeRedis()).lookup("user1") is None
+    down = BroadcastStatusTable(redis=_DownRedis())
+    assert down.lookup("user1") is None
+    assert down.stats()["errors"] == 1
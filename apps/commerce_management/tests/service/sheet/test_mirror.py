@@ -0,0 +1,251 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, event, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.service.chat.chat as chat_module
+import app.service.sheet.mirror as mirror_module
+from app.db.models.sheet_mirror import SheetMirrorState, SheetOrderRow, SheetUserGroup
+from app.db.session import Base
+from app.service.sheet.mirror import MirrorTab, MirrorView
+from app.service.sheet.sync import TabChange
+from app.service.sheet.user_index import UserGroupIndex
+from app.service.sheet.worksheet_index import WorksheetIndex
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_as_sqlite_json(_type, _compiler, **_kw):
+    return "JSON"
+
+
+@pytest.fixture
+def mirror_db(monkeypatch):
+    """
+    In-memory SQLite standing in for Postgres behind mirror.session_scope.
+    The advisory lock always succeeds unless `locked["held"]` is set.
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    locked = {"held": False}
+
+    @event.listens_for(engine, "connect")
+    def _register_lock(dbapi_conn, _record):
+        dbapi_conn.create_function("pg_try_advisory_xact_lock", 1, lambda _key: 0 if locked["held"] else 1)
+
+    tables = [SheetMirrorState.__table__, SheetOrderRow.__table__, SheetUserGroup.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    factory = sessionmaker(bind=engine, future=True)
+
+    @contextmanager
+    def session_scope():
+        db = factory()
+        try:
+            yield db
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    monkeypatch.setattr(mirror_module, "session_scope", session_scope)
+    monkeypatch.setattr(mirror_module, "_pending", {})
+    yield factory, locked
+    engine.dispose()
+
+
+class _StubWorksheet:
+    def __init__(self, title, rows):
+        self.title = title
+        self._rows = rows
+
+    def get_all_values(self):
+        return self._rows
+
+
+class _MirrorWorksheet:
+    def __init__(self, sheet_id, title):
+        self.spreadsheet_id = "sheet"
+        self.id = sheet_id
+        self.title = title
+
+
+class _StubSpreadsheet:
+    def __init__(self, worksheets):
+        self._worksheets = worksheets
+
+    def worksheets(self):
+        return self._worksheets
+
+
+def _md(d: date) -> str:
+    return f"{d.month}/{d.day}"
+
+
+def _mirror_view(tabs: list[tuple[str, list[list[str]]]], user_id: str) -> MirrorView:
+    synced_at = datetime.now(timezone.utc)
+    mirror_tabs = [MirrorTab(f"title:{title}", title, idx, synced_at) for idx, (title, _) in enumerate(tabs)]
+    groups = {}
+    for tab, (_, rows) in zip(mirror_tabs, tabs):
+        group = UserGroupIndex.build(rows).last_group(user_id)
+        if group is not None:
+            texts = [" ".join(rows[i]).lower() for i in range(group.start, group.end + 1)]
+            groups[tab.worksheet_id] = (group, texts)
+    return MirrorView(WorksheetIndex(mirror_tabs), groups, synced_at)
+
+
+def test_mirror_view_matches_live_sheet_status(monkeypatch):
+    d1 = date.today() - timedelta(days=4)
+    d2 = date.today() - timedelta(days=3)
+    d3 = date.today() - timedelta(days=1)
+    tabs = [
+        (_md(d1), [["10000", "user1", "후드"], ["16000", "user1", "후드"]]),
+        (_md(d2), [["9000", "user1", "티셔츠"], ["10000", "user1", "티셔츠"]]),
+        (_md(d3), [["5000", "user2"], ["7000", "user1", "킵"]]),
+    ]
+    spreadsheet = _StubSpreadsheet([_StubWorksheet(title, rows) for title, rows in tabs])
+    monkeypatch.setattr(chat_module, "_get_spreadsheet", lambda: spreadsheet)
+
+    queries = [
+        {"date_from": None, "date_to": None, "item": None, "range_text": ""},
+        {"date_from": d1, "date_to": d2, "item": "후드", "range_text": "x"},
+        {"date_from": d1, "date_to": d3, "item": "바지", "range_text": "x"},
+        {"date_from": d3 + timedelta(days=5), "date_to": None, "item": None, "range_text": ""},
+    ]
+    for user_id in ["user1", "user2", "nobody"]:
+        view = _mirror_view(tabs, user_id)
+        assert chat_module._status_for_user(view.index, view.lookup) == chat_module._sheet_status_for_user(user_id)
+        for query in queries:
+            mirrored = chat_module._status_for_query(view.index, view.lookup, query)
+            assert mirrored == chat_module._sheet_status_for_query(user_id, query)
+
+
+def test_stale_mirror_falls_back_to_live_sheet(monkeypatch):
+    d1 = date.today() - timedelta(days=3)
+    spreadsheet = _StubSpreadsheet(
+        [_StubWorksheet("a", []), _StubWorksheet("b", []), _StubWorksheet(_md(d1), [["1000", "user1", "킵"]])]
+    )
+    calls = {"mirror": 0}
+
+    def stale_mirror(_user_id):
+        calls["mirror"] += 1
+        return None
+
+    monkeypatch.setattr(chat_module, "MIRROR_ENABLED", True)
+    monkeypatch.setattr(chat_module, "load_mirror_view", stale_mirror)
+    monkeypatch.setattr(chat_module, "_get_spreadsheet", lambda: spreadsheet)
+
+    status = chat_module._sheet_status_for_user("user1")
+
+    assert calls["mirror"] == 1
+    assert status["found"] is True and status["keep"] is True
+
+
+MIRROR_ROWS = [
+    ["10000", "User1", "후드", "블랙"],
+    ["12000", "user1", "킵"],
+    ["5000", "user2", "바지"],
+]
+
+
+def _mirror_index():
+    d = date.today() - timedelta(days=2)
+    tabs = [_MirrorWorksheet(i, title) for i, title in enumerate(["주문", _md(d - timedelta(days=1)), _md(d)])]
+    return WorksheetIndex(tabs)
+
+
+def _mirror_change(worksheet, rows):
+    return TabChange(worksheet, rows, 0, UserGroupIndex.build(rows))
+
+
+def test_write_tab_rows_stores_order_rows_and_groups(mirror_db):
+    factory, _ = mirror_db
+    index = _mirror_index()
+    tab = index.worksheets[2]
+
+    with factory() as db:
+        mirror_module.write_tab_rows(db, index, _mirror_change(tab, MIRROR_ROWS + [["", ""]]))
+        db.commit()
+        orders = db.execute(select(SheetOrderRow).order_by(SheetOrderRow.row_index)).scalars().all()
+        groups = db.execute(select(SheetUserGroup).order_by(SheetUserGroup.start_row)).scalars().all()
+
+    assert [(o.row_index, o.user_key, o.amount) for o in orders] == [
+        (0, "user1", 10000.0),
+        (1, "user1", 12000.0),
+        (2, "user2", 5000.0),
+    ]
+    assert orders[0].cells == MIRROR_ROWS[0] and orders[0].order_date == date.today() - timedelta(days=2)
+    assert [(g.user_key, g.start_row, g.end_row, g.keep) for g in groups] == [
+        ("user1", 0, 1, True),
+        ("user2", 2, 2, False),
+    ]
+    assert groups[0].row_texts == ["10000 user1 후드 블랙", "12000 user1 킵"]
+
+
+def test_apply_mirror_changes_rewrites_only_changed_tabs(mirror_db):
+    factory, _ = mirror_db
+    index = _mirror_index()
+    older, newer = index.worksheets[1], index.worksheets[2]
+
+    first = [_mirror_change(older, [["1000", "user3", "양말"]]), _mirror_change(newer, MIRROR_ROWS)]
+    assert mirror_module.apply_mirror_changes(index, first)
+    assert mirror_module.apply_mirror_changes(index, [_mirror_change(newer, [["9000", "user2", "니트"]])])
+
+    with factory() as db:
+        states = db.execute(select(SheetMirrorState).order_by(SheetMirrorState.tab_index)).scalars().all()
+        rows = db.execute(select(SheetOrderRow.worksheet_id, SheetOrderRow.user_key)).all()
+
+    assert [(s.worksheet_id, s.tab_index, s.is_reference) for s in states] == [
+        ("0", 0, False),
+        ("1", 1, False),
+        ("2", 2, True),
+    ]
+    assert sorted(rows) == [("1", "user3"), ("2", "user2")]
+    assert mirror_module._pending == {}
+
+
+def test_apply_mirror_changes_keeps_changes_while_locked(mirror_db):
+    factory, locked = mirror_db
+    index = _mirror_index()
+    locked["held"] = True
+
+    assert mirror_module.apply_mirror_changes(index, [_mirror_change(index.worksheets[2], MIRROR_ROWS)]) is False
+    with factory() as db:
+        assert db.execute(select(SheetOrderRow)).first() is None
+
+    locked["held"] = False
+    assert mirror_module.apply_mirror_changes(index, [])
+    with factory() as db:
+        assert len(db.execute(select(SheetOrderRow)).all()) == 3
+
+
+def test_load_mirror_view_returns_fresh_view_for_user(mirror_db):
+    index = _mirror_index()
+    mirror_module.apply_mirror_changes(index, [_mirror_change(index.worksheets[2], MIRROR_ROWS)])
+
+    view = mirror_module.load_mirror_view(" USER1 ")
+
+    assert [tab.worksheet_id for tab in view.index.worksheets] == ["0", "1", "2"]
+    assert view.index.reference.worksheet_id == "2"
+    group, texts = view.groups["2"]
+    assert (group.start, group.end, group.keep) == (0, 1, True)
+    assert view.lookup(view.index.worksheets, "블랙") == [(None, False), (None, False), (group, True)]
+    assert mirror_module.load_mirror_view("nobody").groups == {}
+
+
+def test_load_mirror_view_is_none_when_stale_or_empty(mirror_db):
+    factory, _ = mirror_db
+    assert mirror_module.load_mirror_view("user1") is None
+
+    index = _mirror_index()
+    mirror_module.apply_mirror_changes(index, [_mirror_change(index.worksheets[2], MIRROR_ROWS)])
+    with factory() as db:
+        db.execute(update(SheetMirrorState).values(synced_at=datetime.now(timezone.utc) - timedelta(seconds=300)))
+        db.commit()
+
+    assert mirror_module.load_mirror_view("user1", max_age_sec=600) is not None
+    assert mirror_module.load_mirror_view("user1", max_age_sec=120) is None
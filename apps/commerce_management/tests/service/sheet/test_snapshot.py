@@ -0,0 +1,133 @@
+import threading
+import time
+
+from app.service.sheet.snapshot import WorksheetSnapshotCache
+
+
+class _CountingWorksheet:
+    def __init__(self, rows, delay: float = 0.0):
+        self.spreadsheet_id = "sheet"
+        self.id = 7
+        self.title = "1/20"
+        self.rows = rows
+        self.delay = delay
+        self.calls = 0
+
+    def get_all_values(self):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return [list(r) for r in self.rows]
+
+
+def test_snapshot_cache_serves_fresh_entry():
+    ws = _CountingWorksheet([["1", "user1"]])
+    cache = WorksheetSnapshotCache(ttl_sec=60, stale_sec=60, max_entries=4)
+
+    first = cache.get(ws)
+    second = cache.get(ws)
+
+    assert first is second
+    assert ws.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_snapshot_cache_single_flight_for_concurrent_misses():
+    ws = _CountingWorksheet([["1", "user1"]], delay=0.1)
+    cache = WorksheetSnapshotCache(ttl_sec=60, stale_sec=60, max_entries=4)
+    results = []
+
+    def worker():
+        results.append(cache.get(ws).rows)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert ws.calls == 1
+    assert len(results) == 8
+
+
+def test_snapshot_cache_serves_stale_and_revalidates():
+    ws = _CountingWorksheet([["1", "user1"]])
+    cache = WorksheetSnapshotCache(ttl_sec=0, stale_sec=60, max_entries=4)
+
+    first = cache.get(ws)
+    ws.rows = [["2", "user2"]]
+    time.sleep(0.01)
+    stale = cache.get(ws)
+    assert stale is first
+
+    deadline = time.monotonic() + 2
+    while ws.calls < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert cache.stats()["stale_hits"] == 1
+    assert ws.calls == 2
+
+
+def test_snapshot_cache_mark_changed_and_lru_eviction():
+    ws = _CountingWorksheet([["1", "user1"]])
+    other = _CountingWorksheet([["3", "user3"]])
+    other.id = 8
+    cache = WorksheetSnapshotCache(ttl_sec=60, stale_sec=60, max_entries=1)
+
+    cache.get(ws)
+    cache.mark_changed("sheet", "7")
+    ws.rows = [["2", "user2"]]
+    assert cache.get(ws).rows == [["2", "user2"]]
+
+    cache.get(other)
+    assert cache.stats()["evictions"] == 1
+    cache.get(ws)
+    assert ws.calls == 3
+
+
+class _BatchSpreadsheet:
+    def __init__(self, tabs):
+        self.tabs = tabs
+        self.batch_calls = []
+
+    def values_batch_get(self, ranges):
+        self.batch_calls.append(ranges)
+        return {"valueRanges": [{"range": r, "values": self.tabs[r.strip("'")]} for r in ranges]}
+
+
+class _BatchWorksheet:
+    def __init__(self, spreadsheet, sheet_id, title):
+        self.spreadsheet = spreadsheet
+        self.spreadsheet_id = "sheet"
+        self.id = sheet_id
+        self.title = title
+
+    def get_all_values(self):
+        raise AssertionError("batched read expected")
+
+
+def test_snapshot_cache_get_many_uses_one_batch_request():
+    tabs = {f"1/{day}": [["1000", f"user{day}"], ["2000"]] for day in range(20, 27)}
+    spreadsheet = _BatchSpreadsheet(tabs)
+    worksheets = [_BatchWorksheet(spreadsheet, idx, title) for idx, title in enumerate(tabs)]
+    cache = WorksheetSnapshotCache(ttl_sec=60, stale_sec=60, max_entries=16)
+
+    snapshots = cache.get_many(worksheets)
+
+    assert len(spreadsheet.batch_calls) == 1
+    assert [s.rows for s in snapshots] == [[["1000", f"user{day}"], ["2000", ""]] for day in range(20, 27)]
+
+    cache.get_many(worksheets)
+    assert len(spreadsheet.batch_calls) == 1
+
+
+def test_snapshot_cache_get_many_fans_out_without_batch_support():
+    worksheets = [_CountingWorksheet([[str(i), "user1"]]) for i in range(3)]
+    for idx, ws in enumerate(worksheets):
+        ws.id = idx
+    cache = WorksheetSnapshotCache(ttl_sec=60, stale_sec=60, max_entries=16)
+
+    snapshots = cache.get_many(worksheets)
+
+    assert [s.rows for s in snapshots] == [[["0", "user1"]], [["1", "user1"]], [["2", "user1"]]]
+    assert all(ws.calls == 1 for ws in worksheets)
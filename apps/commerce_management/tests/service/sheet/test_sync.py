@@ -0,0 +1,168 @@
+import random
+import re
+from datetime import date, timedelta
+
+from app.service.sheet.snapshot import WorksheetSnapshotCache
+from app.service.sheet.sync import SheetSyncer
+from app.service.sheet.user_index import UserGroupIndex
+from app.service.sheet.worksheet_index import WorksheetIndexCache
+
+RANGE_RE = re.compile(r"^'(?P<title>[^']+)'(?:!A(?P<start>\d+):ZZ)?$")
+
+
+class _FakeWorksheet:
+    def __init__(self, spreadsheet, sheet_id, title):
+        self.spreadsheet = spreadsheet
+        self.spreadsheet_id = "sheet"
+        self.id = sheet_id
+        self.title = title
+
+    def get_all_values(self):
+        self.spreadsheet.reads.append((self.title, 0))
+        return [list(r) for r in self.spreadsheet.tabs[self.title]]
+
+
+class _FakeSpreadsheet:
+    id = "sheet"
+
+    def __init__(self, tabs):
+        self.tabs = tabs
+        self.modified = "v1"
+        self.reads = []
+        self._worksheets = [_FakeWorksheet(self, idx, title) for idx, title in enumerate(tabs)]
+
+    def worksheets(self):
+        return list(self._worksheets)
+
+    def get_lastUpdateTime(self):
+        return self.modified
+
+    def values_batch_get(self, ranges):
+        value_ranges = []
+        for r in ranges:
+            m = RANGE_RE.match(r)
+            start = int(m.group("start") or 1) - 1
+            self.reads.append((m.group("title"), start))
+            value_ranges.append({"range": r, "values": [list(x) for x in self.tabs[m.group("title")][start:]]})
+        return {"valueRanges": value_ranges}
+
+
+def _md(d: date) -> str:
+    return f"{d.month}/{d.day}"
+
+
+def _syncer():
+    cache = WorksheetSnapshotCache(ttl_sec=60, stale_sec=60, max_entries=16)
+    return SheetSyncer(cache=cache, index_cache=WorksheetIndexCache(ttl_sec=60), block_rows=4, tail_overlap=2), cache
+
+
+def test_user_index_updated_matches_full_build():
+    rng = random.Random(3)
+    users = ["a", "b", "c", ""]
+    for _ in range(300):
+        rows = [[rng.choice(["1000", "2000", ""]), rng.choice(users), rng.choice(["", "킵"])] for _ in range(rng.randint(0, 12))]
+        index = UserGroupIndex.build(rows)
+        changed_from = rng.randint(0, len(rows))
+        new_rows = rows[:changed_from] + [
+            [rng.choice(["1000", "9000"]), rng.choice(users), ""] for _ in range(rng.randint(0, 6))
+        ]
+        expected = UserGroupIndex.build(new_rows)
+        updated = index.updated(new_rows, changed_from)
+        assert dict(updated.items()) == dict(expected.items())
+
+
+def test_syncer_skips_unchanged_and_reads_only_appended_rows():
+    today = date.today()
+    tabs = {
+        _md(today - timedelta(days=2)): [["1000", "user1"]],
+        _md(today - timedelta(days=1)): [["2000", "user2"]],
+        _md(today): [["1000", "user3"], ["2000", "user3"], ["5000", "user3"]],
+    }
+    spreadsheet = _FakeSpreadsheet(tabs)
+    syncer, cache = _syncer()
+
+    _, changes = syncer.sync_once(spreadsheet)
+    assert len(changes) == 3
+
+    spreadsheet.reads.clear()
+    _, changes = syncer.sync_once(spreadsheet)
+    assert changes == [] and spreadsheet.reads == []
+
+    today_title = _md(today)
+    tabs[today_title].append(["9000", "user3"])
+    spreadsheet.modified = "v2"
+    spreadsheet.reads.clear()
+    _, changes = syncer.sync_once(spreadsheet)
+
+    assert [c.worksheet.title for c in changes] == [today_title]
+    assert changes[0].changed_from == 3
+    assert (today_title, 1) in spreadsheet.reads
+    assert all(start > 0 for (_, start) in spreadsheet.reads)
+    # The rows above the tail were not re-read, so the cache refetches the tab.
+    snapshot = cache.get(changes[0].worksheet)
+    assert snapshot.rows[-1] == ["9000", "user3"]
+    assert snapshot.user_index.last_group("user3").end == 3
+
+
+def test_syncer_falls_back_to_full_read_when_overlap_changes():
+    today = date.today()
+    title = _md(today)
+    tabs = {title: [["1000", "user1"], ["2000", "user1"], ["3000", "user2"], ["4000", "user2"]]}
+    spreadsheet = _FakeSpreadsheet(tabs)
+    syncer, _ = _syncer()
+    syncer.sync_once(spreadsheet)
+
+    tabs[title][2] = ["3000", "user1"]
+    spreadsheet.modified = "v2"
+    spreadsheet.reads.clear()
+    _, changes = syncer.sync_once(spreadsheet)
+
+    assert (title, 0) in spreadsheet.reads
+    assert changes[0].changed_from == 2
+    assert changes[0].user_index.last_group("user1").end == 2
+
+
+def test_syncer_confirms_tail_applied_tab_with_a_full_read():
+    title = _md(date.today())
+    tabs = {title: [["1000", "user1"], ["2000", "user1"], ["3000", "user2"], ["4000", "user2"]]}
+    spreadsheet = _FakeSpreadsheet(tabs)
+    syncer, _ = _syncer()
+    syncer.sync_once(spreadsheet)
+
+    tabs[title][0] = ["1000", "user1", "킵"]
+    tabs[title].append(["5000", "user3"])
+    spreadsheet.modified = "v2"
+    syncer.sync_once(spreadsheet)
+
+    # modifiedTime is unchanged, but the tail-applied tab is still read in full once.
+    spreadsheet.reads.clear()
+    _, changes = syncer.sync_once(spreadsheet)
+
+    assert spreadsheet.reads == [(title, 0)]
+    assert changes[0].changed_from == 0
+    assert changes[0].user_index.last_group("user1").keep is True
+
+
+def test_syncer_sees_in_place_edit_above_the_tail_window():
+    title = _md(date.today())
+    rows = [["1000", "user1"], ["2000", "user1"], ["3000", "user2"], ["4000", "user2"]]
+    rows += [["5000", "user3"], ["6000", "user3"]]
+    tabs = {title: rows}
+    spreadsheet = _FakeSpreadsheet(tabs)
+    syncer, cache = _syncer()
+    syncer.sync_once(spreadsheet)
+    worksheet = spreadsheet.worksheets()[0]
+    assert cache.get(worksheet).user_index.last_group("user1").keep is False
+
+    rows[0] = ["1000", "user1", "킵"]
+    spreadsheet.modified = "v2"
+    spreadsheet.reads.clear()
+    _, changes = syncer.sync_once(spreadsheet)
+
+    assert (title, 0) in spreadsheet.reads
+    assert [c.changed_from for c in changes] == [0]
+    spreadsheet.reads.clear()
+    snapshot = cache.get(worksheet)
+    assert snapshot.rows[0] == ["1000", "user1", "킵"]
+    assert snapshot.user_index.last_group("user1").keep is True
+    assert spreadsheet.reads == []
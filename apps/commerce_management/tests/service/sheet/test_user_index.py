@@ -0,0 +1,61 @@
+import random
+
+from app.service.sheet.rows import find_user_group, group_contains_keep, is_payment_confirmed
+from app.service.sheet.user_index import UserGroupIndex
+
+
+def _assert_matches_scan(rows, user_ids):
+    index = UserGroupIndex.build(rows)
+    for user_id in user_ids:
+        expected = find_user_group(rows, user_id)
+        group = index.last_group(user_id)
+        if expected is None:
+            assert group is None, user_id
+            continue
+        assert (group.start, group.end) == expected, user_id
+        assert group.keep == group_contains_keep(rows, *expected)
+        assert group.payment_confirmed == is_payment_confirmed(rows, *expected)
+
+
+def test_user_index_matches_linear_scan_on_fixed_rows():
+    rows = [
+        ["10000", "User1", "후드"],
+        ["12000", " user1 ", "킵"],
+        [],
+        ["5000"],
+        ["3000", "user2", "티셔츠"],
+        ["1,000원", "user1", "양말"],
+        ["9000", "user1", ""],
+        ["", "", ""],
+        ["7000", "user3"],
+    ]
+
+    _assert_matches_scan(rows, ["user1", "USER1", "user2", "user3", "missing", "", "  "])
+
+
+def test_user_index_matches_linear_scan_on_random_rows():
+    rng = random.Random(7)
+    users = ["a", "B", " b", "c", "", "킵"]
+    amounts = ["", "1000", "2,500", "abc", "10000", "-300"]
+    notes = ["", "후드", "킵", "티셔츠"]
+
+    for _ in range(200):
+        rows = []
+        for _ in range(rng.randint(0, 30)):
+            width = rng.randint(0, 3)
+            row = [rng.choice(amounts), rng.choice(users), rng.choice(notes)][:width]
+            rows.append(row)
+        _assert_matches_scan(rows, ["a", "b", "c", "킵", "none"])
+
+
+def test_user_index_keeps_every_group_in_order():
+    rows = [
+        ["1", "user1"],
+        ["2", "user2"],
+        ["3", "user1"],
+        ["4", "user1"],
+    ]
+
+    index = UserGroupIndex.build(rows)
+
+    assert [(g.start, g.end) for g in index.groups("user1")] == [(0, 0), (2, 3)]
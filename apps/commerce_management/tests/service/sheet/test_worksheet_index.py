@@ -0,0 +1,55 @@
+from datetime import date
+
+from app.service.sheet.worksheet_index import WorksheetIndex, WorksheetIndexCache
+
+
+class _Tab:
+    def __init__(self, title: str):
+        self.title = title
+
+
+class _CountingSpreadsheet:
+    id = "sheet"
+
+    def __init__(self, titles):
+        self.tabs = [_Tab(t) for t in titles]
+        self.calls = 0
+
+    def worksheets(self):
+        self.calls += 1
+        return list(self.tabs)
+
+
+def _d(month: int, day: int) -> date:
+    return date(date.today().year, month, day)
+
+
+def test_worksheet_index_range_selection():
+    index = WorksheetIndex([_Tab(t) for t in ["주문", "1/22", "1/20", "메모", "1/25"]])
+
+    assert [d for (d, _) in index.dated] == [_d(1, 20), _d(1, 22), _d(1, 25)]
+    assert [ws.title for (_, ws) in index.in_range(_d(1, 21), _d(1, 25))] == ["1/22", "1/25"]
+    assert index.in_range(_d(1, 23), _d(1, 24)) == []
+    assert index.latest_on_or_before(_d(1, 24))[1].title == "1/22"
+    assert index.latest_on_or_before(_d(1, 19)) is None
+
+
+def test_worksheet_index_reference_date_falls_back_to_previous_tab():
+    index = WorksheetIndex([_Tab("1/20"), _Tab("1/21"), _Tab("완료")])
+
+    assert index.reference.title == "완료"
+    assert index.reference_date == _d(1, 21)
+
+
+def test_worksheet_index_cache_reuses_metadata_until_invalidated():
+    spreadsheet = _CountingSpreadsheet(["1/20", "1/21", "1/22"])
+    cache = WorksheetIndexCache(ttl_sec=60)
+
+    cache.get(spreadsheet)
+    cache.get(spreadsheet)
+    assert spreadsheet.calls == 1
+
+    spreadsheet.tabs.append(_Tab("1/23"))
+    cache.invalidate(spreadsheet)
+    assert cache.get(spreadsheet).dated[-1][0] == _d(1, 23)
+    assert spreadsheet.calls == 2
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from app.service.telemetry.usage import (
+    UsageAggregator,
+    record_cache,
+    record_llm_call,
+    track_usage,
+    usage_stage,
+)
+
+
+@pytest.mark.asyncio
+async def test_track_usage_collects_calls_stages_and_cache_across_threads():
+    with track_usage() as usage:
+        with usage_stage("intent"):
+            record_llm_call("gpt-4", 100, 5, 300.0)
+        with usage_stage("sheet_fetch"):
+            await asyncio.to_thread(record_cache, "sheet_mirror", False)
+        record_llm_call("gpt-4", 100, 5, 1.0, coalesced=True)
+
+    assert [(c.stage, c.coalesced) for c in usage.llm_calls] == [("intent", False), ("other", True)]
+    assert set(usage.stages) == {"intent", "sheet_fetch"}
+    lines = usage.to_usage()
+    assert "llm stage=intent model=gpt-4 prompt_tokens=100 completion_tokens=5 ms=300 coalesced=0" in lines
+    assert "cache sheet_mirror=miss" in lines
+
+
+def test_recording_outside_a_request_is_a_no_op():
+    record_llm_call("gpt-4", 1, 1, 1.0)
+    record_cache("intent_cache", True)
+
+
+def test_aggregator_bills_only_uncoalesced_tokens():
+    aggregator = UsageAggregator()
+    with track_usage() as usage:
+        record_llm_call("gpt-4", 100, 10, 5.0)
+        record_llm_call("gpt-4", 100, 10, 5.0, coalesced=True)
+        record_cache("intent_cache", False)
+
+    aggregator.record("delivery_status", usage)
+    aggregator.record("delivery_status", usage)
+
+    stats = aggregator.stats()["delivery_status"]
+    assert stats["requests"] == 2
+    assert stats["llm_calls"] == 2 and stats["coalesced_calls"] == 2
+    assert stats["prompt_tokens"] == 200 and stats["completion_tokens"] == 20
+    assert stats["cache_misses"] == {"intent_cache": 2}
@@ -1,4 +1,5 @@
 # apps/sns-connector/app/main.py
+import asyncio
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -7,14 +8,27 @@ from fastapi import FastAPI
 load_dotenv(Path(__file__).resolve().parents[1] / ".env")
 
 from .services.common import close_clients
-from .services.instagram import router as instagram_router
-from .services.kakao import router as kakao_router
+from .services.instagram import INSTAGRAM_DRAIN_TIMEOUT_SEC, instagram_queue, router as instagram_router
+from .services.kakao import BUFFER_ENABLED, run_buffer_flush_scheduler, router as kakao_router
+from .utils import close_async_redis
 
 app = FastAPI()
 app.include_router(kakao_router)
 app.include_router(instagram_router)
 
 
+@app.on_event("startup")
+async def startup_event() -> None:
+    app.state.background_tasks = []
+    if BUFFER_ENABLED:
+        app.state.background_tasks.append(asyncio.create_task(run_buffer_flush_scheduler()))
+
+
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
+    for task in getattr(app.state, "background_tasks", []):
+        task.cancel()
+    # Finish queued Instagram replies while the HTTP clients are still open.
+    await instagram_queue.drain(INSTAGRAM_DRAIN_TIMEOUT_SEC)
     await close_clients()
+    await close_async_redis()
@@ -1,4 +1,3 @@
-import asyncio
 import hmac
 import os
 from typing import List, Tuple
@@ -6,9 +5,17 @@ from typing import List, Tuple
 import httpx
 from fastapi import APIRouter, HTTPException, Query, Request
 
+from ..utils.work_queue import WorkQueue
 from .common import call_commerce_management, commerce_client, logger
 
 router = APIRouter()
+INSTAGRAM_WORKERS = int(os.getenv("INSTAGRAM_WORKERS", "8"))
+INSTAGRAM_QUEUE_SIZE = int(os.getenv("INSTAGRAM_QUEUE_SIZE", "500"))
+# How long the webhook waits for a queue slot before answering 503 so Meta retries.
+INSTAGRAM_ENQUEUE_TIMEOUT_SEC = float(os.getenv("INSTAGRAM_ENQUEUE_TIMEOUT_SEC", "2"))
+INSTAGRAM_DRAIN_TIMEOUT_SEC = float(os.getenv("INSTAGRAM_DRAIN_TIMEOUT_SEC", "20"))
+
+instagram_queue = WorkQueue("instagram", INSTAGRAM_WORKERS, INSTAGRAM_QUEUE_SIZE, INSTAGRAM_ENQUEUE_TIMEOUT_SEC)
 
 
 def extract_instagram_messages(payload: dict) -> List[Tuple[str, str]]:
@@ -89,7 +96,14 @@ async def instagram_webhook(request: Request):
     if not messages:
         return {"status": "ignored"}
 
-    for sender_id, text in messages:
-        asyncio.create_task(handle_instagram_message(sender_id, text))
+    # All or nothing: Meta retries the whole payload after a 503.
+    jobs = [lambda s=sender_id, t=text: handle_instagram_message(s, t) for sender_id, text in messages]
+    if not await instagram_queue.submit_many(jobs):
+        raise HTTPException(status_code=503, detail="instagram queue is full")
 
     return {"status": "ok"}
+
+
+@router.get("/stats/instagram-queue")
+async def instagram_queue_stats():
+    return instagram_queue.stats()
@@ -6,15 +6,13 @@ import os
 import uuid
 
 from fastapi import APIRouter, Header, HTTPException, Request
-from redis import Redis
 
-from ..utils import append_message, flush_buffer, should_flush
-from ..utils.buffer import FLUSH_SILENCE_SEC
+from ..utils import aappend_message, aflush_buffer, ashould_flush, get_async_redis
+from ..utils.flush_scheduler import run_flush_scheduler
 from .common import call_commerce_management, logger
 
 router = APIRouter()
 BUFFER_ENABLED = os.getenv("KAKAO_BUFFER_ENABLED", "") == "1"
-redis_client = Redis(host=os.getenv("REDIS_HOST", "localhost"), port=int(os.getenv("REDIS_PORT", "6379")), decode_responses=True) if BUFFER_ENABLED else None
 
 
 def verify_signature(body: bytes, signature: str, secret: str) -> bool:
@@ -38,19 +36,18 @@ async def send_followup(user_id: str, text: str) -> None:
     logger.info("followup to user=%s text=%s", user_id, text)
 
 
-async def flush_after_silence(user_id: str) -> None:
-    await asyncio.sleep(FLUSH_SILENCE_SEC)
-    if redis_client is None:
-        return
-    if not should_flush(redis_client, user_id):
-        return
-    merged = flush_buffer(redis_client, user_id)
-    if not merged:
-        return
+async def deliver_buffered(user_id: str, merged: str) -> None:
     reply = await call_commerce_management(user_id, merged)
     await send_followup(user_id, reply)
 
 
+async def run_buffer_flush_scheduler() -> None:
+    """
+    Flushes buffers that went silent or hit MAX_WAIT_SEC; started by main.py.
+    """
+    await run_flush_scheduler(get_async_redis, deliver_buffered)
+
+
 async def handle_long_running(task: asyncio.Task, user_id: str, request_id: str) -> None:
     try:
         reply = await task
@@ -119,12 +116,13 @@ async def kakao_webhook(
         user_request["utterance"] = user_message
     request_id = str(uuid.uuid4())
 
-    if BUFFER_ENABLED and user_message and redis_client is not None:
-        append_message(redis_client, user_id, user_message)
-        if not (has_end_signal(user_message) or should_flush(redis_client, user_id)):
-            asyncio.create_task(flush_after_silence(user_id))
+    if BUFFER_ENABLED and user_message:
+        redis_client = get_async_redis()
+        await aappend_message(redis_client, user_id, user_message)
+        if not (has_end_signal(user_message) or await ashould_flush(redis_client, user_id)):
+            # The flush scheduler picks the buffer up once it goes silent.
             return kakao_response("")
-        merged = flush_buffer(redis_client, user_id)
+        merged = await aflush_buffer(redis_client, user_id)
         if not merged:
             return kakao_response("요청을 처리 중입니다.")
         user_message = merged
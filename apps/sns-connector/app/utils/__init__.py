@@ -1,3 +1,21 @@
-from .buffer import append_message, flush_buffer, should_flush
+from .buffer import (
+    aappend_message,
+    aflush_buffer,
+    append_message,
+    ashould_flush,
+    close_async_redis,
+    flush_buffer,
+    get_async_redis,
+    should_flush,
+)
 
-__all__ = ["append_message", "flush_buffer", "should_flush"]
+__all__ = [
+    "aappend_message",
+    "aflush_buffer",
+    "append_message",
+    "ashould_flush",
+    "close_async_redis",
+    "flush_buffer",
+    "get_async_redis",
+    "should_flush",
+]
@@ -1,74 +1,293 @@
+import asyncio
+import hashlib
+import os
 import time
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Optional
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import NoScriptError
+
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
 
 BUFFER_TTL = 120
 FLUSH_SILENCE_SEC = 5
 MAX_WAIT_SEC = 60
 MAX_CHARS = 800
+# Seconds a claimed flush may stay unacknowledged before another worker retries it.
+FLUSH_LEASE_SEC = int(os.getenv("KAKAO_FLUSH_LEASE_SEC", "60"))
+
+# Each buffer operation is one EVALSHA, so it costs one round trip and runs
+# atomically with respect to other workers. The meta hash keeps running
+# `chars` / `messages` totals of the buffered texts, so the flush check
+# never reads the list itself.
+#
+# Every buffered session also sits in the deadlines ZSET scored by the time
+# it becomes flushable on silence / max wait:
+# min(last_ts + FLUSH_SILENCE_SEC, first_ts + MAX_WAIT_SEC).
+
+# KEYS: buffer, meta, deadlines  ARGV: text, now, ttl, chars, silence_sec, max_wait_sec, session_id
+APPEND_SCRIPT = """
+redis.call('RPUSH', KEYS[1], ARGV[1])
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    redis.call('HSET', KEYS[2], 'first_ts', ARGV[2], 'last_ts', ARGV[2])
+else
+    redis.call('HSET', KEYS[2], 'last_ts', ARGV[2])
+end
+redis.call('HINCRBY', KEYS[2], 'chars', ARGV[4])
+redis.call('HINCRBY', KEYS[2], 'messages', 1)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+local first_ts = tonumber(redis.call('HGET', KEYS[2], 'first_ts'))
+local deadline = math.min(tonumber(ARGV[2]) + tonumber(ARGV[5]), first_ts + tonumber(ARGV[6]))
+redis.call('ZADD', KEYS[3], deadline, ARGV[7])
+"""
+
+# KEYS: meta  ARGV: now, silence_sec, max_wait_sec, max_chars
+SHOULD_FLUSH_SCRIPT = """
+local meta = redis.call('HMGET', KEYS[1], 'first_ts', 'last_ts', 'chars')
+if not meta[1] and not meta[2] then
+    return 0
+end
+local now = tonumber(ARGV[1])
+if now - (tonumber(meta[2]) or 0) >= tonumber(ARGV[2]) then
+    return 1
+end
+if now - (tonumber(meta[1]) or 0) >= tonumber(ARGV[3]) then
+    return 1
+end
+if (tonumber(meta[3]) or 0) >= tonumber(ARGV[4]) then
+    return 1
+end
+return 0
+"""
+
+# KEYS: buffer, meta, lock, deadlines  ARGV: session_id
+FLUSH_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    return false
+end
+redis.call('ZREM', KEYS[4], ARGV[1])
+local texts = redis.call('LRANGE', KEYS[1], 0, -1)
+if #texts == 0 then
+    return false
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+return texts
+"""
+
+# Takes up to `limit` sessions whose deadline has passed, moves each buffer
+# into a `flushing:<id>` hash leased until now + lease_sec, and returns
+# [id, session_id, text, ...]. Leases left by a crashed worker are handed
+# out again first. Buffer keys are built from prefixes, so this assumes a
+# single (non-cluster) Redis.
+# KEYS: deadlines, leases, seq  ARGV: now, limit, lease_sec, buffer_prefix, meta_prefix, lock_prefix, flushing_prefix
+CLAIM_SCRIPT = """
+local now = tonumber(ARGV[1])
+local lease_until = now + tonumber(ARGV[3])
+local out = {}
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, ARGV[2])) do
+    local flushing = redis.call('HMGET', ARGV[7] .. id, 'session_id', 'text')
+    if flushing[1] then
+        redis.call('ZADD', KEYS[2], lease_until, id)
+        table.insert(out, id)
+        table.insert(out, flushing[1])
+        table.insert(out, flushing[2])
+    else
+        redis.call('ZREM', KEYS[2], id)
+    end
+end
+for _, session in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, ARGV[2])) do
+    if redis.call('EXISTS', ARGV[6] .. session) == 1 then
+        -- A legacy flush holds the lock; look again shortly.
+        redis.call('ZADD', KEYS[1], now + 1, session)
+    else
+        redis.call('ZREM', KEYS[1], session)
+        local texts = redis.call('LRANGE', ARGV[4] .. session, 0, -1)
+        if #texts > 0 then
+            redis.call('DEL', ARGV[4] .. session, ARGV[5] .. session)
+            local id = tostring(redis.call('INCR', KEYS[3]))
+            local text = table.concat(texts, '\\n')
+            redis.call('HSET', ARGV[7] .. id, 'session_id', session, 'text', text)
+            redis.call('ZADD', KEYS[2], lease_until, id)
+            table.insert(out, id)
+            table.insert(out, session)
+            table.insert(out, text)
+        end
+    end
+end
+return out
+"""
+
+# KEYS: leases  ARGV: id, flushing_prefix
+ACK_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('DEL', ARGV[2] .. ARGV[1])
+"""
+
+DEADLINES_KEY = "chat:buffer:deadlines"
+LEASES_KEY = "chat:buffer:flushing:leases"
+FLUSH_SEQ_KEY = "chat:buffer:flushing:seq"
+BUFFER_PREFIX = "chat:buffer:"
+META_PREFIX = "chat:buffer:meta:"
+LOCK_PREFIX = "chat:buffer:lock:"
+FLUSHING_PREFIX = "chat:buffer:flushing:"
 
 
 def _buffer_key(session_id: str) -> str:
-    return f"chat:buffer:{session_id}"
+    return f"{BUFFER_PREFIX}{session_id}"
 
 
 def _meta_key(session_id: str) -> str:
-    return f"chat:buffer:meta:{session_id}"
+    return f"{META_PREFIX}{session_id}"
 
 
 def _lock_key(session_id: str) -> str:
-    return f"chat:buffer:lock:{session_id}"
+    return f"{LOCK_PREFIX}{session_id}"
 
 
-def append_message(r: Redis, session_id: str, text: str) -> None:
+def _sha(source: str) -> str:
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+_SHAS = {
+    source: _sha(source)
+    for source in (APPEND_SCRIPT, SHOULD_FLUSH_SCRIPT, FLUSH_SCRIPT, CLAIM_SCRIPT, ACK_SCRIPT)
+}
+
+# (script, keys, args) for each operation, shared by the sync and async clients.
+ScriptCall = tuple[str, list[str], list[Any]]
+
+
+def _append_call(session_id: str, text: str) -> ScriptCall:
     now = int(time.time())
-    buf_key = _buffer_key(session_id)
-    meta_key = _meta_key(session_id)
+    return (
+        APPEND_SCRIPT,
+        [_buffer_key(session_id), _meta_key(session_id), DEADLINES_KEY],
+        [text, now, BUFFER_TTL, len(text), FLUSH_SILENCE_SEC, MAX_WAIT_SEC, session_id],
+    )
+
 
-    r.rpush(buf_key, text)
+def _should_flush_call(session_id: str) -> ScriptCall:
+    now = int(time.time())
+    return (SHOULD_FLUSH_SCRIPT, [_meta_key(session_id)], [now, FLUSH_SILENCE_SEC, MAX_WAIT_SEC, MAX_CHARS])
 
-    meta = r.hgetall(meta_key)
-    if not meta:
-        r.hset(meta_key, mapping={"first_ts": now, "last_ts": now})
-    else:
-        r.hset(meta_key, "last_ts", now)
 
-    r.expire(buf_key, BUFFER_TTL)
-    r.expire(meta_key, BUFFER_TTL)
+def _flush_call(session_id: str) -> ScriptCall:
+    # The script is atomic, so it needs no lock of its own; it still backs
+    # off while another worker holds the legacy flush lock.
+    return (
+        FLUSH_SCRIPT,
+        [_buffer_key(session_id), _meta_key(session_id), _lock_key(session_id), DEADLINES_KEY],
+        [session_id],
+    )
 
 
-def should_flush(r: Redis, session_id: str) -> bool:
+def _claim_call(limit: int, lease_sec: int) -> ScriptCall:
     now = int(time.time())
-    meta = r.hgetall(_meta_key(session_id))
-    if not meta:
-        return False
+    return (
+        CLAIM_SCRIPT,
+        [DEADLINES_KEY, LEASES_KEY, FLUSH_SEQ_KEY],
+        [now, limit, lease_sec, BUFFER_PREFIX, META_PREFIX, LOCK_PREFIX, FLUSHING_PREFIX],
+    )
 
-    first_ts = int(meta.get("first_ts", 0))
-    last_ts = int(meta.get("last_ts", 0))
 
-    if now - last_ts >= FLUSH_SILENCE_SEC:
-        return True
-    if now - first_ts >= MAX_WAIT_SEC:
-        return True
+def _joined(texts: Optional[list[str]]) -> Optional[str]:
+    if not texts:
+        return None
+    return "\n".join(texts)
 
-    texts = r.lrange(_buffer_key(session_id), 0, -1)
-    if sum(len(t) for t in texts) >= MAX_CHARS:
-        return True
 
-    return False
+def _run_script(r: Redis, call: ScriptCall) -> Any:
+    source, keys, args = call
+    try:
+        return r.evalsha(_SHAS[source], len(keys), *keys, *args)
+    except NoScriptError:
+        # First call on this server (or after SCRIPT FLUSH): EVAL also caches it.
+        return r.eval(source, len(keys), *keys, *args)
+
+
+def append_message(r: Redis, session_id: str, text: str) -> None:
+    _run_script(r, _append_call(session_id, text))
+
+
+def should_flush(r: Redis, session_id: str) -> bool:
+    return bool(int(_run_script(r, _should_flush_call(session_id))))
 
 
 def flush_buffer(r: Redis, session_id: str) -> Optional[str]:
-    lock_key = _lock_key(session_id)
-    if not r.set(lock_key, "1", nx=True, ex=5):
-        return None
+    return _joined(_run_script(r, _flush_call(session_id)))
+
+
+_async_redis: Optional[AsyncRedis] = None
+_async_redis_loop: Optional[asyncio.AbstractEventLoop] = None
+
 
+def get_async_redis() -> AsyncRedis:
+    """
+    Shared asyncio Redis client (one connection pool) for the running event
+    loop. Pooled connections belong to the loop that opened them, so a new
+    loop gets a new client.
+    """
+    global _async_redis, _async_redis_loop
+    loop = asyncio.get_running_loop()
+    if _async_redis is None or _async_redis_loop is not loop:
+        _async_redis = AsyncRedis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            decode_responses=True,
+            max_connections=REDIS_MAX_CONNECTIONS,
+        )
+        _async_redis_loop = loop
+    return _async_redis
+
+
+async def close_async_redis() -> None:
+    global _async_redis, _async_redis_loop
+    if _async_redis is not None and _async_redis_loop is asyncio.get_running_loop():
+        await _async_redis.aclose()
+    _async_redis = None
+    _async_redis_loop = None
+
+
+async def _arun_script(r: AsyncRedis, call: ScriptCall) -> Any:
+    source, keys, args = call
     try:
-        texts = r.lrange(_buffer_key(session_id), 0, -1)
-        if not texts:
-            return None
-        r.delete(_buffer_key(session_id))
-        r.delete(_meta_key(session_id))
-        return "\n".join(texts)
-    finally:
-        r.delete(lock_key)
+        return await r.evalsha(_SHAS[source], len(keys), *keys, *args)
+    except NoScriptError:
+        return await r.eval(source, len(keys), *keys, *args)
+
+
+async def aappend_message(r: AsyncRedis, session_id: str, text: str) -> None:
+    await _arun_script(r, _append_call(session_id, text))
+
+
+async def ashould_flush(r: AsyncRedis, session_id: str) -> bool:
+    return bool(int(await _arun_script(r, _should_flush_call(session_id))))
+
+
+async def aflush_buffer(r: AsyncRedis, session_id: str) -> Optional[str]:
+    return _joined(await _arun_script(r, _flush_call(session_id)))
+
+
+@dataclass(frozen=True)
+class ClaimedFlush:
+    flush_id: str
+    session_id: str
+    text: str
+
+
+async def aclaim_due_flushes(r: AsyncRedis, limit: int, lease_sec: int = FLUSH_LEASE_SEC) -> list[ClaimedFlush]:
+    """
+    Atomically take buffers whose silence / max-wait deadline has passed.
+    Each claim must be passed to `aack_flush` once handled; unacknowledged
+    claims are returned again after `lease_sec`.
+    """
+    flat = await _arun_script(r, _claim_call(limit, lease_sec))
+    return [ClaimedFlush(*flat[i : i + 3]) for i in range(0, len(flat), 3)]
+
+
+async def aack_flush(r: AsyncRedis, flush_id: str) -> None:
+    await _arun_script(r, (ACK_SCRIPT, [LEASES_KEY], [flush_id, FLUSHING_PREFIX]))
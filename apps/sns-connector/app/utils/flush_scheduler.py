@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable
+
+from redis.asyncio import Redis as AsyncRedis
+
+from .buffer import FLUSH_LEASE_SEC, ClaimedFlush, aack_flush, aclaim_due_flushes
+
+logger = logging.getLogger(__name__)
+
+FLUSH_POLL_SEC = float(os.getenv("KAKAO_FLUSH_POLL_SEC", "0.5"))
+FLUSH_BATCH_SIZE = int(os.getenv("KAKAO_FLUSH_BATCH_SIZE", "50"))
+FLUSH_WORKERS = int(os.getenv("KAKAO_FLUSH_WORKERS", "8"))
+
+
+async def run_flush_scheduler(
+    get_redis: Callable[[], AsyncRedis],
+    handler: Callable[[str, str], Awaitable[None]],
+    poll_sec: float = FLUSH_POLL_SEC,
+    batch_size: int = FLUSH_BATCH_SIZE,
+    workers: int = FLUSH_WORKERS,
+    lease_sec: int = FLUSH_LEASE_SEC,
+) -> None:
+    """
+    Single loop that fires buffered Kakao flushes once their deadline passes.
+
+    Every connector replica runs one. Claims are atomic in Redis, so each
+    session's flush goes to exactly one replica, and at most `workers`
+    handlers run at a time per replica. A claim is acknowledged after
+    `handler(session_id, text)` returns. Claims left by a replica that died
+    mid-flight are handed out again after `lease_sec`.
+    """
+    running: set[asyncio.Task] = set()
+
+    async def deliver(r: AsyncRedis, claim: ClaimedFlush) -> None:
+        try:
+            await handler(claim.session_id, claim.text)
+        except Exception:
+            logger.exception("buffered flush failed session=%s", claim.session_id)
+        # Acked after a failure too; only a crashed replica (no ack) causes a retry.
+        await aack_flush(r, claim.flush_id)
+
+    try:
+        while True:
+            # Only claim what idle workers can start, so a busy replica leaves work to others.
+            free = min(batch_size, workers - len(running))
+            claimed: list[ClaimedFlush] = []
+            try:
+                if free > 0:
+                    r = get_redis()
+                    claimed = await aclaim_due_flushes(r, free, lease_sec)
+                for claim in claimed:
+                    task = asyncio.create_task(deliver(r, claim))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("flush scheduler iteration failed")
+            if len(claimed) < free or free == 0:
+                await asyncio.sleep(poll_sec)
+    finally:
+        # Unfinished claims stay leased in Redis and are retried after a restart.
+        for task in list(running):
+            task.cancel()
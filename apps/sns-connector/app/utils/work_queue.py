@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+# How often `submit_many` rechecks a full queue for room.
+BATCH_POLL_SEC = 0.01
+
+
+class WorkQueue:
+    """
+    Bounded in-process job queue served by a fixed number of worker tasks.
+
+    - `submit()` waits up to `enqueue_timeout_sec` for a free slot and
+      returns False when the queue stays full (backpressure to the caller).
+    - `submit_many()` does the same for a batch, all or nothing.
+    - `drain()` stops intake, waits for queued and running jobs to finish,
+      then stops the workers.
+    - `stats()` reports depth, wait time (enqueue to start) and processing
+      latency.
+
+    Workers start on the first submit and are bound to that event loop.
+    """
+
+    def __init__(self, name: str, workers: int, maxsize: int, enqueue_timeout_sec: float) -> None:
+        self.name = name
+        self._workers = max(1, workers)
+        self._maxsize = max(1, maxsize)
+        self._enqueue_timeout = enqueue_timeout_sec
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._closed = False
+        self._in_progress = 0
+        self._counters = {
+            "enqueued": 0,
+            "rejected": 0,
+            "processed": 0,
+            "failed": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "latency_ms_total": 0.0,
+            "latency_ms_max": 0.0,
+        }
+
+    async def submit(self, job: Job) -> bool:
+        if self._closed:
+            self._counters["rejected"] += 1
+            return False
+        queue = self._bind_loop()
+        try:
+            await asyncio.wait_for(queue.put((time.perf_counter(), job)), timeout=self._enqueue_timeout)
+        except asyncio.TimeoutError:
+            self._counters["rejected"] += 1
+            logger.warning("%s queue full depth=%s; job rejected", self.name, queue.qsize())
+            return False
+        self._counters["enqueued"] += 1
+        return True
+
+    async def submit_many(self, jobs: list[Job]) -> bool:
+        """
+        Enqueue every job, or none of them when the queue has no room for
+        the whole batch within `enqueue_timeout_sec`. A caller whose client
+        retries the whole batch on failure never gets part of it run twice.
+        """
+        if self._closed:
+            self._counters["rejected"] += len(jobs)
+            return False
+        queue = self._bind_loop()
+        deadline = time.perf_counter() + self._enqueue_timeout
+        while self._maxsize - queue.qsize() < len(jobs):
+            if time.perf_counter() >= deadline:
+                self._counters["rejected"] += len(jobs)
+                logger.warning("%s queue full depth=%s; batch of %s rejected", self.name, queue.qsize(), len(jobs))
+                return False
+            await asyncio.sleep(BATCH_POLL_SEC)
+        # No await from the room check to the last put, so the batch lands whole.
+        enqueued_at = time.perf_counter()
+        for job in jobs:
+            queue.put_nowait((enqueued_at, job))
+        self._counters["enqueued"] += len(jobs)
+        return True
+
+    async def drain(self, timeout_sec: float) -> None:
+        self._closed = True
+        queue = self._queue
+        if queue is None or self._loop is not asyncio.get_running_loop():
+            return
+        try:
+            await asyncio.wait_for(queue.join(), timeout=timeout_sec)
+        except asyncio.TimeoutError:
+            logger.warning("%s queue drain timed out; dropping %s jobs", self.name, queue.qsize() + self._in_progress)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict[str, float]:
+        counters = dict(self._counters)
+        started = counters["processed"] + counters["failed"]
+        counters["wait_ms_avg"] = counters["wait_ms_total"] / started if started else 0.0
+        counters["latency_ms_avg"] = counters["latency_ms_total"] / started if started else 0.0
+        counters["depth"] = self._queue.qsize() if self._queue is not None else 0
+        counters["in_progress"] = self._in_progress
+        counters["workers"] = self._workers
+        counters["capacity"] = self._maxsize
+        return counters
+
+    def _bind_loop(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            # Jobs and workers from another (closed) loop can never run.
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self._maxsize)
+            self._tasks = [loop.create_task(self._worker(self._queue)) for _ in range(self._workers)]
+        return self._queue
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            enqueued_at, job = await queue.get()
+            started = time.perf_counter()
+            self._in_progress += 1
+            try:
+                await job()
+                self._counters["processed"] += 1
+            except Exception:
+                self._counters["failed"] += 1
+                logger.exception("%s job failed", self.name)
+            finally:
+                self._in_progress -= 1
+                self._observe(started - enqueued_at, time.perf_counter() - started)
+                queue.task_done()
+
+    def _observe(self, wait_sec: float, latency_sec: float) -> None:
+        self._counters["wait_ms_total"] += wait_sec * 1000
+        self._counters["wait_ms_max"] = max(self._counters["wait_ms_max"], wait_sec * 1000)
+        self._counters["latency_ms_total"] += latency_sec * 1000
+        self._counters["latency_ms_max"] = max(self._counters["latency_ms_max"], latency_sec * 1000)
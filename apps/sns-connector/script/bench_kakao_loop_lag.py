@@ -0,0 +1,136 @@
+"""
+Event-loop lag while buffering Kakao messages, sync vs asyncio Redis client.
+
+Messages arrive as a Poisson stream; each one runs the webhook's buffer path
+(append + flush check, flush every --flush-every messages). A probe task
+sleeps 5 ms in a loop and records how late it wakes up. With the sync client
+every Redis round trip blocks the loop, so lag grows with traffic; with the
+asyncio client it should stay flat.
+
+    python script/bench_kakao_loop_lag.py --rates 50,200,800
+    python script/bench_kakao_loop_lag.py --fake-rtt-ms 1   # no Redis server needed
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.utils.buffer import (  # noqa: E402
+    REDIS_HOST,
+    REDIS_PORT,
+    aappend_message,
+    aflush_buffer,
+    append_message,
+    ashould_flush,
+    flush_buffer,
+    should_flush,
+)
+
+PROBE_SEC = 0.005
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _clients(args: argparse.Namespace) -> tuple[Redis, AsyncRedis]:
+    if args.fake_rtt_ms is None:
+        return (
+            Redis(host=args.host, port=args.port, decode_responses=True),
+            AsyncRedis(host=args.host, port=args.port, decode_responses=True),
+        )
+
+    import fakeredis
+
+    rtt = args.fake_rtt_ms / 1000
+    server = fakeredis.FakeServer()
+
+    class SlowRedis(fakeredis.FakeRedis):
+        def execute_command(self, *a, **kw):
+            time.sleep(rtt)
+            return super().execute_command(*a, **kw)
+
+    class SlowAsyncRedis(fakeredis.FakeAsyncRedis):
+        async def execute_command(self, *a, **kw):
+            await asyncio.sleep(rtt)
+            return await super().execute_command(*a, **kw)
+
+    return (
+        SlowRedis(server=server, decode_responses=True),
+        SlowAsyncRedis(server=server, decode_responses=True),
+    )
+
+
+async def _run(rate: float, use_async: bool, args: argparse.Namespace) -> dict[str, float]:
+    sync_r, async_r = _clients(args)
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def probe() -> None:
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(PROBE_SEC)
+            lags.append(time.perf_counter() - started - PROBE_SEC)
+
+    async def one_message(idx: int) -> None:
+        session = f"bench:{idx % args.sessions}"
+        text = f"블랙 후드 {idx}개"
+        if use_async:
+            await aappend_message(async_r, session, text)
+            if await ashould_flush(async_r, session) or idx % args.flush_every == 0:
+                await aflush_buffer(async_r, session)
+        else:
+            append_message(sync_r, session, text)
+            if should_flush(sync_r, session) or idx % args.flush_every == 0:
+                flush_buffer(sync_r, session)
+
+    probe_task = asyncio.create_task(probe())
+    rng = random.Random(7)
+    tasks = []
+    for idx in range(int(rate * args.seconds)):
+        tasks.append(asyncio.create_task(one_message(idx)))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    done.set()
+    await probe_task
+    await async_r.aclose()
+    sync_r.close()
+    return {
+        "p50_ms": statistics.median(lags) * 1000,
+        "p99_ms": _percentile(lags, 99) * 1000,
+        "max_ms": max(lags) * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", default="50,200,800", help="Kakao messages per second to try")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--sessions", type=int, default=200, help="distinct buyers")
+    parser.add_argument("--flush-every", type=int, default=5)
+    parser.add_argument("--host", default=REDIS_HOST)
+    parser.add_argument("--port", type=int, default=REDIS_PORT)
+    parser.add_argument("--fake-rtt-ms", type=float, default=None, help="use fakeredis with this simulated round trip")
+    args = parser.parse_args()
+
+    print(f"{'client':>6} {'rate':>6} {'lag_p50_ms':>11} {'lag_p99_ms':>11} {'lag_max_ms':>11}")
+    for rate in [float(r) for r in args.rates.split(",")]:
+        for use_async in (False, True):
+            result = await _run(rate, use_async, args)
+            print(
+                f"{'async' if use_async else 'sync':>6} {rate:>6.0f} "
+                f"{result['p50_ms']:>11.2f} {result['p99_ms']:>11.2f} {result['max_ms']:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -34,3 +34,51 @@ def test_instagram_verify_success(client, monkeypatch):
 
     assert response.status_code == 200
     assert response.text == "challenge"
+
+
+def _payload(*texts):
+    return {"entry": [{"messaging": [{"sender": {"id": "user-1"}, "message": {"text": t}} for t in texts]}]}
+
+
+def test_instagram_webhook_enqueues_messages(client, monkeypatch):
+    submitted = []
+
+    async def fake_submit_many(jobs):
+        submitted.extend(jobs)
+        return True
+
+    monkeypatch.setattr(instagram_module.instagram_queue, "submit_many", fake_submit_many)
+
+    response = client.post("/webhook/instagram", json=_payload("hi", "블랙 후드"))
+
+    assert response.status_code == 200
+    assert len(submitted) == 2
+
+
+def test_instagram_webhook_returns_503_when_queue_is_full(client, monkeypatch):
+    async def full(jobs):
+        return False
+
+    monkeypatch.setattr(instagram_module.instagram_queue, "submit_many", full)
+
+    response = client.post("/webhook/instagram", json=_payload("hi"))
+
+    assert response.status_code == 503
+
+
+def test_instagram_webhook_rejects_whole_payload_when_only_part_fits(client, monkeypatch):
+    handled = []
+
+    async def fake_handle(sender_id, text):
+        handled.append(text)
+
+    # Room for the first message only.
+    queue = instagram_module.WorkQueue("instagram-test", workers=1, maxsize=1, enqueue_timeout_sec=0.05)
+    monkeypatch.setattr(instagram_module, "instagram_queue", queue)
+    monkeypatch.setattr(instagram_module, "handle_instagram_message", fake_handle)
+
+    response = client.post("/webhook/instagram", json=_payload("hi", "블랙 후드"))
+
+    assert response.status_code == 503
+    assert queue.stats()["enqueued"] == 0 and queue.stats()["rejected"] == 2
+    assert handled == []
@@ -3,6 +3,8 @@ import hmac
 import hashlib
 import json
 
+import fakeredis
+
 import app.services.kakao as kakao_module
 
 
@@ -35,3 +37,33 @@ def test_kakao_webhook_success(client, monkeypatch):
 
     assert response.status_code == 200
     assert response.json()["template"]["outputs"][0]["simpleText"]["text"] == "ok"
+
+
+def test_kakao_webhook_buffers_until_end_signal(client, monkeypatch):
+    calls = []
+
+    async def fake_call(user_id, message):
+        calls.append((user_id, message))
+        return "ok"
+
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setenv("KAKAO_SECRET", "secret")
+    monkeypatch.setattr(kakao_module, "BUFFER_ENABLED", True)
+    monkeypatch.setattr(kakao_module, "get_async_redis", lambda: redis)
+    monkeypatch.setattr(kakao_module, "call_commerce_management", fake_call)
+
+    def post(text):
+        body = json.dumps({"userRequest": {"utterance": text, "user": {"id": "user-1"}}}).encode()
+        return client.post(
+            "/webhook/kakao",
+            data=body,
+            headers={"x-kakao-signature": _sign_body(body, "secret"), "content-type": "application/json"},
+        )
+
+    first = post("블랙 후드 1개")
+    assert first.json()["template"]["outputs"][0]["simpleText"]["text"] == ""
+    assert calls == []
+
+    second = post("이상입니다")
+    assert second.json()["template"]["outputs"][0]["simpleText"]["text"] == "ok"
+    assert calls == [("user-1", "블랙 후드 1개\n이상입니다")]
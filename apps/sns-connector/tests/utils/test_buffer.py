@@ -0,0 +1,124 @@
+import fakeredis
+import pytest
+
+import app.utils.buffer as buffer_module
+from app.utils import aappend_message, aflush_buffer, append_message, ashould_flush, flush_buffer, should_flush
+
+
+class _CountingRedis(fakeredis.FakeRedis):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = []
+
+    def execute_command(self, *args, **options):
+        self.commands.append(args[0])
+        return super().execute_command(*args, **options)
+
+
+@pytest.fixture
+def r():
+    return _CountingRedis(decode_responses=True)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000]
+    monkeypatch.setattr(buffer_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_append_keeps_first_ts_and_refreshes_ttl(r, clock):
+    append_message(r, "s1", "안녕하세요")
+    clock[0] += 3
+    append_message(r, "s1", "주문할게요")
+
+    assert r.lrange("chat:buffer:s1", 0, -1) == ["안녕하세요", "주문할게요"]
+    assert r.hgetall("chat:buffer:meta:s1") == {"first_ts": "1000", "last_ts": "1003", "chars": "10", "messages": "2"}
+    assert 0 < r.ttl("chat:buffer:s1") <= buffer_module.BUFFER_TTL
+    assert 0 < r.ttl("chat:buffer:meta:s1") <= buffer_module.BUFFER_TTL
+
+
+def test_should_flush_rules(r, clock):
+    assert should_flush(r, "s1") is False
+
+    append_message(r, "s1", "a")
+    assert should_flush(r, "s1") is False
+    clock[0] += buffer_module.FLUSH_SILENCE_SEC
+    assert should_flush(r, "s1") is True
+
+    # Steady traffic never goes silent, but MAX_WAIT_SEC still fires.
+    for _ in range(buffer_module.MAX_WAIT_SEC // 2 + 1):
+        clock[0] += 2
+        append_message(r, "s2", "b")
+    assert should_flush(r, "s2") is True
+
+
+def test_should_flush_counts_characters_not_bytes(r, clock):
+    text = "가" * (buffer_module.MAX_CHARS // 2)
+    append_message(r, "s1", text)
+    # 400 Hangul chars are 1200 UTF-8 bytes, still under the 800 char limit.
+    assert should_flush(r, "s1") is False
+    append_message(r, "s1", text)
+    assert should_flush(r, "s1") is True
+
+
+def test_should_flush_reads_only_the_running_counter(r, clock):
+    append_message(r, "s1", "hi")
+    r.hset("chat:buffer:meta:s1", "chars", buffer_module.MAX_CHARS)
+    r.delete("chat:buffer:s1")
+    assert should_flush(r, "s1") is True
+
+    r.rpush("chat:buffer:s2", "x" * buffer_module.MAX_CHARS)
+    append_message(r, "s2", "hi")
+    assert should_flush(r, "s2") is False
+
+
+def test_flush_returns_joined_texts_once(r, clock):
+    append_message(r, "s1", "첫줄")
+    append_message(r, "s1", "둘째줄")
+
+    assert flush_buffer(r, "s1") == "첫줄\n둘째줄"
+    assert flush_buffer(r, "s1") is None
+    assert not r.exists("chat:buffer:s1", "chat:buffer:meta:s1")
+    assert should_flush(r, "s1") is False
+
+    append_message(r, "s1", "셋")
+    assert r.hmget("chat:buffer:meta:s1", ["chars", "messages"]) == ["1", "1"]
+
+
+def test_flush_backs_off_while_locked(r, clock):
+    append_message(r, "s1", "hi")
+    r.set("chat:buffer:lock:s1", "1")
+
+    assert flush_buffer(r, "s1") is None
+    assert r.lrange("chat:buffer:s1", 0, -1) == ["hi"]
+
+
+def test_each_operation_is_one_round_trip(r, clock):
+    append_message(r, "s1", "warm up")
+    should_flush(r, "s1")
+    flush_buffer(r, "s1")
+    r.commands.clear()
+
+    append_message(r, "s1", "hi")
+    should_flush(r, "s1")
+    flush_buffer(r, "s1")
+
+    assert r.commands == ["EVALSHA", "EVALSHA", "EVALSHA"]
+
+
+@pytest.mark.asyncio
+async def test_async_client_shares_scripts_and_state(clock):
+    server = fakeredis.FakeServer()
+    sync_r = fakeredis.FakeRedis(server=server, decode_responses=True)
+    async_r = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+
+    await aappend_message(async_r, "s1", "첫줄")
+    append_message(sync_r, "s1", "둘째줄")
+    assert await ashould_flush(async_r, "s1") is False
+    clock[0] += buffer_module.FLUSH_SILENCE_SEC
+    assert await ashould_flush(async_r, "s1") is True
+
+    assert await aflush_buffer(async_r, "s1") == "첫줄\n둘째줄"
+    assert await aflush_buffer(async_r, "s1") is None
+    assert should_flush(sync_r, "s1") is False
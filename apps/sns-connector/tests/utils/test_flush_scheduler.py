@@ -0,0 +1,117 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+import app.utils.buffer as buffer_module
+from app.utils import aappend_message, aflush_buffer
+from app.utils.buffer import aack_flush, aclaim_due_flushes
+from app.utils.flush_scheduler import run_flush_scheduler
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000]
+    monkeypatch.setattr(buffer_module.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def _client(server):
+    return fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+
+
+@pytest.mark.asyncio
+async def test_silent_buffer_is_claimed_exactly_once(server, clock):
+    replica_a, replica_b = _client(server), _client(server)
+    await aappend_message(replica_a, "s1", "블랙 후드")
+    await aappend_message(replica_a, "s1", "1개요")
+
+    assert await aclaim_due_flushes(replica_a, 10) == []
+    clock[0] += buffer_module.FLUSH_SILENCE_SEC
+
+    claims = await aclaim_due_flushes(replica_a, 10)
+    assert [(c.session_id, c.text) for c in claims] == [("s1", "블랙 후드\n1개요")]
+    assert await aclaim_due_flushes(replica_b, 10) == []
+    assert not await replica_a.exists("chat:buffer:s1", "chat:buffer:meta:s1")
+
+
+@pytest.mark.asyncio
+async def test_steady_traffic_is_claimed_at_max_wait(server, clock):
+    r = _client(server)
+    start = clock[0]
+    while clock[0] - start < buffer_module.MAX_WAIT_SEC:
+        await aappend_message(r, "s1", "msg")
+        assert await aclaim_due_flushes(r, 10) == []
+        clock[0] += buffer_module.FLUSH_SILENCE_SEC - 1
+
+    claims = await aclaim_due_flushes(r, 10)
+    assert len(claims) == 1 and claims[0].text.count("msg") > 1
+
+
+@pytest.mark.asyncio
+async def test_unacked_claim_is_retried_after_lease(server, clock):
+    r = _client(server)
+    await aappend_message(r, "s1", "hi")
+    clock[0] += buffer_module.FLUSH_SILENCE_SEC
+    first = await aclaim_due_flushes(r, 10, lease_sec=30)
+
+    # The claiming replica "crashed": nothing comes back until the lease ends.
+    clock[0] += 29
+    assert await aclaim_due_flushes(r, 10, lease_sec=30) == []
+    clock[0] += 1
+    retried = await aclaim_due_flushes(r, 10, lease_sec=30)
+    assert retried == first
+
+    await aack_flush(r, retried[0].flush_id)
+    clock[0] += 60
+    assert await aclaim_due_flushes(r, 10, lease_sec=30) == []
+    assert await r.keys("chat:buffer:flushing:[0-9]*") == []
+
+
+@pytest.mark.asyncio
+async def test_inline_flush_cancels_the_deadline(server, clock):
+    r = _client(server)
+    await aappend_message(r, "s1", "주문 완료")
+    assert await aflush_buffer(r, "s1") == "주문 완료"
+
+    clock[0] += buffer_module.MAX_WAIT_SEC
+    assert await aclaim_due_flushes(r, 10) == []
+    assert await r.zcard("chat:buffer:deadlines") == 0
+
+
+@pytest.mark.asyncio
+async def test_replicas_share_work_and_deliver_each_session_once(server, clock):
+    writer = _client(server)
+    sessions = [f"s{i}" for i in range(40)]
+    for session in sessions:
+        await aappend_message(writer, session, f"{session} 주문")
+    clock[0] += buffer_module.FLUSH_SILENCE_SEC
+
+    delivered = []
+
+    async def handler(session_id, text):
+        await asyncio.sleep(0)
+        delivered.append((session_id, text))
+
+    replicas = [
+        asyncio.create_task(
+            run_flush_scheduler(lambda: _client(server), handler, poll_sec=0.001, batch_size=5, workers=3)
+        )
+        for _ in range(2)
+    ]
+    for _ in range(200):
+        if len(delivered) == len(sessions):
+            break
+        await asyncio.sleep(0.005)
+    await asyncio.sleep(0.02)
+    for task in replicas:
+        task.cancel()
+    await asyncio.gather(*replicas, return_exceptions=True)
+
+    assert sorted(delivered) == sorted((s, f"{s} 주문") for s in sessions)
+    assert await writer.zcard("chat:buffer:flushing:leases") == 0
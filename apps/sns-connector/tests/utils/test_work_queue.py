@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.utils.work_queue import WorkQueue
+
+
+@pytest.mark.asyncio
+async def test_workers_bound_concurrency_and_report_latency():
+    queue = WorkQueue("test", workers=2, maxsize=10, enqueue_timeout_sec=1)
+    running = []
+    peak = []
+
+    async def job():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    for _ in range(6):
+        assert await queue.submit(job) is True
+    await queue.drain(timeout_sec=1)
+
+    stats = queue.stats()
+    assert max(peak) == 2
+    assert stats["processed"] == 6 and stats["depth"] == 0
+    assert stats["latency_ms_avg"] >= 10
+    assert stats["wait_ms_max"] > stats["wait_ms_avg"] > 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_pushes_back():
+    queue = WorkQueue("test", workers=1, maxsize=1, enqueue_timeout_sec=0.01)
+    release = asyncio.Event()
+
+    async def blocked():
+        await release.wait()
+
+    assert await queue.submit(blocked) is True
+    await asyncio.sleep(0)  # worker takes the first job
+    assert await queue.submit(blocked) is True
+    assert await queue.submit(blocked) is False
+    assert queue.stats()["rejected"] == 1 and queue.stats()["depth"] == 1
+
+    release.set()
+    await queue.drain(timeout_sec=1)
+    assert queue.stats()["processed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_submit_many_enqueues_all_or_nothing():
+    queue = WorkQueue("test", workers=1, maxsize=2, enqueue_timeout_sec=0.2)
+    release = asyncio.Event()
+    done = []
+
+    async def blocked():
+        await release.wait()
+
+    async def job():
+        done.append(1)
+
+    assert await queue.submit(blocked) is True
+    await asyncio.sleep(0)  # worker takes the blocked job
+    assert await queue.submit(job) is True
+    # One slot left: a two-job batch is refused without enqueuing either job.
+    assert await queue.submit_many([job, job]) is False
+    assert queue.stats()["depth"] == 1 and queue.stats()["rejected"] == 2
+
+    # Room frees up while the batch waits.
+    asyncio.get_running_loop().call_later(0.01, release.set)
+    assert await queue.submit_many([job, job]) is True
+    await queue.drain(timeout_sec=1)
+    assert done == [1, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_drain_finishes_pending_jobs_and_stops_intake():
+    queue = WorkQueue("test", workers=1, maxsize=10, enqueue_timeout_sec=1)
+    done = []
+
+    async def job():
+        await asyncio.sleep(0.005)
+        done.append(1)
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    for _ in range(3):
+        await queue.submit(job)
+    await queue.submit(broken)
+    await queue.drain(timeout_sec=1)
+
+    assert len(done) == 3
+    assert queue.stats()["failed"] == 1
+    assert await queue.submit(job) is False